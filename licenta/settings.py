@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+from django.core.exceptions import ImproperlyConfigured
+from myapp.planner_presets import PLANNER_PRESETS
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -139,3 +141,82 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # API Keys and other sensitive information
 USDA_API_KEY = ''
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # shared by all processes, so that a catalog version bump (e.g. from import_foods)
+    # reaches every web worker
+    'food_catalog': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'food_catalog',
+        'TIMEOUT': None,
+    },
+}
+
+# number of processes used to run the meal searches of one plan (1 = in the job process)
+MEAL_PLANNER_WORKERS = int(os.getenv('MEAL_PLANNER_WORKERS', '1'))
+
+# island model: number of populations evolved in parallel processes for every meal (1 = disabled)
+MEAL_PLANNER_ISLANDS = int(os.getenv('MEAL_PLANNER_ISLANDS', '1'))
+
+# warm start: seed each meal search with the best meals of earlier days and of the user's previous plan
+MEAL_PLANNER_WARM_START = bool(int(os.getenv('MEAL_PLANNER_WARM_START', '0')))
+
+# week mode: evolve the 7 days of each meal type together, penalizing meals repeated across days
+MEAL_PLANNER_WEEK_MODE = bool(int(os.getenv('MEAL_PLANNER_WEEK_MODE', '0')))
+
+# run selection, crossover and mutation on NumPy arrays of the whole population (see myapp/genetic_operators.py)
+MEAL_PLANNER_VECTORIZED_OPERATORS = bool(int(os.getenv('MEAL_PLANNER_VECTORIZED_OPERATORS', '0')))
+
+# planner preset of plans requested without one: fast, balanced or thorough (see myapp/planner_presets.py);
+# switch to fast during peak load
+MEAL_PLANNER_PRESET = os.getenv('MEAL_PLANNER_PRESET', 'balanced')
+if MEAL_PLANNER_PRESET not in PLANNER_PRESETS:
+    raise ImproperlyConfigured(
+        f"Unknown MEAL_PLANNER_PRESET {MEAL_PLANNER_PRESET!r}, expected one of: {', '.join(PLANNER_PRESETS)}"
+    )
+
+# early stopping of every meal search (empty = disabled): stop after MEAL_PLANNER_PATIENCE generations
+# without improvement, or once the best meal reaches MEAL_PLANNER_TARGET_FITNESS
+MEAL_PLANNER_PATIENCE = int(os.getenv('MEAL_PLANNER_PATIENCE')) if os.getenv('MEAL_PLANNER_PATIENCE') else None
+MEAL_PLANNER_TARGET_FITNESS = (
+    float(os.getenv('MEAL_PLANNER_TARGET_FITNESS')) if os.getenv('MEAL_PLANNER_TARGET_FITNESS') else None
+)
+
+# time budgets in milliseconds of every meal search and of a whole plan, bounding the request latency
+# (empty = disabled); a plan cut short depends on the machine, not only on its seed (see MealPlan.stats)
+MEAL_PLANNER_MEAL_TIME_BUDGET_MS = (
+    float(os.getenv('MEAL_PLANNER_MEAL_TIME_BUDGET_MS')) if os.getenv('MEAL_PLANNER_MEAL_TIME_BUDGET_MS') else None
+)
+MEAL_PLANNER_PLAN_TIME_BUDGET_MS = (
+    float(os.getenv('MEAL_PLANNER_PLAN_TIME_BUDGET_MS')) if os.getenv('MEAL_PLANNER_PLAN_TIME_BUDGET_MS') else None
+)
+
+# Unix socket of the run_planner_service command; new jobs are sent to it (empty = jobs are only polled)
+MEAL_PLANNER_SOCKET = os.getenv('MEAL_PLANNER_SOCKET', '')
+
+# planner logs: one INFO line per plan; set MEAL_PLANNER_LOG_LEVEL=DEBUG for per-generation details
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '{asctime} {levelname} {name}: {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'myapp': {
+            'handlers': ['console'],
+            'level': os.getenv('MEAL_PLANNER_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import User
-from .models import QuizResponse, Food, MealPlan, MealPlanDay, Meal, MealFoodItem, FoodJournal
+from .models import QuizResponse, Food, MealPlan, MealPlanDay, Meal, MealFoodItem, FoodJournal, MealPlanJob
 from django.contrib.auth.models import User as DjangoUser
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
 
@@ -28,6 +28,12 @@ class MealPlanAdmin(admin.ModelAdmin):
     list_filter = ('created_at',)
     search_fields = ('name', 'description', 'user__username')
 
+@admin.register(MealPlanJob)
+class MealPlanJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'status', 'meal_plan', 'created_at', 'started_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('user__username', 'error')
+
 @admin.register(MealPlanDay)
 class MealPlanDayAdmin(admin.ModelAdmin):
     list_display = ('meal_plan', 'get_day_display')
@@ -0,0 +1,53 @@
+"""Helpers shared by the planner benchmark commands (benchmark_planner, benchmark_catalog, ...)."""
+import logging
+import time
+import numpy as np
+from .food_catalog import (
+    FoodCatalog, NUTRIENT_FIELDS, MEAL_CATEGORIES, MEAL_FUNCTIONAL_CATEGORIES, CONFLICTING_FOOD_GROUPS
+)
+
+
+def quiet_planner_logs():
+    """Report only the benchmark results, not the planner logs (catalog loads, searches, ...)."""
+    logging.getLogger('myapp').setLevel(logging.WARNING)
+
+
+def timed(func, *args, **kwargs):
+    """Call `func` and return (its result, the elapsed seconds)."""
+    start_time = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start_time
+
+
+def seconds_per_call(func, calls):
+    """Average seconds of `calls` calls of `func`, for operations too fast to time one by one."""
+    start_time = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start_time) / calls
+
+
+def synthetic_catalog(catalog, size, seed=0):
+    """Build a catalog of `size` foods by repeating the foods of `catalog` with jittered nutrients.
+
+    Copies keep the name (with a copy number) and category of their food, so meal types, functional
+    slots and conflict groups scale with the catalog. Nutrients vary by up to 10%."""
+    rng = np.random.default_rng(seed)
+    rows = np.arange(size) % len(catalog)
+    nutrients = catalog.nutrients[rows] * rng.uniform(0.9, 1.1, size=(size, 1))
+
+    foods = [
+        dict(
+            zip(NUTRIENT_FIELDS, nutrients[index].tolist()),
+            id=index + 1,
+            name=f"{catalog.names[row]} {index // len(catalog)}",
+            food_category=catalog.category_name(row),
+        )
+        for index, row in enumerate(rows.tolist())
+    ]
+    return FoodCatalog(foods, MEAL_CATEGORIES, MEAL_FUNCTIONAL_CATEGORIES, CONFLICTING_FOOD_GROUPS)
+
+
+def daily_targets(calories):
+    """Daily (calories, protein, carbs, fat) targets with 30% of the energy from protein, 45% from carbs."""
+    return calories, calories * 0.30 / 4, calories * 0.45 / 4, calories * 0.25 / 9
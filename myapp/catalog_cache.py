@@ -0,0 +1,111 @@
+import logging
+import signal
+import threading
+from django.core.cache import caches
+from django.db import connections
+from django.db.models import Q
+from .models import Food
+from .food_catalog import (
+    FoodCatalog, UNHEALTHY_FOODS, MEAL_CATEGORIES, MEAL_FUNCTIONAL_CATEGORIES, CONFLICTING_FOOD_GROUPS
+)
+
+logger = logging.getLogger(__name__)
+
+# cache alias (see settings.CACHES) shared by all processes, holding the catalog version
+CATALOG_CACHE_ALIAS = 'food_catalog'
+CATALOG_VERSION_KEY = 'food_catalog_version'
+
+# process-wide catalog, shared read-only by every planner of this process
+_catalog = None
+_catalog_lock = threading.Lock()
+
+# catalog of a planner pool process, received once when the process starts (see init_catalog_worker)
+_worker_catalog = None
+
+
+def get_catalog_version():
+    """Return the current catalog version (0 until the foods are changed for the first time)."""
+    return caches[CATALOG_CACHE_ALIAS].get(CATALOG_VERSION_KEY, 0)
+
+
+def bump_catalog_version():
+    """Invalidate the catalog of every process by moving to a new catalog version."""
+    cache = caches[CATALOG_CACHE_ALIAS]
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        # the version key does not exist yet
+        if cache.add(CATALOG_VERSION_KEY, 1, timeout=None):
+            return 1
+        return cache.incr(CATALOG_VERSION_KEY)
+
+
+def load_food_catalog(version=None):
+    """Load the healthy foods from the database into a new FoodCatalog.
+
+    Excludes unhealthy foods and organizes available foods into categories suitable
+    for different meal types (breakfast, lunch, dinner, snack)."""
+    unhealthy_query = Q()
+    for unhealthy_food in UNHEALTHY_FOODS:
+        unhealthy_query |= Q(name__icontains=unhealthy_food)
+
+    # load all healthy foods from the database
+    all_foods = list(Food.objects.exclude(
+        Q(calories_per_100g=0) | unhealthy_query
+    ).values('id', 'name', 'calories_per_100g',
+            'protein_per_100g', 'carbs_per_100g', 'fat_per_100g', 'food_category'))
+
+    logger.info("Loaded %d healthy foods into the food catalog (version %s)", len(all_foods), version)
+
+    # foods are packed into arrays; meal types only keep row indexes into the catalog,
+    # and the conflict groups are compiled into per-food bitmasks
+    return FoodCatalog(
+        all_foods, MEAL_CATEGORIES, MEAL_FUNCTIONAL_CATEGORIES, CONFLICTING_FOOD_GROUPS, version=version
+    )
+
+
+def get_food_catalog():
+    """Return the process-wide food catalog, reloading it if the catalog version changed.
+
+    Only one thread reloads a stale or missing catalog; the others wait for it and reuse
+    the result instead of all querying the database at once."""
+    global _catalog
+
+    version = get_catalog_version()
+    catalog = _catalog
+    if catalog is not None and catalog.version == version:
+        return catalog
+
+    with _catalog_lock:
+        # another thread may have reloaded the catalog while we were waiting for the lock
+        if _catalog is None or _catalog.version != version:
+            # the version is read before loading, so a change made during the load
+            # triggers another reload on the next call
+            _catalog = load_food_catalog(version)
+        return _catalog
+
+
+def clear_food_catalog():
+    """Drop the catalog of this process, so the next planner loads it again."""
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
+
+
+def init_catalog_worker(catalog):
+    """Initializer of the planner process pools, which receive the catalog of the parent process once.
+
+    Database connections inherited from the parent must not be shared, so each process opens its own.
+    Progress is reported by the parent; one log line per plan would flood its output. Ctrl-C reaches
+    the whole process group, but only the parent handles it: a process killed in the middle of a task
+    would break the pool instead of letting the parent stop cleanly."""
+    global _worker_catalog
+    _worker_catalog = catalog
+    connections.close_all()
+    logging.getLogger('myapp').setLevel(logging.WARNING)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def get_worker_catalog():
+    """Return the catalog this pool process received from init_catalog_worker."""
+    return _worker_catalog
@@ -0,0 +1,225 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# column order of the nutrient matrix
+NUTRIENT_FIELDS = ['calories_per_100g', 'protein_per_100g', 'carbs_per_100g', 'fat_per_100g']
+
+# foods excluded from meal plans (matched against the food name)
+UNHEALTHY_FOODS = ['pasta', 'pizza', 'cake', 'cookies', 'sugar', 'candy',
+                   'chocolate', 'soda', 'fries', 'chips', 'ice cream', 'burrito', 'croissant']
+
+# food categories allocated to each meal type
+MEAL_CATEGORIES = {
+    'breakfast': ['cereal','toast', 'oats', 'egg', 'milk', 'yogurt', 'bread', 'cheese', 'apple', 
+                  'banana', 'fruit','bacon','sausage', 'bagel', 'bread whole-wheat', 'french toast',
+                  'greek yogurt','egg whole', 'egg white'],
+    'lunch': ['chicken', 'turkey', 'beef', 'fish', 'rice', 'potato', 'vegetable', 'beans', 'lentils', 'soup', 'salad', 'corn'
+                    , 'green beans', 'broccoli', 'spinach', 'carrot', 'bread', 'bulgur','chicken breast',
+                    'tomato','tofu'],
+    'dinner': ['chicken', 'beef', 'asparagus', 'fish', 'salmon','sweet potato', 'rice', 'potato', 'vegetable', 'broccoli', 'spinach', 'asparagus', 'green beans',
+                     'cauliflower', 'corn', 'carrot','chicken breast','tomato','tofu'],
+    'snack': ['fruit', 'apple', 'banana', 'orange', 'grape', 'strawberry', 'blueberry', 'nuts', 
+              'yogurt', 'peanuts roasted', 'peanuts','almonds roasted','greek yogurt', 'protein bar']
+}
+
+# functional categories for meals
+MEAL_FUNCTIONAL_CATEGORIES = {
+    'breakfast': {
+        'main': ['egg', 'cereal', 'oats', 'yogurt', 'greek yogurt', 'bacon', 'sausage','egg whole','egg white'],
+        'side': ['banana', 'milk', 'yogurt', 'bread','toast', 'bagel','bread whole-wheat', 'french toast',
+                  ], 
+        'max_items': 3  
+    },
+    'lunch': {
+        'protein': ['chicken', 'beef', 'fish', 'salmon', 'beans', 'lentils','turkey','chicken breast',
+                    'tofu'], 
+        'carbs': ['rice', 'potato', 'bread', 'bulgur'],  
+        'veggies': ['vegetable', 'broccoli', 'spinach', 'salad', 'carrot', 'beans', 'lentils', 'corn'
+                    , 'green beans','tomato'], 
+        'max_items': 5
+    },
+    'dinner': {
+        'protein': ['chicken', 'beef', 'fish', 'salmon','chicken breast','tofu'],  
+        'carbs': ['rice', 'potato','sweet_potato'],  
+        'veggies': ['vegetable', 'broccoli', 'spinach', 'carrot','asparagus', 'green beans',
+                     'cauliflower', 'corn','tomato'],  
+        'max_items': 5
+    },
+    'snack': {
+        'items': ['fruit', 'apple', 'banana', 'strawberry', 'nuts', 'yogurt', 'blueberries', 
+                  'peanuts', 'peanuts roasted', 'almonds roasted', 'greek yogurt','protein bar'],
+        'max_items': 2  
+    }
+}
+
+# groups of foods that should not appear together in the same meal
+CONFLICTING_FOOD_GROUPS = [
+    ['yogurt', 'greek yogurt'],
+    ['milk', 'low fat milk', 'skim milk'],
+    ['cheese', 'cottage cheese', 'cream cheese'],
+    ['bread', 'toast', 'bread whole-wheat'],
+    ['chicken', 'chicken breast', 'roasted chicken'],
+    ['beef', 'ground beef', 'roasted beef'],
+    ['peanuts', 'peanuts roasted'],
+    ['almonds', 'almonds roasted'],
+    ['rice', 'brown rice', 'wild rice'],
+    ['potato', 'sweet potato', 'mashed potato'],
+    ['egg', 'egg whole', 'egg white'],
+]
+
+
+
+class FoodCatalog:
+    """Compact, array-backed catalog of the foods available to the meal planner.
+
+    Foods are stored as a struct of arrays (one row per food): float32 nutrient columns,
+    integer category ids and a name table. Meal types hold index arrays of rows into the
+    catalog instead of copies of the foods, and food ids are resolved to rows in O(1).
+    Scores computed from the float32 nutrients differ from float64 ones by a few 1e-8.
+
+    Conflicting food groups are compiled once, at load time, into one bitmask per food
+    (bit g is set when the food's name matches an item of group g).
+
+    A catalog is read-only once built; `version` records the catalog version it was loaded at."""
+
+    def __init__(self, foods, meal_categories, functional_categories=None, conflict_groups=None, min_meal_foods=10,
+                 version=None):
+        count = len(foods)
+        self.version = version
+
+        self.ids = np.fromiter((food['id'] for food in foods), dtype=np.int64, count=count)
+        self.names = [food['name'] for food in foods]
+        self.nutrients = np.array(
+            [[food[field] for field in NUTRIENT_FIELDS] for food in foods], dtype=np.float32
+        ).reshape(count, len(NUTRIENT_FIELDS))
+
+        # integer category ids (-1 for foods without a category), names kept in a small table
+        self.categories = []
+        category_index = {}
+        self.category_ids = np.full(count, -1, dtype=np.int32)
+        for row, food in enumerate(foods):
+            category = (food.get('food_category') or '').lower()
+            if category:
+                if category not in category_index:
+                    category_index[category] = len(self.categories)
+                    self.categories.append(category)
+                self.category_ids[row] = category_index[category]
+
+        self._row_by_id = {food_id: row for row, food_id in enumerate(self.ids.tolist())}
+
+        self.conflict_group_count = len(conflict_groups or [])
+        self.conflict_masks = self._compile_conflict_masks(conflict_groups or [])
+
+        self.functional = functional_categories or {}
+        self.meal_rows = self._build_meal_rows(meal_categories, category_index, min_meal_foods)
+
+        # functional slot -> candidate rows, computed once per catalog load
+        self.slot_rows = self._build_slot_rows()
+
+    def _compile_conflict_masks(self, conflict_groups):
+        """Compile the conflicting food groups into one integer bitmask per catalog row."""
+        groups = [[item.lower() for item in group] for group in conflict_groups]
+        masks = np.zeros(len(self.names), dtype=np.int64)
+        for row, name in enumerate(self.names):
+            name = name.lower()
+            mask = 0
+            for group_index, group in enumerate(groups):
+                if any(item in name for item in group):
+                    mask |= 1 << group_index
+            masks[row] = mask
+        return masks
+
+    def _build_meal_rows(self, meal_categories, category_index, min_meal_foods):
+        """Build the per-meal-type index arrays pointing into the catalog rows."""
+        rows_by_category = {}
+        for row, category_id in enumerate(self.category_ids.tolist()):
+            rows_by_category.setdefault(category_id, []).append(row)
+
+        meal_rows = {}
+        for meal_type, categories in meal_categories.items():
+            rows = []
+            for category in categories:
+                if category in category_index:
+                    rows.extend(rows_by_category[category_index[category]])
+
+            logger.debug("%s: %d foods attributed %s", meal_type, len(rows), ', '.join(categories))
+
+            # if there are not enough foods for this meal type, add from other categories
+            if len(rows) < min_meal_foods:
+                logger.warning("Not enough foods for %s, adding other categories", meal_type)
+                meal_category_ids = {category_index[category] for category in categories if category in category_index}
+                for category_id, category_rows in rows_by_category.items():
+                    if category_id not in meal_category_ids:
+                        rows.extend(category_rows)
+
+            meal_rows[meal_type] = np.array(rows, dtype=np.int32)
+
+        return meal_rows
+
+    def _build_slot_rows(self):
+        """Index the candidate rows of every functional slot (e.g. lunch 'protein') of every meal type.
+
+        A food belongs to a slot when its category contains one of the slot keywords. The match is
+        evaluated once per category, and candidates keep the order of the meal type's rows."""
+        slot_rows = {}
+        for meal_type, slots in self.functional.items():
+            meal_rows = self.meal_rows.get(meal_type, np.zeros(0, dtype=np.int32))
+            meal_category_ids = self.category_ids[meal_rows]
+            slot_rows[meal_type] = {}
+
+            for slot, keywords in slots.items():
+                if slot == 'max_items':
+                    continue
+
+                # one extra trailing entry so that foods without a category (-1) never match
+                matches = np.array(
+                    [any(keyword in category for keyword in keywords) for category in self.categories] + [False]
+                )
+                slot_rows[meal_type][slot] = meal_rows[matches[meal_category_ids]]
+
+        return slot_rows
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def calories(self):
+        return self.nutrients[:, 0]
+
+    @property
+    def protein(self):
+        return self.nutrients[:, 1]
+
+    @property
+    def carbs(self):
+        return self.nutrients[:, 2]
+
+    @property
+    def fat(self):
+        return self.nutrients[:, 3]
+
+    def row_of(self, food_id):
+        """Return the catalog row of a food id, or None if the food is not in the catalog."""
+        return self._row_by_id.get(food_id)
+
+    def food_id(self, row):
+        return int(self.ids[row])
+
+    def category_name(self, row):
+        """Return the lowercase category of the food at a row ('' if it has none)."""
+        category_id = self.category_ids[row]
+        return self.categories[category_id] if category_id >= 0 else ''
+
+    def calories_of(self, row):
+        return float(self.nutrients[row, 0])
+
+    def nutrients_of(self, row):
+        """Return (calories, protein, carbs, fat) per 100g for the food at a row as Python floats."""
+        return self.nutrients[row].tolist()
+
+    def index_for(self, rows):
+        """Map the food ids of the given rows to their catalog rows."""
+        rows = np.asarray(rows)
+        return dict(zip(self.ids[rows].tolist(), rows.tolist()))
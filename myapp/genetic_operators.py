@@ -0,0 +1,152 @@
+import numpy as np
+
+# largest number of foods in a meal, and width of the padded genome arrays
+MAX_MEAL_FOODS = 8
+
+# (slot, lowest grams, highest grams) of the foods drawn for a new meal of each meal type
+MEAL_SLOTS = {
+    'breakfast': [('main', 50, 100), ('side', 100, 200)],
+    'lunch': [('protein', 60, 120), ('carbs', 70, 150), ('veggies', 100, 200)],
+    'dinner': [('protein', 60, 120), ('carbs', 70, 150), ('veggies', 100, 200)],
+    'snack': [('items', 30, 80), ('items', 20, 50)],
+}
+
+# slots filled only for some meals (probability), and slots that must differ from the previous food
+OPTIONAL_SLOT_PROBABILITY = {('snack', 1): 0.5}
+DISTINCT_SLOTS = {('breakfast', 1), ('snack', 1)}
+
+
+def empty_meals(count):
+    """Return the (rows, amounts, lengths) arrays of `count` meals without foods."""
+    return (
+        np.full((count, MAX_MEAL_FOODS), -1, dtype=np.int64),
+        np.zeros((count, MAX_MEAL_FOODS)),
+        np.zeros(count, dtype=np.int64),
+    )
+
+
+def compact(rows, amounts):
+    """Move the foods of every meal in front of its empty (-1) slots. Returns (rows, amounts, lengths)."""
+    order = np.argsort(rows < 0, axis=1, kind='stable')
+    rows = np.take_along_axis(rows, order, axis=1)
+    amounts = np.take_along_axis(amounts, order, axis=1)
+    lengths = (rows >= 0).sum(axis=1)
+    return rows, np.where(rows >= 0, amounts, 0.0), lengths
+
+
+def initialize_meals(gen, catalog, meal_type, count, target_calories):
+    """Draw `count` new meals of a meal type, as _initialize_population does for one meal.
+
+    Every slot of the meal type gets a random candidate food of its functional slot, with an
+    amount drawn in the slot's range; the portions are then scaled towards the calorie target."""
+    rows, amounts, lengths = empty_meals(count)
+    slot_rows = catalog.slot_rows.get(meal_type, {})
+    everyone = np.arange(count)
+
+    previous = None
+    for index, (slot, low, high) in enumerate(MEAL_SLOTS.get(meal_type, [])):
+        candidates = slot_rows.get(slot, [])
+        if not len(candidates):
+            previous = None
+            continue
+
+        chosen = candidates[gen.integers(len(candidates), size=count)]
+        filled = np.ones(count, dtype=bool)
+        if (meal_type, index) in OPTIONAL_SLOT_PROBABILITY:
+            filled &= gen.random(count) < OPTIONAL_SLOT_PROBABILITY[(meal_type, index)]
+        if (meal_type, index) in DISTINCT_SLOTS and previous is not None:
+            # redraw the foods equal to the previous slot's, giving up on single-candidate slots
+            for _ in range(8):
+                clash = chosen == previous
+                if not clash.any():
+                    break
+                chosen[clash] = candidates[gen.integers(len(candidates), size=int(clash.sum()))]
+            filled &= chosen != previous
+
+        grams = gen.uniform(low, high, size=count)
+        meals = everyone[filled]
+        rows[meals, lengths[meals]] = chosen[meals]
+        amounts[meals, lengths[meals]] = grams[meals]
+        lengths[meals] += 1
+        previous = np.where(filled, chosen, -1)
+
+    # scale the portions of meals far from the calorie target
+    calories = (amounts / 100 * np.where(rows >= 0, catalog.calories[np.maximum(rows, 0)], 0.0)).sum(axis=1)
+    ratio = target_calories / np.maximum(calories, 1)
+    scale = np.where(calories < 0.7 * target_calories, np.minimum(1.5, ratio), 1.0)
+    scale = np.where(calories > 1.3 * target_calories, np.maximum(0.6, ratio), scale)
+    return rows, amounts * scale[:, None], lengths
+
+
+def tournament_select(gen, scores, count, tournament_size=3):
+    """Indices of the winners of `count` tournaments between random meals (drawn with replacement)."""
+    candidates = gen.integers(len(scores), size=(count, tournament_size))
+    return candidates[np.arange(count), np.argmax(scores[candidates], axis=1)]
+
+
+def uniform_crossover(gen, rows1, amounts1, rows2, amounts2):
+    """Cross pairs of parent meals, as _crossover does for one pair.
+
+    Each food of the first parent, then of the second, is inherited with probability 1/2, skipping
+    foods the child already has, up to MAX_MEAL_FOODS foods. A child that inherited no food is a copy
+    of its first parent (of its second one if the first is empty). Returns (rows, amounts, lengths)."""
+    rows = np.concatenate([rows1, rows2], axis=1)
+    amounts = np.concatenate([amounts1, amounts2], axis=1)
+    inherited = (rows >= 0) & (gen.random(rows.shape) < 0.5)
+
+    # a food is skipped when an earlier inherited gene holds the same food
+    width = rows.shape[1]
+    earlier = np.tri(width, width, k=-1, dtype=bool)
+    repeated = ((rows[:, :, None] == rows[:, None, :]) & earlier & inherited[:, None, :]).any(axis=2)
+    inherited &= ~repeated
+    inherited &= np.cumsum(inherited, axis=1) <= MAX_MEAL_FOODS
+
+    empty = ~inherited.any(axis=1)
+    inherited[empty] = (rows[empty] >= 0) & np.where((rows1[empty] >= 0).any(axis=1, keepdims=True),
+                                                     np.arange(width) < rows1.shape[1], True)
+
+    rows, amounts, lengths = compact(np.where(inherited, rows, -1), amounts)
+    return rows[:, :MAX_MEAL_FOODS], amounts[:, :MAX_MEAL_FOODS], np.minimum(lengths, MAX_MEAL_FOODS)
+
+
+def sample_new_foods(gen, pool, rows, draws=16):
+    """Draw for every meal a random food of the pool that it does not contain yet (-1 if all draws failed).
+
+    Rejection sampling with a fixed number of draws per meal, so the cost does not depend on the pool size."""
+    candidates = pool[gen.integers(len(pool), size=(len(rows), draws))]
+    free = ~(candidates[:, :, None] == rows[:, None, :]).any(axis=2)
+    first_free = np.argmax(free, axis=1)
+    return np.where(free.any(axis=1), candidates[np.arange(len(rows)), first_free], -1)
+
+
+def mutate_meals(gen, rows, amounts, lengths, pool, mutation_rate):
+    """Mutate copies of the meals, as _mutate does for one meal.
+
+    A meal is mutated with probability `mutation_rate`, by one of: adding a food, removing one,
+    replacing one by a new food, or scaling the amount of one. Returns (rows, amounts, lengths)."""
+    rows = rows.copy()
+    amounts = amounts.copy()
+    count = len(rows)
+
+    mutated = gen.random(count) < mutation_rate
+    kind = gen.integers(4, size=count)
+    position = (gen.random(count) * np.maximum(lengths, 1)).astype(np.int64)
+    new_rows = sample_new_foods(gen, pool, rows) if len(pool) else np.full(count, -1)
+    new_amounts = gen.uniform(20, 100, size=count)
+    factors = gen.uniform(0.7, 1.3, size=count)
+
+    add = np.nonzero(mutated & (kind == 0) & (lengths < MAX_MEAL_FOODS) & (new_rows >= 0))[0]
+    rows[add, lengths[add]] = new_rows[add]
+    amounts[add, lengths[add]] = new_amounts[add]
+
+    remove = np.nonzero(mutated & (kind == 1) & (lengths > 1))[0]
+    rows[remove, position[remove]] = -1
+
+    replace = np.nonzero(mutated & (kind == 2) & (lengths > 0) & (new_rows >= 0))[0]
+    rows[replace, position[replace]] = new_rows[replace]
+    amounts[replace, position[replace]] = new_amounts[replace]
+
+    adjust = np.nonzero(mutated & (kind == 3) & (lengths > 0))[0]
+    amounts[adjust, position[adjust]] = np.clip(amounts[adjust, position[adjust]] * factors[adjust], 10, 200)
+
+    return compact(rows, amounts)
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from myapp.benchmarking import quiet_planner_logs, timed
+from myapp.catalog_cache import load_food_catalog, get_food_catalog
+from myapp.genetic_meal_planner import GeneticMealPlanner
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request planner setup time with and without the shared food catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            help='Number of simulated planner requests',
+            default=20
+        )
+
+    def _planner_setup_times(self, requests, catalog_factory):
+        """Time the creation of one planner per request, building its catalog with catalog_factory."""
+        return [
+            timed(lambda: GeneticMealPlanner(None, 2000, 150, 200, 67, catalog=catalog_factory()))[1]
+            for _ in range(requests)
+        ]
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+
+        # the catalog loader logs every load
+        quiet_planner_logs()
+
+        # previous behaviour: every planner queried and grouped the foods again
+        cold_times = self._planner_setup_times(requests, load_food_catalog)
+
+        # shared catalog: loaded once per process, then only the version is checked
+        get_food_catalog()
+        warm_times = self._planner_setup_times(requests, get_food_catalog)
+
+        cold_avg = sum(cold_times) / len(cold_times) * 1000
+        warm_avg = sum(warm_times) / len(warm_times) * 1000
+
+        self.stdout.write(f"Catalog foods: {len(get_food_catalog())}")
+        self.stdout.write(f"Per-request setup, catalog reloaded: {cold_avg:.2f} ms")
+        self.stdout.write(f"Per-request setup, shared catalog:   {warm_avg:.2f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved {cold_avg - warm_avg:.2f} ms per request ({cold_avg / max(warm_avg, 1e-6):.0f}x faster setup)"
+        ))
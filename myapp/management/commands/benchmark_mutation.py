@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from myapp.benchmarking import quiet_planner_logs, seconds_per_call, synthetic_catalog
+from myapp.catalog_cache import get_food_catalog
+from myapp.planner_engine import MealPlanEngine
+
+
+class Command(BaseCommand):
+    help = 'Measure the cost of drawing a mutation candidate as the food catalog grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            nargs='+',
+            type=int,
+            help='Synthetic catalog sizes, measured after the fixture catalog',
+            default=[10_000, 100_000]
+        )
+        parser.add_argument(
+            '--draws',
+            type=int,
+            help='Number of candidate draws per catalog',
+            default=20000
+        )
+
+    def handle(self, *args, **options):
+        quiet_planner_logs()
+
+        fixture = get_food_catalog()
+        catalogs = [fixture] + [synthetic_catalog(fixture, size) for size in options['sizes']]
+
+        self.stdout.write(f"{'Foods':>8} {'Pool':>8} {'Filter us':>10} {'Sample us':>10} {'Mutate us':>10}")
+        for catalog in catalogs:
+            planner = MealPlanEngine(catalog, 2200, 140, 250, 70, seed=1)
+            planner.mutation_rate = 1.0
+            foods = catalog.meal_rows['lunch']
+            meal = planner._initialize_population(foods, 770, 'lunch')[0]
+
+            # previous sampling: filter the whole pool, then choose among the remaining foods
+            filter_us = seconds_per_call(
+                lambda: planner.rng.choice(planner._available_foods(foods, meal)), options['draws']
+            ) * 1e6
+            sample_us = seconds_per_call(lambda: planner._sample_new_food(foods, meal), options['draws']) * 1e6
+            mutate_us = seconds_per_call(lambda: planner._mutate(meal, foods), options['draws']) * 1e6
+
+            self.stdout.write(
+                f"{len(catalog):>8} {len(foods):>8} {filter_us:>10.1f} {sample_us:>10.1f} {mutate_us:>10.1f}"
+            )
@@ -0,0 +1,172 @@
+import json
+import tracemalloc
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from myapp.benchmarking import daily_targets, quiet_planner_logs, synthetic_catalog, timed
+from myapp.catalog_cache import get_food_catalog
+from myapp.food_catalog import MEAL_CATEGORIES
+from myapp.planner_engine import MealPlanEngine
+from myapp.planner_presets import DEFAULT_PRESET, PLANNER_PRESETS
+
+# catalogs the planner is benchmarked on: the fixture foods, then synthetic catalogs of that many foods
+CATALOG_SIZES = {'fixture': None, '10k': 10_000, '100k': 100_000}
+
+# compared metrics and whether a higher value is better
+COMPARED_METRICS = {
+    'latency_p50_ms': False,
+    'latency_p95_ms': False,
+    'evaluations_per_sec': True,
+    'peak_memory_mb': False,
+    'average_fitness': True,
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark single meal searches on the fixture catalog and on larger synthetic catalogs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--catalogs',
+            nargs='+',
+            choices=list(CATALOG_SIZES),
+            help='Catalogs to benchmark on',
+            default=list(CATALOG_SIZES)
+        )
+        parser.add_argument(
+            '--meal-types',
+            nargs='+',
+            choices=list(MEAL_CATEGORIES),
+            help='Meal types searched',
+            default=list(MEAL_CATEGORIES)
+        )
+        parser.add_argument(
+            '--seeds',
+            type=int,
+            help='Number of plan seeds (1, 2, ...) per meal type and calorie level',
+            default=3
+        )
+        parser.add_argument(
+            '--calories',
+            nargs='+',
+            type=float,
+            help='Daily calorie targets',
+            default=[1800, 2500, 3200]
+        )
+        parser.add_argument(
+            '--preset',
+            choices=list(PLANNER_PRESETS),
+            help='Planner speed/quality preset',
+            default=DEFAULT_PRESET
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Write the results to this JSON file'
+        )
+        parser.add_argument(
+            '--compare',
+            type=str,
+            metavar='BASELINE',
+            help='JSON results of an earlier run; fail if this run regresses past --threshold'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            help='Largest accepted relative regression of any metric in compare mode '
+                 '(latencies of single runs vary by ~15%%)',
+            default=0.20
+        )
+
+    def _search(self, catalog, meal_type, seed, calories, preset=DEFAULT_PRESET):
+        """Run one meal search and return its result (fitness, foods and stats)."""
+        planner = MealPlanEngine(catalog, *daily_targets(calories), seed=seed, preset=preset)
+        task = next(task for task in planner._meal_search_tasks() if task['meal_type'] == meal_type)
+        return planner._run_meal_search(task)
+
+    def _benchmark_catalog(self, name, options):
+        """Benchmark every (meal type, seed, calories) search on one catalog and summarize it."""
+        # peak memory of building the catalog and running one search, traced apart from the timed runs
+        tracemalloc.start()
+        catalog, catalog_seconds = timed(get_food_catalog)
+        if CATALOG_SIZES[name] is not None:
+            catalog, synthetic_seconds = timed(synthetic_catalog, catalog, CATALOG_SIZES[name])
+            catalog_seconds += synthetic_seconds
+        self._search(catalog, options['meal_types'][0], 1, options['calories'][0], options['preset'])
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        latencies = []
+        fitnesses = []
+        evaluations = 0
+        for meal_type in options['meal_types']:
+            for seed in range(1, options['seeds'] + 1):
+                for calories in options['calories']:
+                    result, seconds = timed(self._search, catalog, meal_type, seed, calories, options['preset'])
+                    latencies.append(seconds * 1000)
+                    fitnesses.append(result['fitness'])
+                    evaluations += result['stats']['evaluations']
+
+        return {
+            'foods': len(catalog),
+            'searches': len(latencies),
+            'catalog_build_ms': catalog_seconds * 1000,
+            'latency_p50_ms': float(np.percentile(latencies, 50)),
+            'latency_p95_ms': float(np.percentile(latencies, 95)),
+            'evaluations_per_sec': evaluations / (sum(latencies) / 1000),
+            'peak_memory_mb': peak_memory / 2 ** 20,
+            'average_fitness': float(np.mean(fitnesses)),
+            'min_fitness': float(np.min(fitnesses)),
+        }
+
+    def _regressions(self, results, baseline, threshold):
+        """List the metrics of `results` that are worse than `baseline` by more than `threshold`."""
+        regressions = []
+        for name, metrics in results.items():
+            if name not in baseline:
+                continue
+            for metric, higher_is_better in COMPARED_METRICS.items():
+                old, new = baseline[name][metric], metrics[metric]
+                if old <= 0:
+                    continue
+                change = (new - old) / old
+                if (-change if higher_is_better else change) > threshold:
+                    regressions.append(f"{name} {metric}: {old:.4g} -> {new:.4g} ({change:+.1%})")
+        return regressions
+
+    def handle(self, *args, **options):
+        quiet_planner_logs()
+
+        results = {}
+        self.stdout.write(
+            f"{'Catalog':<8} {'Foods':>7} {'p50 ms':>8} {'p95 ms':>8} {'Evals/sec':>10} {'Peak MB':>8} {'Fitness':>8}"
+        )
+        for name in options['catalogs']:
+            metrics = results[name] = self._benchmark_catalog(name, options)
+            self.stdout.write(
+                f"{name:<8} {metrics['foods']:>7} {metrics['latency_p50_ms']:>8.1f} {metrics['latency_p95_ms']:>8.1f} "
+                f"{metrics['evaluations_per_sec']:>10.0f} {metrics['peak_memory_mb']:>8.1f} "
+                f"{metrics['average_fitness']:>8.4f}"
+            )
+
+        if options['output']:
+            report = {
+                'config': {key: options[key] for key in ('meal_types', 'seeds', 'calories', 'preset')},
+                'catalogs': results,
+            }
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)['catalogs']
+
+            regressions = self._regressions(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError(
+                    f"Regressions past {options['threshold']:.0%} against {options['compare']}:\n"
+                    + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f"No regression past {options['threshold']:.0%} against {options['compare']}"
+            ))
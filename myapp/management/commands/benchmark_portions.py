@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand
+from myapp.benchmarking import quiet_planner_logs, timed
+from myapp.genetic_meal_planner import GeneticMealPlanner
+
+
+class Command(BaseCommand):
+    help = 'Compare the time needed to reach the pure GA fitness with and without the portion optimizer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meals',
+            type=int,
+            help='Number of meal searches (28 = a whole plan)',
+            default=28
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Plan seed, every search is run with the same per-meal seed in both modes',
+            default=1
+        )
+        parser.add_argument(
+            '--targets',
+            nargs=4,
+            type=float,
+            metavar=('CALORIES', 'PROTEIN', 'CARBS', 'FAT'),
+            help='Daily nutritional targets',
+            default=[2200, 140, 250, 70]
+        )
+
+    def _search(self, task, options, portion_optimizer, target_fitness=None):
+        """Run one meal search and return (fitness, seconds, generations)."""
+        planner = GeneticMealPlanner(
+            None, *options['targets'], seed=options['seed'], portion_optimizer=portion_optimizer
+        )
+        planner.target_fitness = target_fitness
+
+        result, seconds = timed(planner._run_meal_search, task)
+        return result['fitness'], seconds, result['stats']['generations']
+
+    def handle(self, *args, **options):
+        quiet_planner_logs()
+
+        tasks = GeneticMealPlanner(None, *options['targets'], seed=options['seed'])._meal_search_tasks()
+        tasks = tasks[:options['meals']]
+
+        modes = {'pure GA': False, 'hybrid': True}
+        totals = {mode: {'full_fitness': 0.0, 'full_time': 0.0, 'target_time': 0.0,
+                         'target_generations': 0, 'reached': 0} for mode in modes}
+
+        for task in tasks:
+            # the target of both modes is the fitness the pure GA reaches with all its generations
+            target_fitness, _, _ = self._search(task, options, portion_optimizer=False)
+
+            for mode, portion_optimizer in modes.items():
+                fitness, seconds, _ = self._search(task, options, portion_optimizer)
+                totals[mode]['full_fitness'] += fitness
+                totals[mode]['full_time'] += seconds
+
+                fitness, seconds, generations = self._search(task, options, portion_optimizer, target_fitness)
+                totals[mode]['target_time'] += seconds
+                totals[mode]['target_generations'] += generations
+                totals[mode]['reached'] += fitness >= target_fitness
+
+        count = len(tasks)
+        self.stdout.write(f"{count} meal searches, seed {options['seed']}")
+        self.stdout.write(
+            f"{'Mode':<10} {'Fitness':>8} {'Search ms':>10} {'To target ms':>13} {'Generations':>12} {'Reached':>8}"
+        )
+        for mode, total in totals.items():
+            self.stdout.write(
+                f"{mode:<10} {total['full_fitness'] / count:>8.4f} {total['full_time'] / count * 1000:>10.1f} "
+                f"{total['target_time'] / count * 1000:>13.1f} {total['target_generations'] / count:>12.1f} "
+                f"{total['reached'] / count:>8.0%}"
+            )
+
+        speedup = totals['pure GA']['target_time'] / max(totals['hybrid']['target_time'], 1e-9)
+        self.stdout.write(self.style.SUCCESS(f"Hybrid reaches the pure GA fitness {speedup:.1f}x faster"))
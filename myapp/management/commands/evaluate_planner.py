@@ -0,0 +1,219 @@
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from myapp.catalog_cache import get_food_catalog, get_worker_catalog, init_catalog_worker
+from myapp.planner_engine import MealPlanEngine
+from myapp.planner_presets import DEFAULT_PRESET, PLANNER_PRESETS
+from myapp.models import QuizResponse
+from myapp.nutrition import calculate_macros
+
+# evaluated users: both genders with every objective, on different body types and activity levels
+EVALUATION_PROFILES = [
+    {'age': 25, 'height': 182, 'weight': 78, 'gender': 'masculin', 'objective': 1, 'activity_level': 2},
+    {'age': 34, 'height': 176, 'weight': 70, 'gender': 'masculin', 'objective': 2, 'activity_level': 3},
+    {'age': 29, 'height': 188, 'weight': 92, 'gender': 'masculin', 'objective': 3, 'activity_level': 4},
+    {'age': 45, 'height': 172, 'weight': 85, 'gender': 'masculin', 'objective': 4, 'activity_level': 1},
+    {'age': 31, 'height': 165, 'weight': 68, 'gender': 'feminin', 'objective': 1, 'activity_level': 2},
+    {'age': 22, 'height': 160, 'weight': 50, 'gender': 'feminin', 'objective': 2, 'activity_level': 3},
+    {'age': 27, 'height': 170, 'weight': 60, 'gender': 'feminin', 'objective': 3, 'activity_level': 5},
+    {'age': 52, 'height': 163, 'weight': 72, 'gender': 'feminin', 'objective': 4, 'activity_level': 1},
+]
+
+NUTRIENTS = ['calories', 'protein', 'carbs', 'fat']
+
+def _run_trial(task):
+    """Plan the meals of one day for a profile and seed, and measure each meal against its targets."""
+    targets, seed, preset = task
+    catalog = get_worker_catalog()
+    planner = MealPlanEngine(catalog, *targets, seed=seed, preset=preset)
+
+    meals = []
+    for search in planner._meal_search_tasks()[:len(planner.meal_distribution)]:
+        start_time = time.perf_counter()
+        result = planner._run_meal_search(search)
+        seconds = time.perf_counter() - start_time
+
+        rows = [catalog.row_of(food_id) for food_id, _ in result['foods']]
+        totals = np.zeros(len(NUTRIENTS))
+        for row, (_, amount) in zip(rows, result['foods']):
+            totals += np.array(catalog.nutrients_of(row)) * amount / 100
+
+        meals.append({
+            'meal_type': search['meal_type'],
+            'fitness': result['fitness'],
+            'initial_fitness': result['stats']['initial_fitness'],
+            'deviations': {
+                nutrient: abs(total - search[nutrient]) / search[nutrient] * 100
+                for nutrient, total in zip(NUTRIENTS, totals.tolist())
+            },
+            'items': len(rows),
+            'categories': len({catalog.category_name(row) for row in rows}),
+            'seconds': seconds,
+        })
+    return meals
+
+
+class Command(BaseCommand):
+    help = 'Evaluate the accuracy, convergence and complexity of the planned meals over many users and seeds'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seeds',
+            type=int,
+            help='Number of plan seeds (1, 2, ...) per user profile',
+            default=5
+        )
+        parser.add_argument(
+            '--preset',
+            choices=list(PLANNER_PRESETS),
+            help='Planner speed/quality preset',
+            default=DEFAULT_PRESET
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            help='Number of trials run in parallel',
+            default=2
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Write the results to this JSON file (same schema as documentation_results.json)'
+        )
+        parser.add_argument(
+            '--compare',
+            type=str,
+            metavar='BASELINE',
+            help='Results of an earlier evaluation; fail if the plan quality dropped past --tolerance'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            help='Largest accepted drop of the average fitness of a meal type in compare mode',
+            default=0.02
+        )
+
+    def _profile_targets(self, profile):
+        """Daily (calories, protein, carbs, fat) targets of a profile, computed as for a quiz response."""
+        quiz_response = QuizResponse(**profile)
+        macros = calculate_macros(quiz_response)
+        return (quiz_response.calculate_target_calories(), macros['protein'], macros['carbs'], macros['fat'])
+
+    def _summarize(self, trials):
+        """Aggregate the meals of all trials into the documentation_results.json sections."""
+        meal_types = [meal['meal_type'] for meal in trials[0]]
+        results = {'performance': {}, 'accuracy': {}, 'convergence': {}, 'complexity': {}}
+
+        day_times = [sum(meal['seconds'] for meal in day) for day in trials]
+        results['performance'] = {
+            'single_meal_time': float(np.mean([meal['seconds'] for day in trials for meal in day])),
+            'full_day_time': float(np.mean(day_times)),
+            'estimated_week_time': float(np.mean(day_times)) * 7,
+            'daily_results': {
+                meal['meal_type']: {'fitness': meal['fitness'], 'items_count': meal['items']} for meal in trials[0]
+            },
+        }
+
+        for meal_type in meal_types:
+            meals = [meal for day in trials for meal in day if meal['meal_type'] == meal_type]
+            fitnesses = [meal['fitness'] for meal in meals]
+            items = [meal['items'] for meal in meals]
+
+            def within(percent):
+                return {
+                    nutrient: float(np.mean([meal['deviations'][nutrient] <= percent for meal in meals]) * 100)
+                    for nutrient in NUTRIENTS
+                }
+
+            results['accuracy'][meal_type] = {
+                'avg_deviations': {
+                    nutrient: float(np.mean([meal['deviations'][nutrient] for meal in meals])) for nutrient in NUTRIENTS
+                },
+                'within_15_percent': within(15),
+                'within_25_percent': within(25),
+                'avg_fitness': float(np.mean(fitnesses)),
+                'success_rate': float(np.mean([meal['items'] > 0 for meal in meals]) * 100),
+            }
+            # fitness_variance is the spread (max - min) of the fitness over all trials
+            results['convergence'][meal_type] = {
+                'avg_fitness': float(np.mean(fitnesses)),
+                'min_fitness': float(np.min(fitnesses)),
+                'max_fitness': float(np.max(fitnesses)),
+                'convergence_rate': float(np.mean([meal['fitness'] > meal['initial_fitness'] for meal in meals]) * 100),
+                'fitness_variance': float(np.max(fitnesses) - np.min(fitnesses)),
+            }
+            results['complexity'][meal_type] = {
+                'avg_items': float(np.mean(items)),
+                'avg_categories': float(np.mean([meal['categories'] for meal in meals])),
+                'complexity_range': [int(np.min(items)), int(np.max(items))],
+                'is_snack': meal_type == 'snack',
+            }
+
+        results['timestamp'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        return results
+
+    def _quality_drops(self, results, baseline, tolerance):
+        """List the meal types whose average fitness dropped by more than `tolerance` since the baseline."""
+        drops = []
+        for meal_type, accuracy in results['accuracy'].items():
+            old = baseline['accuracy'].get(meal_type, {}).get('avg_fitness')
+            if old is not None and old - accuracy['avg_fitness'] > tolerance:
+                drops.append(f"{meal_type} avg_fitness: {old:.4f} -> {accuracy['avg_fitness']:.4f}")
+        return drops
+
+    def handle(self, *args, **options):
+        logging.getLogger('myapp').setLevel(logging.WARNING)
+
+        tasks = [
+            (self._profile_targets(profile), seed, options['preset'])
+            for profile in EVALUATION_PROFILES
+            for seed in range(1, options['seeds'] + 1)
+        ]
+        self.stdout.write(
+            f"Evaluating {len(tasks)} trials with {options['processes']} processes ({options['preset']} preset)"
+        )
+
+        # loaded once here, then sent once to every worker process by init_catalog_worker
+        catalog = get_food_catalog()
+
+        start_time = time.time()
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options['processes'], initializer=init_catalog_worker, initargs=(catalog,)
+        ) as executor:
+            try:
+                trials = list(executor.map(_run_trial, tasks))
+            except KeyboardInterrupt:
+                # the worker processes ignore Ctrl-C: drop the trials not started yet instead of running them
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        results = self._summarize(trials)
+
+        self.stdout.write(f"{'Meal':<10} {'Fitness':>8} {'Cal dev %':>10} {'Cal <15%':>9} {'Items':>6}")
+        for meal_type, accuracy in results['accuracy'].items():
+            self.stdout.write(
+                f"{meal_type:<10} {accuracy['avg_fitness']:>8.4f} {accuracy['avg_deviations']['calories']:>10.1f} "
+                f"{accuracy['within_15_percent']['calories']:>8.0f}% "
+                f"{results['complexity'][meal_type]['avg_items']:>6.2f}"
+            )
+        self.stdout.write(f"Evaluated in {time.time() - start_time:.1f} seconds")
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)
+
+            drops = self._quality_drops(results, baseline, options['tolerance'])
+            if drops:
+                raise CommandError(f"Plan quality dropped against {options['compare']}:\n" + '\n'.join(drops))
+            self.stdout.write(self.style.SUCCESS(
+                f"No fitness drop past {options['tolerance']} against {options['compare']}"
+            ))
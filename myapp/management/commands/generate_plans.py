@@ -0,0 +1,150 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from myapp.catalog_cache import get_food_catalog, get_worker_catalog, init_catalog_worker
+from myapp.planner_engine import MealPlanEngine
+from myapp.planner_presets import PLANNER_PRESETS
+from myapp.meal_plan_writer import save_meal_plans
+from myapp.models import MealPlan, QuizResponse
+from myapp.nutrition import calculate_macros
+from myapp.planner_jobs import search_limits
+
+
+def _generate_plan(task):
+    """Generate the plan of one user in a worker process, without touching the database."""
+    user_id, targets, preset, limits = task
+    planner = MealPlanEngine(get_worker_catalog(), *targets, preset=preset)
+    for name, value in limits.items():
+        setattr(planner, name, value)
+    return user_id, planner.generate_meal_plan()
+
+
+class Command(BaseCommand):
+    help = 'Generate new meal plans for many users at once (e.g. after a food catalog refresh)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            nargs='+',
+            type=str,
+            help='Usernames to generate plans for (default: every user who completed the quiz)'
+        )
+        parser.add_argument(
+            '--objective',
+            type=int,
+            choices=[choice for choice, _ in QuizResponse.OBJECTIVE_CHOICES],
+            help='Only users whose latest quiz response has this objective'
+        )
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Skip users who already got a plan at or after this time (ISO format); '
+                 'pass the value printed by an interrupted run to resume it'
+        )
+        parser.add_argument(
+            '--preset',
+            choices=list(PLANNER_PRESETS),
+            help='Planner speed/quality preset (default: MEAL_PLANNER_PRESET)',
+            default=settings.MEAL_PLANNER_PRESET
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            help='Number of plans generated in parallel',
+            default=2
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Number of plans written to the database at once',
+            default=50
+        )
+
+    def _latest_quiz_responses(self, options, since):
+        """Return the latest quiz response of every selected user still waiting for a new plan."""
+        latest_ids = QuizResponse.objects.filter(user=OuterRef('user')).order_by('-submitted_at').values('id')[:1]
+        responses = QuizResponse.objects.filter(id=Subquery(latest_ids)).select_related('user')
+
+        if options['users']:
+            responses = responses.filter(user__username__in=options['users'])
+        if options['objective']:
+            responses = responses.filter(objective=options['objective'])
+
+        planned_users = MealPlan.objects.filter(created_at__gte=since).values('user')
+        return list(responses.exclude(user__in=planned_users).order_by('user_id'))
+
+    def _plan_targets(self, quiz_response):
+        """Daily (calories, protein, carbs, fat) targets, computed as for a plan requested from the web."""
+        macros = calculate_macros(quiz_response)
+        return (quiz_response.calculate_target_calories(), macros['protein'], macros['carbs'], macros['fat'])
+
+    def handle(self, *args, **options):
+        since = parse_datetime(options['since']) if options['since'] else timezone.now()
+        if since is None:
+            self.stderr.write(self.style.ERROR(f"Invalid --since value: {options['since']}"))
+            return
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+
+        responses = self._latest_quiz_responses(options, since)
+        users = {response.user_id: response.user for response in responses}
+        limits = search_limits()
+        tasks = [
+            (response.user_id, self._plan_targets(response), options['preset'], limits) for response in responses
+        ]
+
+        self.stdout.write(
+            f"Generating plans for {len(tasks)} users with {options['processes']} processes "
+            f"({options['preset']} preset)"
+        )
+        self.stdout.write(f"To resume an interrupted run: --since {since.isoformat()}")
+        if not tasks:
+            return
+
+        # loaded once here, then sent once to every worker process by init_catalog_worker
+        catalog = get_food_catalog()
+
+        start_time = time.time()
+        saved = 0
+        pending = []
+
+        def write_pending():
+            nonlocal saved
+            save_meal_plans([(users[user_id], plan) for user_id, plan in pending])
+            saved += len(pending)
+            pending.clear()
+
+            elapsed = time.time() - start_time
+            rate = saved / elapsed if elapsed > 0 else 0.0
+            remaining = (len(tasks) - saved) / rate if rate > 0 else 0.0
+            self.stdout.write(
+                f"{saved}/{len(tasks)} plans saved, {rate:.2f} plans/sec, ~{remaining:.0f} s remaining"
+            )
+
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options['processes'], initializer=init_catalog_worker, initargs=(catalog,)
+        ) as executor:
+            try:
+                for user_id, plan in executor.map(_generate_plan, tasks):
+                    pending.append((user_id, plan))
+                    if len(pending) >= options['batch_size']:
+                        write_pending()
+            except KeyboardInterrupt:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.stdout.write(self.style.WARNING(
+                    f"Interrupted, resume with --since {since.isoformat()}"
+                ))
+
+        if pending:
+            write_pending()
+
+        elapsed = time.time() - start_time
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {saved} plans in {elapsed:.1f} seconds ({saved / elapsed:.2f} plans/sec)"
+        ))
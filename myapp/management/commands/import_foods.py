@@ -4,6 +4,7 @@ from django.core.management.base import BaseCommand
 from django.conf import settings
 from myapp.food_api import FoodAPIClient
 from myapp.models import Food
+from myapp.catalog_cache import bump_catalog_version
 
 class Command(BaseCommand):
     help = 'Import foods from USDA FoodData Central API'
@@ -166,4 +167,8 @@ class Command(BaseCommand):
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"Error searching '{query}': {str(e)}"))
         
+        # make every planner process reload the food catalog
+        version = bump_catalog_version()
+        self.stdout.write(f"Food catalog version is now {version}")
+
         self.stdout.write(self.style.SUCCESS(f"Import completed. {total_imported} foods imported."))
\ No newline at end of file
@@ -0,0 +1,347 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from myapp.catalog_cache import get_catalog_version, get_food_catalog, get_worker_catalog, init_catalog_worker
+from myapp.meal_plan_writer import save_meal_plan
+from myapp.planner_jobs import (
+    claim_job, complete_job, fail_job, planner_for_job, release_job, requeue_stale_jobs
+)
+from myapp.planner_service import PlannerServiceError, service_stats
+
+
+def _warm_up(_):
+    """Start a worker process; the pool initializer already gave it the catalog."""
+    return os.getpid()
+
+
+def _generate_job_plan(task):
+    """Generate the plan of a claimed job in a worker process, without touching the database.
+
+    Returns the plan and the seconds the job waited for a free process."""
+    job, previous_meals, submitted_at = task
+    queue_wait = time.time() - submitted_at
+    planner = planner_for_job(job, catalog=get_worker_catalog())
+    return planner.generate_meal_plan(previous_meals=previous_meals), queue_wait
+
+
+def _percentiles(values):
+    """p50, p95 and max of the recorded values in milliseconds, or None before the first one."""
+    if not values:
+        return None
+    values = np.array(values) * 1000
+    return {'p50': float(np.percentile(values, 50)), 'p95': float(np.percentile(values, 95)),
+            'max': float(values.max())}
+
+
+class PlannerService:
+    """Generates the plans of queued jobs in a resident process pool, keeping queue and latency statistics.
+
+    The pool processes receive the catalog once; when the catalog version changes, a new pool is
+    started with the new catalog and the old one finishes its running plans."""
+
+    def __init__(self, processes, max_queue=50, history=1000, report=None, stale_after=600, requeue_interval=60):
+        self.processes = processes
+        self.max_queue = max_queue
+        self.stale_after = stale_after
+        self.requeue_interval = requeue_interval
+        self.report = report or (lambda message: None)
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+
+        self.in_flight = 0
+        # jobs claimed by this service, never requeued as abandoned
+        self.running_ids = set()
+        self.requeued_at = None
+        self.served = 0
+        self.failed = 0
+        self.rejected = 0
+        # latencies (request to saved plan) and queue waits of the last `history` jobs, in seconds
+        self.latencies = deque(maxlen=history)
+        self.queue_waits = deque(maxlen=history)
+
+        self.catalog = get_food_catalog()
+        self.executor = self._start_pool()
+
+    def _start_pool(self):
+        connections.close_all()
+        executor = ProcessPoolExecutor(
+            max_workers=self.processes, initializer=init_catalog_worker, initargs=(self.catalog,)
+        )
+        # start every process now, so the first requests do not pay for it
+        list(executor.map(_warm_up, range(self.processes)))
+        return executor
+
+    def _refresh_catalog(self):
+        """Restart the pool with the new catalog if the catalog version changed."""
+        if get_catalog_version() == self.catalog.version:
+            return
+        with self.lock:
+            if get_catalog_version() != self.catalog.version:
+                self.catalog = get_food_catalog()
+                old_executor, self.executor = self.executor, self._start_pool()
+                old_executor.shutdown(wait=False)
+                self.report(f"Catalog version {self.catalog.version} loaded ({len(self.catalog)} foods)")
+
+    def requeue_stale_jobs(self):
+        """Requeue the jobs abandoned by a crashed service or worker, at most once per requeue interval.
+
+        An abandoned job stays running, which keeps its user from asking for a new plan."""
+        if self.requeued_at is not None and time.time() - self.requeued_at < self.requeue_interval:
+            return 0
+        self.requeued_at = time.time()
+        with self.lock:
+            running_ids = list(self.running_ids)
+        requeued = requeue_stale_jobs(self.stale_after, running_ids=running_ids)
+        if requeued:
+            self.report(f"Requeued {requeued} abandoned jobs")
+        return requeued
+
+    def queue_depth(self):
+        """Number of accepted jobs waiting for a free process."""
+        return max(0, self.in_flight - self.processes)
+
+    def run_job(self, job_id, respond):
+        """Claim a queued job, answer the client, then generate and save its plan.
+
+        Jobs are refused when the queue is full or when the job is not queued any more (e.g.
+        claimed by run_planner_worker); refused jobs are left untouched. A job that could not be
+        started is answered with an error and put back in the queue for run_planner_worker."""
+        received_at = time.time()
+        with self.lock:
+            if self.queue_depth() >= self.max_queue:
+                self.rejected += 1
+                respond({'accepted': False, 'reason': 'queue full', 'queue_depth': self.queue_depth()})
+                return
+            self.in_flight += 1
+
+        job = None
+        accepted = False
+        try:
+            job = claim_job(job_id)
+            if job is None:
+                respond({'accepted': False, 'reason': 'job not queued', 'queue_depth': self.queue_depth()})
+                return
+            with self.lock:
+                self.running_ids.add(job.id)
+
+            self._refresh_catalog()
+            planner = planner_for_job(job, catalog=self.catalog)
+            previous_meals = planner._previous_plan_meals() if planner.warm_start else None
+            # _refresh_catalog swaps the pool under the lock, so the job never goes to a pool shutting down
+            with self.lock:
+                future = self.executor.submit(_generate_job_plan, (job, previous_meals, time.time()))
+            accepted = True
+            respond({'accepted': True, 'queue_depth': self.queue_depth()})
+
+            plan, queue_wait = future.result()
+            meal_plan = save_meal_plan(job.user, plan)
+            latency = time.time() - received_at
+            complete_job(job.id, meal_plan, latency)
+            with self.lock:
+                self.served += 1
+                self.latencies.append(latency)
+                self.queue_waits.append(queue_wait)
+            self.report(f"Meal plan job {job.id}: done in {latency:.2f} seconds (waited {queue_wait:.2f})")
+        except Exception as e:
+            if accepted:
+                fail_job(job.id, e)
+            else:
+                respond({'error': f"Meal plan job {job_id} not started: {e}"})
+                if job is not None:
+                    release_job(job.id)
+            with self.lock:
+                self.failed += 1
+            self.report(f"Meal plan job {job_id}: {'failed' if accepted else 'not started'} ({e})")
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                self.running_ids.discard(job_id)
+            connections.close_all()
+
+    def stats(self):
+        with self.lock:
+            uptime = time.time() - self.started_at
+            return {
+                'uptime_s': uptime,
+                'processes': self.processes,
+                'catalog_version': self.catalog.version,
+                'foods': len(self.catalog),
+                'running': min(self.in_flight, self.processes),
+                'queue_depth': self.queue_depth(),
+                'max_queue': self.max_queue,
+                'served': self.served,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'plans_per_minute': self.served / uptime * 60 if uptime > 0 else 0.0,
+                'latency_ms': _percentiles(self.latencies),
+                'queue_wait_ms': _percentiles(self.queue_waits),
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+class PlannerRequestHandler(socketserver.StreamRequestHandler):
+    """Serves one request: a line of JSON with a 'command' ('job' or 'stats'), answered with a line of JSON."""
+
+    def respond(self, response):
+        try:
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+            self.wfile.flush()
+        except OSError:
+            # the client went away; an accepted job is still generated
+            pass
+
+    def handle(self):
+        service = self.server.service
+        try:
+            request = json.loads(self.rfile.readline())
+            command = request['command']
+            job_id = int(request['job_id']) if command == 'job' else None
+        except (ValueError, KeyError, TypeError) as e:
+            self.respond({'error': f"Invalid request: {e!r}"})
+            return
+
+        if command == 'stats':
+            self.respond(service.stats())
+        elif command == 'job':
+            service.run_job(job_id, self.respond)
+        else:
+            self.respond({'error': f"Unknown command: {command}"})
+
+
+class PlannerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    # closing the server waits for the plans being generated
+    daemon_threads = False
+    block_on_close = True
+
+    def __init__(self, socket_path, service):
+        self.service = service
+        super().__init__(socket_path, PlannerRequestHandler)
+
+    def service_actions(self):
+        # called by serve_forever between requests
+        self.service.requeue_stale_jobs()
+
+
+class Command(BaseCommand):
+    help = ('Serve meal plan jobs submitted by the web tier over a Unix socket, '
+            'with the catalog and a process pool kept resident')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--socket',
+            type=str,
+            help='Path of the Unix socket (default: MEAL_PLANNER_SOCKET)',
+            default=settings.MEAL_PLANNER_SOCKET
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            help='Number of plans generated in parallel',
+            default=2
+        )
+        parser.add_argument(
+            '--max-queue',
+            type=int,
+            help='Number of accepted jobs allowed to wait for a process; later jobs stay in the job queue',
+            default=50
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            help='Seconds after which a running job is considered abandoned and queued again',
+            default=600
+        )
+        parser.add_argument(
+            '--requeue-interval',
+            type=float,
+            help='Seconds between two checks for abandoned jobs',
+            default=60.0
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Print the statistics of the running service and exit'
+        )
+
+    def _print_stats(self, socket_path):
+        try:
+            stats = service_stats(socket_path)
+        except PlannerServiceError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"Uptime {stats['uptime_s']:.0f} s, {stats['processes']} processes, "
+            f"catalog version {stats['catalog_version']} ({stats['foods']} foods)"
+        )
+        self.stdout.write(
+            f"Running {stats['running']}, queued {stats['queue_depth']}/{stats['max_queue']}, "
+            f"served {stats['served']}, failed {stats['failed']}, rejected {stats['rejected']} "
+            f"({stats['plans_per_minute']:.1f} plans/min)"
+        )
+        for name in ('latency_ms', 'queue_wait_ms'):
+            if stats[name] is not None:
+                self.stdout.write(
+                    f"{name}: p50 {stats[name]['p50']:.0f}, p95 {stats[name]['p95']:.0f}, max {stats[name]['max']:.0f}"
+                )
+
+    def _remove_stale_socket(self, socket_path):
+        """Remove the socket file left by a stopped service; fail if a service still listens on it."""
+        if not os.path.exists(socket_path):
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(socket_path)
+            except OSError:
+                os.unlink(socket_path)
+                return
+        raise CommandError(f"A planner service is already listening on {socket_path}")
+
+    def handle(self, *args, **options):
+        socket_path = options['socket']
+        if not socket_path:
+            raise CommandError('No socket path: pass --socket or set MEAL_PLANNER_SOCKET')
+        if options['stats']:
+            self._print_stats(socket_path)
+            return
+
+        logging.getLogger('myapp').setLevel(logging.WARNING)
+        self._remove_stale_socket(socket_path)
+
+        service = PlannerService(
+            options['processes'], options['max_queue'], report=self.stdout.write,
+            stale_after=options['stale_after'], requeue_interval=options['requeue_interval']
+        )
+        # jobs claimed by a crashed service are requeued now, then every requeue interval
+        service.requeue_stale_jobs()
+        server = PlannerServer(socket_path, service)
+        self.stdout.write(
+            f"Planner service listening on {socket_path} with {options['processes']} processes "
+            f"({len(service.catalog)} foods)"
+        )
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Stopping, waiting for the plans being generated'))
+        finally:
+            server.server_close()
+            service.shutdown()
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+        stats = service.stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Planner service stopped after {stats['served']} plans ({stats['failed']} failed)"
+        ))
@@ -0,0 +1,137 @@
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from django.core.management.base import BaseCommand
+from django.db import connections
+from myapp.models import MealPlanJob
+from myapp.planner_jobs import claim_next_job, fail_job, release_job, requeue_stale_jobs, run_job
+
+
+def _init_job_process():
+    # connections inherited from the parent process must not be shared; each process opens its own
+    connections.close_all()
+    # Ctrl-C stops the worker, which lets the jobs being generated finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _run_job_in_process(job_id):
+    return run_job(job_id)
+
+
+class Command(BaseCommand):
+    help = 'Run queued meal plan generation jobs with a local pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            help='Number of jobs generated in parallel',
+            default=2
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            help='Seconds between two checks of an empty queue',
+            default=1.0
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            help='Seconds after which a running job is considered abandoned and queued again',
+            default=600
+        )
+        parser.add_argument(
+            '--requeue-interval',
+            type=float,
+            help='Seconds between two checks for abandoned jobs',
+            default=60.0
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of waiting for new jobs'
+        )
+
+    def _start_pool(self, processes):
+        connections.close_all()
+        return ProcessPoolExecutor(max_workers=processes, initializer=_init_job_process)
+
+    def _restart_pool(self, executor, running, processes, error):
+        """Fail the jobs of a broken pool and return a new pool.
+
+        A pool breaks when one of its processes dies (e.g. killed for lack of memory). The jobs it was
+        running cannot record their outcome any more, and the one that crashed is unknown, so they all fail."""
+        for job_id in running.values():
+            fail_job(job_id, error)
+        self.stdout.write(self.style.WARNING("A job process died, starting a new pool"))
+        running.clear()
+        executor.shutdown(wait=False)
+        return self._start_pool(processes)
+
+    def _requeue_stale_jobs(self, stale_after, running):
+        # a crashed worker leaves its jobs running, which keeps their users from asking for a new plan
+        requeued = requeue_stale_jobs(stale_after, running_ids=running.values())
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Requeued {requeued} abandoned jobs"))
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        poll_interval = options['poll_interval']
+
+        self.stdout.write(f"Planner worker started with {processes} processes")
+
+        completed = 0
+        executor = self._start_pool(processes)
+        running = {}
+        requeued_at = None
+        try:
+            while True:
+                if requeued_at is None or time.time() - requeued_at >= options['requeue_interval']:
+                    self._requeue_stale_jobs(options['stale_after'], running)
+                    requeued_at = time.time()
+
+                # claim jobs only for the free processes, so queued jobs stay visible to other workers
+                while len(running) < processes:
+                    job = claim_next_job()
+                    if job is None:
+                        break
+                    self.stdout.write(f"Claimed meal plan job {job.id} for {job.user_id}")
+                    try:
+                        running[executor.submit(_run_job_in_process, job.id)] = job.id
+                    except BrokenProcessPool as e:
+                        # the pool broke after the last check; this job never started
+                        release_job(job.id)
+                        executor = self._restart_pool(executor, running, processes, e)
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                finished, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                broken = None
+                for future in finished:
+                    job_id = running.pop(future)
+                    try:
+                        status = future.result()
+                    except Exception as e:
+                        # the job process died before it could record the outcome
+                        fail_job(job_id, e)
+                        status = MealPlanJob.FAILED
+                        if isinstance(e, BrokenProcessPool):
+                            broken = e
+                    completed += 1
+                    self.stdout.write(f"Meal plan job {job_id}: {status}")
+
+                if broken is not None:
+                    executor = self._restart_pool(executor, running, processes, broken)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING(
+                f"Stopping, waiting for {len(running)} running jobs to finish"
+            ))
+        finally:
+            executor.shutdown(wait=True)
+
+        self.stdout.write(self.style.SUCCESS(f"Planner worker stopped after {completed} jobs"))
@@ -0,0 +1,71 @@
+import logging
+import time
+from django.db import transaction
+from .models import MealPlan, MealPlanDay, Meal, MealFoodItem
+
+logger = logging.getLogger(__name__)
+
+
+def save_meal_plan(user, plan):
+    """Save a meal plan generated in memory (see MealPlanEngine.generate_meal_plan).
+
+    Everything is written inside one transaction with one INSERT per table: the plan, its
+    days, its meals and all food items. Foods are referenced by id, without any lookups."""
+    return save_meal_plans([(user, plan)])[0]
+
+
+def save_meal_plans(user_plans):
+    """Save many generated meal plans, given as (user, plan) pairs, and return their MealPlans.
+
+    All plans share the same four INSERTs (plans, days, meals, food items) in one transaction, which
+    also records their write time as the 'persistence' timing of their stats."""
+    start_time = time.time()
+
+    with transaction.atomic():
+        meal_plans = MealPlan.objects.bulk_create([
+            MealPlan(
+                user=user,
+                name=plan['name'],
+                description=plan['description'],
+                target_calories=plan['target_calories'],
+                target_protein=plan['target_protein'],
+                target_carbs=plan['target_carbs'],
+                target_fat=plan['target_fat'],
+                seed=plan.get('seed'),
+                stats=plan.get('stats')
+            )
+            for user, plan in user_plans
+        ])
+        plans = [(meal_plan, plan) for meal_plan, (_, plan) in zip(meal_plans, user_plans)]
+
+        days = MealPlanDay.objects.bulk_create([
+            MealPlanDay(meal_plan=meal_plan, day=day_num)
+            for meal_plan, plan in plans
+            for day_num in sorted({meal['day'] for meal in plan['meals']})
+        ])
+        days_by_number = {(day.meal_plan_id, day.day): day for day in days}
+
+        generated_meals = [(meal_plan, meal) for meal_plan, plan in plans for meal in plan['meals']]
+        meals = Meal.objects.bulk_create([
+            Meal(meal_plan_day=days_by_number[(meal_plan.id, meal['day'])], meal_type=meal['meal_type'])
+            for meal_plan, meal in generated_meals
+        ])
+
+        MealFoodItem.objects.bulk_create([
+            MealFoodItem(meal=meal, food_id=food_id, amount=amount)
+            for meal, (_, generated) in zip(meals, generated_meals)
+            for food_id, amount in generated['foods']
+        ])
+
+        # the write time of the batch is saved with the plan stats, in the same transaction
+        persistence_ms = (time.time() - start_time) * 1000
+        timed_plans = [meal_plan for meal_plan in meal_plans if meal_plan.stats and 'timings_ms' in meal_plan.stats]
+        for meal_plan in timed_plans:
+            meal_plan.stats['timings_ms']['persistence'] = persistence_ms
+        MealPlan.objects.bulk_update(timed_plans, ['stats'])
+
+    if len(meal_plans) == 1:
+        logger.info("Meal plan %s saved in %.3f seconds", meal_plans[0].id, time.time() - start_time)
+    else:
+        logger.info("%d meal plans saved in %.3f seconds", len(meal_plans), time.time() - start_time)
+    return meal_plans
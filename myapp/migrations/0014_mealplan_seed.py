@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0013_foodjournal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mealplan',
+            name='seed',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
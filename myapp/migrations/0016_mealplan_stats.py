@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0015_mealplanjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mealplan',
+            name='stats',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
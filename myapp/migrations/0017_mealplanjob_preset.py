@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0016_mealplan_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mealplanjob',
+            name='preset',
+            field=models.CharField(choices=[('fast', 'Fast'), ('balanced', 'Balanced'), ('thorough', 'Thorough')], default='balanced', max_length=10),
+        ),
+    ]
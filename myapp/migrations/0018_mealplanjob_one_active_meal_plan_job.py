@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:47
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    """Keep one active job per user (the oldest running one, else the oldest queued one), failing the others."""
+    MealPlanJob = apps.get_model('myapp', 'MealPlanJob')
+    kept_users = set()
+    # 'running' sorts after 'queued'
+    for job in MealPlanJob.objects.filter(status__in=['queued', 'running']).order_by('-status', 'created_at', 'id'):
+        if job.user_id in kept_users:
+            MealPlanJob.objects.filter(id=job.id).update(
+                status='failed', error='Duplicate of another active job of the user', finished_at=timezone.now()
+            )
+        kept_users.add(job.user_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0017_mealplanjob_preset'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='mealplanjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running'])), fields=('user',), name='one_active_meal_plan_job'),
+        ),
+    ]
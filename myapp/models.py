@@ -3,6 +3,7 @@ from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, make_p
 import uuid, datetime
 from django.contrib.auth.models import User as DjangoUser
 from django.contrib.auth import get_user_model
+from .planner_presets import DEFAULT_PRESET, PLANNER_PRESETS
 
 
 class User(models.Model):
@@ -126,12 +127,58 @@ class MealPlan(models.Model):
     target_protein = models.FloatField() 
     target_carbs = models.FloatField()   
     target_fat = models.FloatField()     
+    seed = models.BigIntegerField(blank=True, null=True)  # planner seed, reproduces the plan
+    stats = models.JSONField(blank=True, null=True)  # planner statistics and phase timings
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         return f"Plan for {self.user.username}: {self.name}"
 
 
+class MealPlanJob(models.Model):
+    """A meal plan generation request, run in the background by the run_planner_worker command"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(DjangoUser, on_delete=models.CASCADE, related_name='meal_plan_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    target_calories = models.FloatField()
+    target_protein = models.FloatField()
+    target_carbs = models.FloatField()
+    target_fat = models.FloatField()
+    # speed/quality preset of the planner (see planner_presets.PLANNER_PRESETS)
+    preset = models.CharField(
+        max_length=10, choices=[(name, name.capitalize()) for name in PLANNER_PRESETS], default=DEFAULT_PRESET
+    )
+    meal_plan = models.ForeignKey(MealPlan, on_delete=models.SET_NULL, null=True, blank=True)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        constraints = [
+            # a user has at most one queued or running job
+            models.UniqueConstraint(
+                fields=['user'], condition=models.Q(status__in=['queued', 'running']), name='one_active_meal_plan_job'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Meal plan job {self.id} for {self.user.username}: {self.status}"
+
+
 class MealPlanDay(models.Model):
     """Represents a day in a meal plan"""
     DAYS_OF_WEEK = [
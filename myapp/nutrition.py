@@ -0,0 +1,41 @@
+def calculate_macros(quiz_response):
+    """Distribution of macronutrients based on the user's objective"""
+    target_calories = quiz_response.calculate_target_calories()
+    
+    if quiz_response.objective == 1:  # Slăbit
+        protein_pct = 0.40  # 40% din calorii
+        fat_pct = 0.20      # 30% din calorii
+        carbs_pct = 0.40    # 30% din calorii
+    
+    elif quiz_response.objective == 3:  # Creștere masă musculară
+        # Pentru masă musculară: Proteine crescute, carbohidrați crescuți, grăsimi moderate
+        protein_pct = 0.30  # 30% din calorii
+        fat_pct = 0.25      # 25% din calorii
+        carbs_pct = 0.45    # 45% din calorii
+    
+    elif quiz_response.objective == 2:  # Punere în greutate
+        # Pentru punere în greutate: Proteine moderate, carbohidrați crescuți, grăsimi moderate
+        protein_pct = 0.25  # 25% din calorii
+        fat_pct = 0.30      # 30% din calorii
+        carbs_pct = 0.45    # 45% din calorii
+        
+    else:  # Recompoziție corporală
+        # Recompoziție: Balans între proteine, carbohidrați și grăsimi
+        protein_pct = 0.30  # 30% din calorii
+        fat_pct = 0.30      # 30% din calorii
+        carbs_pct = 0.40    # 40% din calorii
+
+    protein_calories = target_calories * protein_pct
+    fat_calories = target_calories * fat_pct
+    carb_calories = target_calories * carbs_pct
+    
+    # conversion to grams (1g protein = 4 cal, 1g fat = 9 cal, 1g carb = 4 cal)
+    protein_grams = round(protein_calories / 4)
+    fat_grams = round(fat_calories / 9)
+    carb_grams = round(carb_calories / 4)
+    
+    return {
+        'protein': protein_grams,
+        'fat': fat_grams,
+        'carbs': carb_grams
+    }
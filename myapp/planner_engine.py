@@ -0,0 +1,1645 @@
+import logging
+import random
+import secrets
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .genetic_operators import (
+    MAX_MEAL_FOODS, initialize_meals, mutate_meals, tournament_select, uniform_crossover
+)
+from .planner_presets import DEFAULT_PRESET, PLANNER_PRESETS
+from .portion_optimizer import optimize_portions
+import time
+
+logger = logging.getLogger(__name__)
+
+# phases timed for every meal search (see MealPlanEngine._timed)
+SEARCH_PHASES = ['initialization', 'evolution', 'scoring']
+
+# planner held by each process of the search pool (set once per worker by the pool initializer)
+_worker_planner = None
+
+
+def _init_search_worker(planner):
+    global _worker_planner
+    _worker_planner = planner
+
+
+def _run_search_in_worker(task):
+    return _worker_planner._run_meal_search(task)
+
+
+def _evolve_island_in_worker(task):
+    return _worker_planner._evolve_island(task)
+
+
+def _run_week_search_in_worker(task):
+    return _worker_planner._run_week_search(task)
+
+
+class FitnessCache:
+    """Bounded LRU cache of fitness scores, scoped to one meal search.
+
+    Meals are keyed by a canonical genome: the (food_id, amount) pairs sorted by food id, with
+    amounts quantized to `quantum` grams, so clones and reordered copies share one entry."""
+
+    def __init__(self, max_size=4096, quantum=0.01):
+        self.max_size = max_size
+        self.quantum = quantum
+        self._scores = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, meal):
+        return tuple([(food_id, round(amount / self.quantum)) for food_id, amount in sorted(meal)])
+
+    def get(self, key):
+        """Return the cached score of a genome key, or None if it has not been evaluated."""
+        score = self._scores.get(key)
+        if score is None:
+            self.misses += 1
+            return None
+        self._scores.move_to_end(key)
+        self.hits += 1
+        return score
+
+    def put(self, key, score):
+        self._scores[key] = score
+        self._scores.move_to_end(key)
+        if len(self._scores) > self.max_size:
+            self._scores.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate,
+        }
+
+
+class MealPlanEngine:
+    """Genetic search of personalized meal plans, on a FoodCatalog and without any database access.
+
+    The engine takes the catalog (nutrient matrix, categories, meal and slot rows) and the daily
+    targets, and returns plans whose meals are lists of (food_id, amount) genomes. Loading the
+    catalog and saving plans is left to the Django adapter (see genetic_meal_planner)."""
+    
+    def __init__(self, catalog, target_calories, target_protein, target_carbs, target_fat, vectorized_fitness=True,
+                 seed=None, workers=1, rng=None, portion_optimizer=False, vectorized_operators=False,
+                 preset=DEFAULT_PRESET):
+        self.target_calories = target_calories
+        self.target_protein = target_protein
+        self.target_carbs = target_carbs
+        self.target_fat = target_fat
+
+        # early stopping: stop once the best fitness improved by at most `min_improvement`
+        # over the last `patience` generations, or once it reaches `target_fitness` (None disables)
+        self.patience = None
+        self.min_improvement = 1e-4
+        self.target_fitness = None
+
+        # time budgets in milliseconds, after which the best meal found so far is returned
+        self.meal_time_budget_ms = None
+        self.plan_time_budget_ms = None
+        self.search_deadline = None
+
+        # parameters for genetic algorithm (population_size, generations, elite_size, mutation_rate)
+        # from a preset of PLANNER_PRESETS
+        self.apply_preset(preset)
+
+        # score the whole population with one NumPy pass instead of one call per meal
+        self.vectorized_fitness = vectorized_fitness
+
+        # scores of genomes already evaluated in a search are reused (0 disables the cache).
+        # Batched scoring of a whole population is cheaper than building its genome keys,
+        # so by default the cache only backs the per-meal scalar fitness.
+        self.fitness_cache_size = 0 if vectorized_fitness else 4096
+
+        # initialization, selection, crossover and mutation run on padded (rows, amounts) arrays of the
+        # whole population with a NumPy Generator (see genetic_operators), instead of meal by meal.
+        # Islands and week mode keep the per-meal operators.
+        self.vectorized_operators = vectorized_operators
+
+        # hybrid mode: the GA only chooses the foods of a meal, the grams are computed by a
+        # bounded least-squares solver within the amounts allowed by mutation (10-200g)
+        self.portion_optimizer = portion_optimizer
+        self.portion_iterations = 60
+        self.min_portion = 10
+        self.max_portion = 200
+
+        # island model: `islands` populations evolve in parallel processes and every
+        # `migration_interval` generations each one sends its `migration_size` best meals to the next
+        self.islands = 1
+        self.migration_interval = 5
+        self.migration_size = 2
+        self._island_executor = None
+
+        # warm start: up to `warm_start_fraction` of each initial population is seeded with the best
+        # meals found for the same meal type on earlier days of the plan and with the meals of the
+        # user's previous plan. Meals already chosen earlier in the week are never chosen again.
+        self.warm_start = False
+        self.warm_start_fraction = 0.3
+
+        # week mode: the 7 days of a meal type are evolved together and scored in one batch, meals
+        # sharing foods with another day's best meal losing up to `repetition_penalty` fitness.
+        # Islands and warm start do not apply to week searches.
+        self.week_mode = False
+        self.repetition_penalty = 0.2
+
+        # statistics, phase timings (seconds) and scored meals of the last meal search
+        self.search_stats = {}
+        self.search_timings = dict.fromkeys(SEARCH_PHASES, 0.0)
+        self.search_evaluations = 0
+
+        # warm-start meals, food sets excluded by the diversity guard and best distinct meals of the last search
+        self.search_seed_meals = []
+        self.search_excluded = set()
+        self.search_elites = []
+
+        # every meal search gets its own RNG derived from the plan seed, so a seed gives
+        # the same plan whatever the number of worker processes
+        self.seed = self._resolve_seed(seed, rng)
+        self.rng = random.Random(self.seed)
+        self.np_rng = np.random.default_rng(self.seed)
+        self.workers = workers
+            
+        # meal distribution percentages
+        self.meal_distribution = {
+            'breakfast': 0.25, 
+            'lunch': 0.35,    
+            'dinner': 0.30, 
+            'snack': 0.10 
+        }
+
+        # catalog shared read-only with the other engines of the process; the time it took to load
+        # is reported in the plan statistics
+        self.food_cache = catalog
+        self.catalog_load_time = 0.0
+    
+    def __getstate__(self):
+        # the island process pool belongs to the process that created it
+        state = self.__dict__.copy()
+        state['_island_executor'] = None
+        return state
+
+    def apply_preset(self, preset):
+        """Set the GA parameters of a preset of PLANNER_PRESETS."""
+        if preset not in PLANNER_PRESETS:
+            raise ValueError(f"Unknown planner preset {preset!r}, expected one of {', '.join(PLANNER_PRESETS)}")
+        self.preset = preset
+        for name, value in PLANNER_PRESETS[preset].items():
+            setattr(self, name, value)
+
+    def _worker_engine(self):
+        """Return the engine sent once to every process of the search pools."""
+        return self
+
+    @staticmethod
+    def _resolve_seed(seed, rng):
+        """Return the plan seed: the given seed, one drawn from the given RNG, or a fresh random one.
+
+        `rng` may be a random.Random or a numpy.random.Generator; it is only used to draw the seed,
+        so the planner never touches the global random state."""
+        if seed is not None and rng is not None:
+            raise ValueError("Pass either a seed or an rng, not both")
+        if seed is not None:
+            return int(seed)
+        if isinstance(rng, np.random.Generator):
+            return int(rng.integers(2 ** 32))
+        if isinstance(rng, random.Random):
+            return rng.getrandbits(32)
+        if rng is not None:
+            raise TypeError(f"rng must be a random.Random or numpy.random.Generator, not {type(rng).__name__}")
+        return secrets.randbits(32)
+
+    def generate_meal_plan(self, name="Plan personalizat (genetic)", description=None, previous_meals=None):
+        """Generate a complete 7-day meal plan in memory, without touching the database.
+
+        With warm start, `previous_meals` ({meal_type: meals}, e.g. the user's previous plan) also
+        seed the initial populations.
+
+        Returns a dict with the MealPlan fields and a 'meals' list holding, for each of the
+        28 meals, its day, meal_type, fitness and foods as (food_id, amount) pairs."""
+        start_time = time.time()
+        deadline = start_time + self.plan_time_budget_ms / 1000 if self.plan_time_budget_ms is not None else None
+
+        # run the 28 independent meal searches (7 days x 4 meal types)
+        results = self._run_meal_searches(self._meal_search_tasks(deadline), previous_meals)
+        total_time = time.time() - start_time
+
+        stats = self._plan_stats(results, total_time)
+        logger.info(
+            "Generated plan (seed %s) in %.2f seconds: average fitness %.4f, %.1f generations per meal",
+            self.seed, total_time, stats['average_fitness'], stats['average_generations']
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            self._log_statistics(results, total_time)
+
+        return {
+            'name': name,
+            'description': description or f"Genetic plan optimised for {self.target_calories:.0f} calories daily",
+            'target_calories': self.target_calories,
+            'target_protein': self.target_protein,
+            'target_carbs': self.target_carbs,
+            'target_fat': self.target_fat,
+            'seed': self.seed,
+            'stats': stats,
+            'meals': results,
+        }
+
+    def _plan_stats(self, results, total_time):
+        """Structured statistics of a generated plan, saved as JSON on the MealPlan.
+
+        Phase timings are summed over the meal searches (CPU time when they run in parallel)."""
+        timings = dict.fromkeys(SEARCH_PHASES, 0.0)
+        generations = []
+        stop_reasons = Counter()
+        for result in results:
+            for phase, milliseconds in result['stats'].get('timings_ms', {}).items():
+                timings[phase] += milliseconds
+            if 'generations' in result['stats']:
+                generations.append(result['stats']['generations'])
+                stop_reasons[result['stats']['stop_reason']] += 1
+
+        fitness_scores = [result['fitness'] for result in results]
+        return {
+            'seed': self.seed,
+            'preset': self.preset,
+            'meals': len(results),
+            'workers': self.workers,
+            'islands': self.islands,
+            'portion_optimizer': self.portion_optimizer,
+            'average_fitness': sum(fitness_scores) / len(fitness_scores) if fitness_scores else 0.0,
+            'average_generations': sum(generations) / len(generations) if generations else 0.0,
+            'stop_reasons': dict(stop_reasons),
+            # a time budget cut searches short, so the plan depends on the machine and not only on the seed
+            'time_budget_reached': 'deadline' in stop_reasons,
+            'total_ms': total_time * 1000,
+            'timings_ms': {'catalog_load': self.catalog_load_time * 1000, **timings},
+        }
+
+    def _log_statistics(self, results, total_time):
+        """Log the fitness statistics table of the generated meals (debug level)."""
+        # Track best meals for each meal type
+        best_meals = {
+            'breakfast': {'best_fitness': 0, 'best_meal': None, 'all_scores': []},
+            'lunch': {'best_fitness': 0, 'best_meal': None, 'all_scores': []},
+            'dinner': {'best_fitness': 0, 'best_meal': None, 'all_scores': []},
+            'snack': {'best_fitness': 0, 'best_meal': None, 'all_scores': []}
+        }
+
+        for result in results:
+            meal_type = result['meal_type']
+            fitness_score = result['fitness']
+            
+            # Track fitness scores for averages
+            best_meals[meal_type]['all_scores'].append(fitness_score)
+            
+            # Update best meal if this one is better
+            if fitness_score > best_meals[meal_type]['best_fitness']:
+                best_meals[meal_type]['best_fitness'] = fitness_score
+                best_meals[meal_type]['best_meal'] = {
+                    'day': result['day'],
+                    'foods': result['foods'],
+                    'fitness': fitness_score
+                }
+        
+        # Calculate overall average of all best meals
+        all_best_scores = [data['best_fitness'] for data in best_meals.values() if data['best_fitness'] > 0]
+        best_meals_average = sum(all_best_scores) / len(all_best_scores) if all_best_scores else 0
+        
+        # comprehensive meal generation statistics, logged as one record
+        lines = []
+        lines.append("\n" + "="*70)
+        lines.append("📊 MEAL GENERATION STATISTICS")
+        lines.append("="*70)
+        
+        lines.append(f"🕐 Total Generation Time: {total_time:.2f} seconds")
+        lines.append(f"📊 Time per meal: {total_time/28:.3f} seconds (28 meals total)")
+
+        generations = [result['stats']['generations'] for result in results if 'generations' in result['stats']]
+        if generations:
+            stop_reasons = Counter(result['stats']['stop_reason'] for result in results if 'stop_reason' in result['stats'])
+            lines.append(f"🧬 Generations per meal: {sum(generations) / len(generations):.1f} avg, {max(generations)} max "
+                         f"({', '.join(f'{reason}: {count}' for reason, count in stop_reasons.most_common())})")
+        
+        lines.append("\n🎯 FITNESS SCORE ANALYSIS:")
+        lines.append("-" * 70)
+        lines.append(f"{'Meal Type':<12} {'Best Score':<12} {'Avg Score':<12} {'Day':<8} {'Performance'}")
+        lines.append("-" * 70)
+        
+        overall_scores = []
+        
+        for meal_type, data in best_meals.items():
+            all_scores = data['all_scores']
+            best_score = data['best_fitness']
+            avg_score = sum(all_scores) / len(all_scores) if all_scores else 0
+            best_day = data['best_meal']['day'] if data['best_meal'] else 'N/A'
+            
+            # Add to overall calculation
+            overall_scores.extend(all_scores)
+            
+            # Performance indicator
+            if avg_score >= 0.8:
+                performance = "🟢 Excellent"
+            elif avg_score >= 0.7:
+                performance = "🟡 Good"
+            elif avg_score >= 0.6:
+                performance = "🟠 Fair"
+            else:
+                performance = "🔴 Needs Work"
+            
+            lines.append(f"{meal_type.capitalize():<12} {best_score:<12.4f} {avg_score:<12.4f} {best_day:<8} {performance}")
+        
+        # Overall statistics
+        overall_best = max(overall_scores) if overall_scores else 0
+        overall_avg = sum(overall_scores) / len(overall_scores) if overall_scores else 0
+        
+        lines.append("-" * 70)
+        lines.append(f"{'OVERALL':<12} {overall_best:<12.4f} {overall_avg:<12.4f} {'All':<8} {'Summary'}")
+        lines.append(f"{'BEST MEALS AVG':<12} {'-':<12} {best_meals_average:<12.4f} {'All':<8} {'Best Only'}")
+        lines.append("-" * 70)
+        
+        # summary of best meals found
+        lines.append("\n🏆 BEST MEALS BY TYPE:")
+        lines.append("-" * 50)
+        
+        for meal_type, data in best_meals.items():
+            if data['best_meal']:
+                best = data['best_meal']
+                lines.append(f"\n{meal_type.upper()} - Day {best['day']} (Score: {best['fitness']:.4f})")
+                
+                # Display top 3 foods in best meal
+                sorted_foods = sorted(best['foods'], key=lambda x: x[1], reverse=True)[:3]
+                for i, (food_id, amount) in enumerate(sorted_foods, 1):
+                    row = self.food_cache.row_of(food_id)
+                    if row is not None:
+                        lines.append(f"  {i}. {self.food_cache.names[row]}: {amount:.0f}g")
+                    else:
+                        lines.append(f"  {i}. Food ID {food_id}: {amount:.0f}g")
+
+        logger.debug("\n".join(lines))
+
+    def _meal_search_tasks(self, deadline=None):
+        """List the meal searches of a 7-day plan, each with its own seed derived from the plan seed.
+
+        `deadline` is the wall-clock time (time.time()) by which every search must return."""
+        tasks = [
+            {
+                'day': day_num,
+                'meal_type': meal_type,
+                'calories': self.target_calories * pct,
+                'protein': self.target_protein * pct,
+                'carbs': self.target_carbs * pct,
+                'fat': self.target_fat * pct,
+                'deadline': deadline,
+            }
+            for day_num in range(1, 8)
+            for meal_type, pct in self.meal_distribution.items()
+        ]
+
+        seed_sequences = np.random.SeedSequence(self.seed).spawn(len(tasks))
+        for task, seed_sequence in zip(tasks, seed_sequences):
+            task['seed'] = int(seed_sequence.generate_state(1)[0])
+
+        return tasks
+
+    def _run_meal_searches(self, tasks, previous_meals=None):
+        """Run the meal searches one after another, or across a process pool when workers > 1.
+
+        Each worker receives the engine (and its food catalog) once, then only the small task
+        dicts travel between processes. Results keep the order of the tasks."""
+        if self.week_mode:
+            return self._run_week_searches(tasks)
+
+        if self.workers <= 1:
+            def run(batch):
+                return [self._run_meal_search(task) for task in batch]
+
+            if self.islands > 1 and self._island_executor is None:
+                # one process per island, shared by all the searches of the plan
+                with ProcessPoolExecutor(
+                    max_workers=self.islands, initializer=_init_search_worker, initargs=(self._worker_engine(),)
+                ) as executor:
+                    self._island_executor = executor
+                    try:
+                        return self._run_search_batches(tasks, run, previous_meals)
+                    finally:
+                        self._island_executor = None
+
+            return self._run_search_batches(tasks, run, previous_meals)
+
+        # with parallel searches, the islands of each search run in its worker process
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_search_worker, initargs=(self._worker_engine(),)
+        ) as executor:
+            return self._run_search_batches(
+                tasks, lambda batch: list(executor.map(_run_search_in_worker, batch)), previous_meals
+            )
+
+    def _run_search_batches(self, tasks, run, previous_meals=None):
+        """Run the searches with `run` (a list of tasks -> their results).
+
+        With warm start the searches run day by day: each task gets the best meals found for its
+        meal type on the earlier days (most recent first), then the previous plan meals, as seed
+        meals, and the meals already chosen for its meal type as excluded meals. The seeds only
+        depend on earlier days, so the plan stays the same for any number of workers."""
+        if not self.warm_start:
+            return run(tasks)
+
+        seed_count = int(self.population_size * self.warm_start_fraction)
+        elites = {}
+        chosen = {}
+        results = []
+        for day in sorted({task['day'] for task in tasks}):
+            day_tasks = [task for task in tasks if task['day'] == day]
+            for task in day_tasks:
+                meal_type = task['meal_type']
+                task['excluded_meals'] = chosen.get(meal_type, [])
+                task['seed_meals'] = self._distinct_meals(
+                    elites.get(meal_type, []) + (previous_meals or {}).get(meal_type, []), seed_count,
+                    excluded=task['excluded_meals']
+                )
+
+            for result in run(day_tasks):
+                meal_type = result['meal_type']
+                elites[meal_type] = result.pop('elites') + elites.get(meal_type, [])
+                chosen.setdefault(meal_type, []).append(result['foods'])
+                results.append(result)
+
+        return results
+
+    @staticmethod
+    def _distinct_meals(meals, count, excluded=()):
+        """Return the first `count` meals with distinct sets of foods, other than those of `excluded`."""
+        distinct = []
+        seen = {frozenset(food_id for food_id, _ in meal) for meal in excluded}
+        for meal in meals:
+            foods = frozenset(food_id for food_id, _ in meal)
+            if foods and foods not in seen:
+                seen.add(foods)
+                distinct.append(meal)
+                if len(distinct) == count:
+                    break
+        return distinct
+
+    def _start_search(self, task, meals=1):
+        """Reset the search state for a task: its seeded RNG, statistics and deadline."""
+        self.rng = random.Random(task['seed'])
+        self.np_rng = np.random.default_rng(task['seed'])
+        self.search_stats = {}
+        self.search_timings = dict.fromkeys(SEARCH_PHASES, 0.0)
+        self.search_evaluations = 0
+        self.search_seed_meals = task.get('seed_meals', [])
+        self.search_excluded = {frozenset(food_id for food_id, _ in meal) for meal in task.get('excluded_meals', [])}
+
+        # the plan deadline, tightened by the budget of the searched meals
+        self.search_deadline = task.get('deadline')
+        if self.meal_time_budget_ms is not None:
+            meal_deadline = time.time() + self.meal_time_budget_ms * meals / 1000
+            if self.search_deadline is None or meal_deadline < self.search_deadline:
+                self.search_deadline = meal_deadline
+
+    def _run_meal_search(self, task):
+        """Run the genetic search of one meal with the task's own seeded RNG."""
+        self._start_search(task)
+
+        fitness_score, food_items = self._generate_meal_foods_genetic(
+            task['meal_type'], task['calories'], task['protein'], task['carbs'], task['fat']
+        )
+        self.search_stats['evaluations'] = self.search_evaluations
+        self.search_stats['timings_ms'] = {
+            phase: seconds * 1000 for phase, seconds in self.search_timings.items()
+        }
+        result = {
+            'day': task['day'],
+            'meal_type': task['meal_type'],
+            'fitness': fitness_score,
+            'foods': food_items,
+            'stats': self.search_stats,
+        }
+        if self.warm_start:
+            result['elites'] = self.search_elites
+        return result
+    
+    def _run_week_searches(self, tasks):
+        """Week mode: run one search per meal type for all its days, in a process pool when workers > 1.
+
+        A week search uses the seed of its first day. Results keep the order of the daily tasks."""
+        week_tasks = {}
+        for task in tasks:
+            week_task = week_tasks.setdefault(
+                task['meal_type'], {**{key: value for key, value in task.items() if key != 'day'}, 'days': []}
+            )
+            week_task['days'].append(task['day'])
+
+        if self.workers <= 1:
+            weeks = [self._run_week_search(task) for task in week_tasks.values()]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_search_worker, initargs=(self._worker_engine(),)
+            ) as executor:
+                weeks = list(executor.map(_run_week_search_in_worker, week_tasks.values()))
+
+        results = {(result['day'], result['meal_type']): result for week in weeks for result in week}
+        return [results[(task['day'], task['meal_type'])] for task in tasks]
+
+    def _run_week_search(self, task):
+        """Evolve the meals of every day of one meal type together and return one result per day.
+
+        The statistics of the week search are shared by its days, its timings and evaluations
+        being split evenly between them."""
+        days = task['days']
+        meal_type = task['meal_type']
+        targets = (task['calories'], task['protein'], task['carbs'], task['fat'])
+        self._start_search(task, meals=len(days))
+
+        foods_for_meal = self.food_cache.meal_rows[meal_type]
+        if not len(foods_for_meal):
+            logger.warning("No foods for: %s", meal_type)
+            best_meals = [[] for _ in days]
+        else:
+            with self._timed('initialization'):
+                populations = [
+                    self._initialize_population(foods_for_meal, targets[0], meal_type) for _ in days
+                ]
+            with self._timed('evolution'):
+                best_meals = self._evolve_week(populations, foods_for_meal, *targets)
+
+        foods_dict = self.food_cache.index_for(foods_for_meal)
+        stats = {
+            **self.search_stats,
+            'evaluations': self.search_evaluations / len(days),
+            'timings_ms': {phase: seconds * 1000 / len(days) for phase, seconds in self.search_timings.items()},
+        }
+        return [
+            {
+                'day': day,
+                'meal_type': meal_type,
+                'fitness': self._fitness_score(meal, foods_dict, *targets),
+                'foods': meal,
+                'stats': stats,
+            }
+            for day, meal in zip(days, best_meals)
+        ]
+
+    def _evolve_week(self, populations, foods_for_meal, target_calories, target_protein, target_carbs, target_fat):
+        """Evolve one population per day, all scored together with the cross-day repetition penalty.
+
+        Returns the best meal of every day; a day never gets a meal already chosen for an earlier day."""
+        foods_dict = self.food_cache.index_for(foods_for_meal)
+        targets = (target_calories, target_protein, target_carbs, target_fat)
+
+        # mean over the days of their best (penalized) fitness
+        best_fitness_history = []
+        stop_reason = None
+        for generation in range(self.generations):
+            populations, day_scores = self._score_week(populations, foods_dict, *targets)
+            best_fitness_history.append(float(np.mean([max(scores) for scores in day_scores])))
+
+            stop_reason = self._stop_reason(best_fitness_history)
+            if stop_reason:
+                logger.debug("Week search stopped after %d generations: %s", generation + 1, stop_reason)
+                break
+
+            populations = [
+                self._next_generation(population, scores, foods_for_meal)
+                for population, scores in zip(populations, day_scores)
+            ]
+
+        if stop_reason is None:
+            stop_reason = 'generations'
+            populations, day_scores = self._score_week(populations, foods_dict, *targets)
+
+        best_meals = []
+        for population, scores in zip(populations, day_scores):
+            best_meal = population[self._pick_best_meal(population, scores)]
+            best_meals.append(best_meal)
+            self.search_excluded.add(frozenset(food_id for food_id, _ in best_meal))
+
+        self.search_stats.update({
+            'stop_reason': stop_reason,
+            'generations': len(best_fitness_history),
+            'initial_fitness': best_fitness_history[0],
+            'week': True,
+        })
+        return best_meals
+
+    def _score_week(self, populations, foods_dict, target_calories, target_protein, target_carbs, target_fat):
+        """Score the populations of all days in one batch, penalizing meals repeated across days.
+
+        Returns (populations, scores of every day)."""
+        days = len(populations)
+        with self._timed('scoring'):
+            meals = [meal for population in populations for meal in population]
+            if self.portion_optimizer:
+                meals = self._optimize_portions(
+                    meals, foods_dict, target_calories, target_protein, target_carbs, target_fat
+                )
+
+            rows, amounts, lengths = self._population_to_arrays(meals, foods_dict)
+            scores = self._fitness_scores_batch(
+                rows, amounts, lengths, target_calories, target_protein, target_carbs, target_fat
+            )
+
+            # every day holds population_size meals
+            rows = rows.reshape(days, -1, rows.shape[1])
+            scores = scores.reshape(days, -1)
+            scores = scores - self._repetition_penalties(rows, lengths.reshape(days, -1), scores)
+
+        self.search_evaluations += len(meals)
+        size = scores.shape[1]
+        populations = [meals[day * size:(day + 1) * size] for day in range(days)]
+        return populations, scores.tolist()
+
+    def _repetition_penalties(self, rows, lengths, scores):
+        """Penalty of every meal of the (days, meals, slots) rows for repeating another day's best meal.
+
+        The penalty is `repetition_penalty` times the largest share of the meal's foods found in
+        the best meal of one other day: 0 for a new meal, the full penalty for a repeated one."""
+        days = rows.shape[0]
+        best_rows = rows[np.arange(days), np.argmax(scores, axis=1)]
+
+        # (days, meals, other days): foods of each meal found in the best meal of each day
+        found = (rows[:, :, :, None, None] == best_rows[None, None, None, :, :]).any(axis=4)
+        shared = (found & (rows >= 0)[:, :, :, None]).sum(axis=2)
+        shared[np.arange(days), :, np.arange(days)] = 0
+
+        return self.repetition_penalty * shared.max(axis=2) / np.maximum(lengths, 1)
+
+    def _generate_meal_foods_genetic(self, meal_type, target_calories, target_protein, target_carbs, target_fat):
+        """Generate food items for a specific meal using genetic algorithm optimization.
+        
+        Creates a population of meal candidates, evolves them through multiple generations,
+        and selects the best combination of foods that meets nutritional targets."""
+        foods_for_meal = self.food_cache.meal_rows[meal_type]
+        
+        if not len(foods_for_meal):
+            logger.warning("No foods for: %s", meal_type)
+            return 0.0, []
+        
+        logger.debug("Generating genetic meal for %s: %d available foods", meal_type, len(foods_for_meal))
+
+        if self.vectorized_operators and self.islands <= 1:
+            best_meal = self._evolve_population_arrays(
+                meal_type, foods_for_meal, target_calories, target_protein, target_carbs, target_fat
+            )
+            foods_dict = self.food_cache.index_for(foods_for_meal)
+            fitness_score = self._fitness_score(
+                best_meal, foods_dict, target_calories, target_protein, target_carbs, target_fat
+            )
+            return fitness_score, best_meal
+        
+        # create initial population of meal candidates (one per island)
+        with self._timed('initialization'):
+            populations = [
+                self._initialize_population(foods_for_meal, target_calories, meal_type)
+                for _ in range(max(self.islands, 1))
+            ]
+
+            # warm start: the seed meals replace the last random meals, spread over the islands
+            for island, population in enumerate(populations):
+                seeds = self.search_seed_meals[island::len(populations)]
+                if seeds:
+                    population[len(population) - len(seeds):] = [list(meal) for meal in seeds]
+            self.search_stats['seeded'] = len(self.search_seed_meals)
+        
+        # evolve the population to find the best meal
+        with self._timed('evolution'):
+            if self.islands > 1:
+                best_meal = self._evolve_islands(
+                    populations, foods_for_meal, target_calories, target_protein, target_carbs, target_fat
+                )
+            else:
+                best_meal = self._evolve_population(
+                    populations[0], 
+                    foods_for_meal, 
+                    target_calories, 
+                    target_protein, 
+                    target_carbs, 
+                    target_fat
+                )
+        
+        logger.debug("Best meal: %d foods", len(best_meal))
+        
+        # calculate fitness score for the best meal
+        foods_dict = self.food_cache.index_for(foods_for_meal)
+        fitness_score = self._fitness_score(best_meal, foods_dict, target_calories, target_protein, target_carbs, target_fat)
+        
+        return fitness_score, best_meal
+
+    @contextmanager
+    def _timed(self, phase):
+        """Add the time spent in the block to the timing of a phase of the current search."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.search_timings[phase] += time.perf_counter() - start
+
+    def _initialize_population(self, foods, target_calories, meal_type):
+        """Create initial population of meal candidates with structured food combinations.
+
+        `foods` is the array of catalog rows available for the meal type. The candidates of each
+        functional slot (protein, carbs, veggies, ...) come precomputed from the food cache, so
+        sampling a food for a slot is O(1)."""
+        population = []
+        
+        logger.debug("initialize population for : %s", meal_type)
+
+
+        # get functional slot candidates for this meal type
+        catalog = self.food_cache
+        slot_rows = catalog.slot_rows[meal_type]
+        
+        for _ in range(self.population_size):
+            meal = []
+            current_calories = 0
+            
+            if meal_type in ['lunch', 'dinner']:
+                # add protein source
+                protein_foods = slot_rows['protein']
+                if len(protein_foods):
+                    protein = self.rng.choice(protein_foods)
+                    amount = self.rng.uniform(60, 120)
+                    meal.append((catalog.food_id(protein), amount))
+                    current_calories += (amount / 100) * catalog.calories_of(protein)
+                
+                # add carbohydrate source
+                carb_foods = slot_rows['carbs']
+                if len(carb_foods):
+                    carb = self.rng.choice(carb_foods)
+                    
+                    amount = self.rng.uniform(70, 150)
+                    meal.append((catalog.food_id(carb), amount))
+                    current_calories += (amount / 100) * catalog.calories_of(carb)
+                
+                # add veggetable
+                veggie_foods = slot_rows['veggies']
+                if len(veggie_foods):
+                    veggie = self.rng.choice(veggie_foods)
+                    
+                    amount = self.rng.uniform(100, 200)
+                    meal.append((catalog.food_id(veggie), amount))
+                    current_calories += (amount / 100) * catalog.calories_of(veggie)
+            
+            elif meal_type == 'breakfast':
+                # add main food
+                main_foods = slot_rows['main']
+                main_food = None
+                if len(main_foods):
+                    main_food = self.rng.choice(main_foods)
+                    # quantity for main food (50-100g)
+                    amount = self.rng.uniform(50, 100)
+                    meal.append((catalog.food_id(main_food), amount))
+                    current_calories += (amount / 100) * catalog.calories_of(main_food)
+                
+                # add side food (e.g., toast, fruit), excluding food already used as main
+                side_food = self._choice_excluding(slot_rows['side'], main_food)
+                if side_food is not None:
+                    amount = self.rng.uniform(100, 200)
+                    meal.append((catalog.food_id(side_food), amount))
+                    current_calories += (amount / 100) * catalog.calories_of(side_food)
+            
+            elif meal_type == 'snack':
+                # for snack 1-2 items
+                snack_foods = slot_rows['items']
+                if len(snack_foods):
+                    # 1-2 snacks
+                    num_snacks = self.rng.randint(1, 2)
+                    
+                    snack = self.rng.choice(snack_foods)
+                    # quantity for snack (30-80g)
+                    amount = self.rng.uniform(30, 80)
+                    meal.append((catalog.food_id(snack), amount))
+                    current_calories += (amount / 100) * catalog.calories_of(snack)
+                    
+                    if num_snacks == 2:
+                        second_snack = self._choice_excluding(snack_foods, snack)
+                        if second_snack is not None:
+                            amount = self.rng.uniform(20, 50)
+                            meal.append((catalog.food_id(second_snack), amount))
+                            current_calories += (amount / 100) * catalog.calories_of(second_snack)
+            
+            # adjsut meal portions based on current calories
+            if current_calories < 0.7 * target_calories:
+                # if we have too few calories, increase portions
+                scale_factor = min(1.5, target_calories / max(current_calories, 1))
+                meal = [(food_id, amount * scale_factor) for food_id, amount in meal]
+            elif current_calories > 1.3 * target_calories:
+                # if we have too many calories, reduce portions
+                scale_factor = max(0.6, target_calories / max(current_calories, 1))
+                meal = [(food_id, amount * scale_factor) for food_id, amount in meal]
+            
+            population.append(meal)
+        
+        return population
+
+    def _choice_excluding(self, candidates, excluded, attempts=8):
+        """Pick a random candidate row different from `excluded`, or None if there is none.
+
+        Uses rejection sampling so the cost does not depend on the number of candidates;
+        only falls back to filtering when the excluded row keeps being drawn."""
+        if not len(candidates):
+            return None
+        if excluded is None:
+            return self.rng.choice(candidates)
+
+        for _ in range(attempts):
+            candidate = self.rng.choice(candidates)
+            if candidate != excluded:
+                return candidate
+
+        remaining = candidates[candidates != excluded]
+        return self.rng.choice(remaining) if len(remaining) else None
+
+    def _fitness_score(self, meal, foods_dict, target_calories, target_protein, target_carbs, target_fat):
+        """Calculate fitness score for a meal based on nutritional accuracy and meal coherence.
+
+        `foods_dict` maps the food ids available for the meal to their catalog rows. Categories
+        and conflict groups are compared as the integer ids and bitmasks compiled by the catalog."""
+        if not meal:
+            return 0.0
+        
+        rows = []
+        amounts = []
+        for food_id, amount in meal:
+            if food_id not in foods_dict:
+                logger.warning("Food ID %s does not exist!", food_id)
+                continue
+            rows.append(foods_dict[food_id])
+            amounts.append(amount)
+
+        catalog = self.food_cache
+
+        # calculate total nutritional values
+        total_calories = 0
+        total_protein = 0
+        total_carbs = 0
+        total_fat = 0
+        
+        for amount, (calories, protein, carbs, fat) in zip(amounts, catalog.nutrients[rows].tolist()):
+            total_calories += (amount / 100) * calories
+            total_protein += (amount / 100) * protein
+            total_carbs += (amount / 100) * carbs
+            total_fat += (amount / 100) * fat
+        
+        # verify food categories (-1 means the food has no category)
+        food_categories = [category_id for category_id in catalog.category_ids[rows].tolist() if category_id >= 0]
+        
+        # calculate penalties for nutritional targets
+        calorie_penalty = abs(total_calories - target_calories) / max(target_calories, 1)
+        protein_penalty = abs(total_protein - target_protein) / max(target_protein, 1)
+        carbs_penalty = abs(total_carbs - target_carbs) / max(target_carbs, 1)
+        fat_penalty = abs(total_fat - target_fat) / max(target_fat, 1)
+
+        # verify conflicts between food groups: count the foods of each group from their bitmasks
+        group_counts = {}
+        for mask in catalog.conflict_masks[rows].tolist():
+            while mask:
+                group_bit = mask & -mask
+                group_counts[group_bit] = group_counts.get(group_bit, 0) + 1
+                mask ^= group_bit
+
+        # if there are multiple foods from the same group, apply a penalty
+        conflict_penalty = sum(0.5 * (count - 1) for count in group_counts.values() if count > 1)
+
+        # verify coherence of the meal
+        coherence_score = 0.0
+        
+        # verify if meal is a snack or main meal
+        if target_calories < 400:
+            is_snack = True
+        else:
+            is_snack = False
+
+        if is_snack:
+            # 1. snacks should be simple
+            if len(meal) == 2:
+                coherence_score += 0.5 
+            elif len(meal) == 1:
+                coherence_score += 0.4  
+            elif len(meal) == 3:
+                coherence_score += 0.2  
+            else:
+                coherence_score -= 0.4 
+        else:
+            # 1. main meals should have 2-4 items ideal
+            if len(meal) >= 2 and len(meal) <= 4:
+                coherence_score += 0.3
+            elif len(meal) == 5:
+                coherence_score += 0.1
+            else:
+                coherence_score -= 0.2 
+        
+            # 2. main meals should have diverse food categories
+            unique_categories = set(food_categories)
+            if len(unique_categories) >= 3:
+                coherence_score += 0.4
+            elif len(unique_categories) == 2:
+                coherence_score += 0.2
+        
+        # 3. verify macronutrient balance
+        if len(meal) >= 2:
+            # Protein should be at least 15% of calories
+            protein_ratio = (total_protein * 4) / max(total_calories, 1)
+            if protein_ratio >= 0.15:
+                coherence_score += 0.2
+            
+            # penalize if carbs or fat are too low
+            if total_carbs < 5:
+                coherence_score -= 0.2
+            if total_fat < 3:
+                coherence_score -= 0.2
+        
+
+        # penalize duplicates: more than one food from the same category  (e.g., roasted chicken, grilled chicken)
+        category_counts = Counter(food_categories)
+        duplicate_penalty = sum((count - 1) * 0.8 for count in category_counts.values() if count > 1)
+
+        # final fitness score calculation
+        nutritional_score = 1 / (1 + calorie_penalty * 2 + protein_penalty + carbs_penalty + fat_penalty)
+        final_score = nutritional_score * 0.7 + coherence_score * 0.3 - duplicate_penalty - conflict_penalty
+        
+        return max(0.0,final_score)
+
+    def _population_to_arrays(self, population, foods_dict):
+        """Convert a population of meals into padded (rows, amounts) arrays plus meal lengths.
+
+        Empty slots and foods that are not available for the meal get row -1."""
+        width = max((len(meal) for meal in population), default=0) or 1
+
+        rows = np.full((len(population), width), -1, dtype=np.int64)
+        amounts = np.zeros((len(population), width))
+        lengths = np.zeros(len(population), dtype=np.int64)
+
+        for i, meal in enumerate(population):
+            lengths[i] = len(meal)
+            for j, (food_id, amount) in enumerate(meal):
+                rows[i, j] = foods_dict.get(food_id, -1)
+                amounts[i, j] = amount
+
+        return rows, amounts, lengths
+
+    def _optimize_portions(self, population, foods_dict, target_calories, target_protein, target_carbs, target_fat):
+        """Replace the amounts of every meal by the grams that best hit the meal targets.
+
+        Foods that are not available for the meal keep their amount."""
+        if not population:
+            return population
+
+        rows, amounts, _ = self._population_to_arrays(population, foods_dict)
+        optimized = self._optimize_portion_arrays(
+            rows, amounts, target_calories, target_protein, target_carbs, target_fat
+        ).tolist()
+
+        return [
+            [(food_id, grams) for (food_id, _), grams in zip(meal, meal_grams)]
+            for meal, meal_grams in zip(population, optimized)
+        ]
+
+    def _fitness_scores_batch(self, rows, amounts, lengths, target_calories, target_protein, target_carbs, target_fat):
+        """Vectorized equivalent of _fitness_score for a whole population.
+
+        Totals come from one batched product of the (population x slots) amounts against the
+        gathered nutrient rows; penalties and coherence rules are applied as array masks
+        (see _combine_fitness)."""
+        valid = rows >= 0
+        safe_rows = np.where(valid, rows, 0)
+
+        # (population, 4) totals of calories, protein, carbs, fat
+        weights = np.where(valid, amounts, 0.0) / 100
+        totals = np.einsum('ps,psk->pk', weights, self.food_cache.nutrients[safe_rows].astype(float))
+
+        # conflicts: foods of the same conflict group counted per meal
+        group_bits = np.arange(self.food_cache.conflict_group_count)
+        masks = np.where(valid, self.food_cache.conflict_masks[safe_rows], 0)
+        group_counts = ((masks[:, :, None] >> group_bits) & 1).sum(axis=1)
+        conflict_penalty = 0.5 * np.maximum(group_counts - 1, 0).sum(axis=1)
+
+        # categories: total number of categorised foods and number of distinct categories
+        categories = np.sort(np.where(valid, self.food_cache.category_ids[safe_rows], -1), axis=1)
+        categorised = (categories >= 0).sum(axis=1)
+        unique_categories = (categories[:, :1] >= 0).sum(axis=1) + (
+            (categories[:, 1:] != categories[:, :-1]) & (categories[:, 1:] >= 0)
+        ).sum(axis=1)
+
+        return self._combine_fitness(
+            totals, lengths, unique_categories, categorised, conflict_penalty,
+            target_calories, target_protein, target_carbs, target_fat
+        )
+
+    def _combine_fitness(self, totals, lengths, unique_categories, categorised, conflict_penalty,
+                         target_calories, target_protein, target_carbs, target_fat):
+        """Fitness of meals from their (meals, 4) nutrient totals, lengths and category/conflict counts."""
+        total_calories, total_protein, total_carbs, total_fat = totals.T
+
+        # penalties for nutritional targets
+        targets = np.array([target_calories, target_protein, target_carbs, target_fat], dtype=float)
+        penalties = np.abs(totals - targets) / np.maximum(targets, 1)
+        nutritional_score = 1 / (1 + penalties[:, 0] * 2 + penalties[:, 1] + penalties[:, 2] + penalties[:, 3])
+
+        # coherence of the meal
+        if target_calories < 400:
+            coherence_score = np.select(
+                [lengths == 2, lengths == 1, lengths == 3], [0.5, 0.4, 0.2], default=-0.4
+            )
+        else:
+            coherence_score = np.select(
+                [(lengths >= 2) & (lengths <= 4), lengths == 5], [0.3, 0.1], default=-0.2
+            )
+            coherence_score += np.select(
+                [unique_categories >= 3, unique_categories == 2], [0.4, 0.2], default=0.0
+            )
+
+        # macronutrient balance, only for meals with 2 or more foods
+        protein_ratio = (total_protein * 4) / np.maximum(total_calories, 1)
+        balance = 0.2 * (protein_ratio >= 0.15) - 0.2 * (total_carbs < 5) - 0.2 * (total_fat < 3)
+        coherence_score = coherence_score + np.where(lengths >= 2, balance, 0.0)
+
+        duplicate_penalty = 0.8 * (categorised - unique_categories)
+
+        final_score = nutritional_score * 0.7 + coherence_score * 0.3 - duplicate_penalty - conflict_penalty
+        final_score = np.maximum(0.0, final_score)
+        final_score[lengths == 0] = 0.0
+
+        return final_score
+
+    def _score_population(self, population, foods_dict, target_calories, target_protein, target_carbs, target_fat,
+                          fitness_cache=None):
+        """Score every meal in the population, reusing the scores of genomes seen earlier in the search.
+
+        Only genomes missing from the fitness cache are evaluated, each of them once."""
+        if fitness_cache is None:
+            return self._evaluate_population(
+                population, foods_dict, target_calories, target_protein, target_carbs, target_fat
+            )
+
+        keys = [fitness_cache.key(meal) for meal in population]
+        # scores of the batch, kept here since the cache may evict them before the batch is done
+        scores = {}
+        pending = {}
+        for i, key in enumerate(keys):
+            if key in scores or key in pending:
+                # clone of a meal already scored or being evaluated in this batch
+                fitness_cache.hits += 1
+                continue
+            score = fitness_cache.get(key)
+            if score is None:
+                pending[key] = i
+            else:
+                scores[key] = score
+
+        if pending:
+            evaluated = self._evaluate_population(
+                [population[i] for i in pending.values()],
+                foods_dict, target_calories, target_protein, target_carbs, target_fat
+            )
+            for key, score in zip(pending, evaluated):
+                fitness_cache.put(key, score)
+                scores[key] = score
+
+        return [scores[key] for key in keys]
+
+    def _evaluate_population(self, population, foods_dict, target_calories, target_protein, target_carbs, target_fat):
+        """Compute the fitness of every meal, in one batch when vectorized fitness is enabled."""
+        if self.vectorized_fitness:
+            rows, amounts, lengths = self._population_to_arrays(population, foods_dict)
+            return self._fitness_scores_batch(
+                rows, amounts, lengths, target_calories, target_protein, target_carbs, target_fat
+            ).tolist()
+
+        return [
+            self._fitness_score(meal, foods_dict, target_calories, target_protein, target_carbs, target_fat)
+            for meal in population
+        ]
+
+    def _stop_reason(self, best_fitness_history):
+        """Return why evolution should stop after the latest generation, or None to continue."""
+        if self.target_fitness is not None and best_fitness_history[-1] >= self.target_fitness:
+            return 'target_fitness'
+
+        if self.patience is not None and len(best_fitness_history) > self.patience:
+            if best_fitness_history[-1] - best_fitness_history[-1 - self.patience] <= self.min_improvement:
+                return 'plateau'
+
+        if self.search_deadline is not None and time.time() >= self.search_deadline:
+            return 'deadline'
+
+        return None
+
+    def _select_parents(self, population, fitness_scores):
+        """Select parents for reproduction using elitism and tournament selection."""
+        parents = []
+        
+        # Elitism - only the best are selected
+        elite_indices = np.argsort(fitness_scores)[-self.elite_size:]
+        parents.extend([population[i] for i in elite_indices])
+        
+        # Tournament selection
+        while len(parents) < self.population_size:
+            # Random selection of candidates for tournament
+            tournament_size = 3
+            candidates = self.rng.sample(range(len(population)), tournament_size)
+            
+            # Select the one with the best fitness score
+            best_candidate = max(candidates, key=lambda i: fitness_scores[i])
+            parents.append(population[best_candidate])
+        
+        return parents
+    
+    def _crossover(self, parent1, parent2):
+        """Perform crossover between two parent meals to create offspring."""
+        if not parent1 or not parent2:
+            return parent1 if parent1 else parent2
+        
+        child = []
+        used_food_ids = set()
+        
+        # add foods from the first parent (with duplicate check)
+        for food_id, amount in parent1:
+            if self.rng.random() < 0.5 and food_id not in used_food_ids:
+                child.append((food_id, amount))
+                used_food_ids.add(food_id)
+        
+        # add foods from the second parent (with duplicate check)
+        for food_id, amount in parent2:
+            if food_id not in used_food_ids and self.rng.random() < 0.5 and len(child) < 8:
+                child.append((food_id, amount))
+                used_food_ids.add(food_id)
+        
+        return child
+    
+    def _mutate(self, meal, foods_for_meal):
+        """Apply random mutations to a meal to introduce genetic variation"""
+        if self.rng.random() > self.mutation_rate:
+            return meal  # not mutated
+        
+        mutated_meal = meal.copy()
+        
+        # Random mutation type
+        mutation_type = self.rng.choice(['add', 'remove', 'replace', 'adjust'])
+        
+        if mutation_type == 'add' and len(mutated_meal) < 8:
+            # Random food
+            new_food = self._sample_new_food(foods_for_meal, mutated_meal)
+            if new_food is not None:
+                amount = self.rng.uniform(20, 100)
+                mutated_meal.append((self.food_cache.food_id(new_food), amount))
+                
+        elif mutation_type == 'remove' and len(mutated_meal) > 1:
+            # remove a random food
+            index_to_remove = self.rng.randint(0, len(mutated_meal) - 1)
+            mutated_meal.pop(index_to_remove)
+            
+        elif mutation_type == 'replace' and len(mutated_meal) > 0:
+            # replace a random food with another one
+            index_to_replace = self.rng.randint(0, len(mutated_meal) - 1)
+            
+            new_food = self._sample_new_food(foods_for_meal, mutated_meal)
+            if new_food is not None:
+                amount = self.rng.uniform(20, 100)
+                mutated_meal[index_to_replace] = (self.food_cache.food_id(new_food), amount)
+                
+        elif mutation_type == 'adjust' and len(mutated_meal) > 0:
+            # adjust amount of a random food
+            index_to_adjust = self.rng.randint(0, len(mutated_meal) - 1)
+            food_id, amount = mutated_meal[index_to_adjust]
+            
+            new_amount = amount * self.rng.uniform(0.7, 1.3)
+            new_amount = max(10, min(200, new_amount))
+            mutated_meal[index_to_adjust] = (food_id, new_amount)
+        
+        return mutated_meal
+    
+    def _sample_new_food(self, foods_for_meal, meal, attempts=16):
+        """Draw a random row of the meal pool whose food is not already in the meal (None if there is none).
+
+        Uses rejection sampling: a meal holds at most 8 foods, so a draw is almost always accepted and
+        the cost does not depend on the pool size. Small pools mostly covered by the meal fall back to
+        filtering the whole pool."""
+        if len(foods_for_meal) == 0:
+            return None
+
+        meal_ids = {food_id for food_id, _ in meal}
+        for _ in range(attempts):
+            row = foods_for_meal[self.rng.randrange(len(foods_for_meal))]
+            if self.food_cache.food_id(row) not in meal_ids:
+                return row
+
+        available_foods = self._available_foods(foods_for_meal, meal)
+        return self.rng.choice(available_foods) if len(available_foods) else None
+
+    def _available_foods(self, foods_for_meal, meal):
+        """Return the catalog rows of the meal pool whose foods are not already in the meal."""
+        meal_ids = [food_id for food_id, _ in meal]
+        return foods_for_meal[~np.isin(self.food_cache.ids[foods_for_meal], meal_ids)]
+
+    def _evolve_population(self, population, foods_for_meal, target_calories, target_protein, target_carbs, target_fat):
+        """Evolve the population through multiple generations to find optimal meal composition.
+        
+        Iteratively applies selection, crossover, and mutation operations while
+        tracking fitness improvements across generations. Uses elitism to preserve
+        best solutions.
+
+        Evolution stops early on a fitness plateau, at the target fitness or at the search
+        deadline, returning the best meal found so far (see _stop_reason).
+        """
+        # create a dictionary for fast access to food items by ID
+        foods_dict = self.food_cache.index_for(foods_for_meal)
+
+        logger.debug("Foods dict contains %d foods", len(foods_dict))
+        if len(foods_dict) == 0:
+            logger.error("Foods dict is empty!")
+            return []
+        
+        # keep best fitness history for analysis
+        best_fitness_history = []
+        average_fitness_history = []
+
+        # elites and clones survive between generations, so their scores are looked up instead of recomputed
+        fitness_cache = FitnessCache(self.fitness_cache_size) if self.fitness_cache_size > 0 else None
+
+        stop_reason = None
+        for generation in range(self.generations):
+            # calculate fitness scores for the current population
+            population, fitness_scores = self._score_generation(
+                population, foods_dict, target_calories, target_protein, target_carbs, target_fat, fitness_cache
+            )
+            
+            # calculate best and average fitness for this generation
+            best_fitness = max(fitness_scores)
+            avg_fitness = sum(fitness_scores) / len(fitness_scores)
+            best_fitness_history.append(best_fitness)
+            average_fitness_history.append(avg_fitness)
+            
+            # print progress every 5 generations
+            if generation % 5 == 0 or generation == self.generations - 1: 
+                logger.debug("Gen %d/%d: Best fitness = %.4f, Avg fitness = %.4f",
+                             generation + 1, self.generations, best_fitness, avg_fitness)
+
+            # the population is already scored, so its best meal can be returned right away
+            stop_reason = self._stop_reason(best_fitness_history)
+            if stop_reason:
+                logger.debug("Stopped after %d generations: %s", generation + 1, stop_reason)
+                break
+            
+            # create the next generation
+            population = self._next_generation(population, fitness_scores, foods_for_meal)
+        
+        # evolution results
+        logger.debug("Fitness evolution: initial %.4f, final %.4f",
+                     best_fitness_history[0], best_fitness_history[-1])
+        
+        # return best meal from the final population
+        if stop_reason is None:
+            stop_reason = 'generations'
+            population, fitness_scores = self._score_generation(
+                population, foods_dict, target_calories, target_protein, target_carbs, target_fat, fitness_cache
+            )
+
+        self.search_stats.update({
+            'stop_reason': stop_reason,
+            'generations': len(best_fitness_history),
+            'initial_fitness': best_fitness_history[0],
+        })
+        if fitness_cache is not None:
+            self.search_stats['fitness_cache'] = fitness_cache.stats()
+            logger.debug("Fitness cache: %d hits, %d misses, hit rate %.1f%%, %d evictions",
+                         fitness_cache.hits, fitness_cache.misses, fitness_cache.hit_rate * 100,
+                         fitness_cache.evictions)
+
+        if not fitness_scores:
+            logger.error("Fitness scores are empty!")
+            return []
+            
+        best_index = self._pick_best_meal(population, fitness_scores)
+        best_meal = population[best_index]
+        
+        logger.debug("Best meal fitness: %.4f, items: %d", fitness_scores[best_index], len(best_meal))
+        
+        if not best_meal:
+            logger.warning("Best meal is empty!")
+            
+        return best_meal
+
+    def _evolve_islands(self, populations, foods_for_meal, target_calories, target_protein, target_carbs, target_fat):
+        """Evolve one population per island, migrating the best meals between islands.
+
+        Islands evolve independently for `migration_interval` generations (in the island process
+        pool when there is one), then the `migration_size` best meals of each island replace the
+        last children of the next island on a ring. Returns the best meal of all islands."""
+        foods_dict = self.food_cache.index_for(foods_for_meal)
+        if len(foods_dict) == 0:
+            logger.error("Foods dict is empty!")
+            return []
+
+        targets = (target_calories, target_protein, target_carbs, target_fat)
+
+        # island RNGs are seeded from the search RNG, so a seed gives the same meal with or without processes
+        island_seed = self.rng.getrandbits(32)
+
+        best_fitness_history = []
+        generation = 0
+        epoch = 0
+        stop_reason = None
+        while generation < self.generations:
+            generations = min(self.migration_interval, self.generations - generation)
+            tasks = [
+                {
+                    'population': population,
+                    'foods_for_meal': foods_for_meal,
+                    'targets': targets,
+                    'generations': generations,
+                    'seed': int(np.random.SeedSequence([island_seed, island, epoch]).generate_state(1)[0]),
+                    # island processes hold the engine of the pool, without the state of this search
+                    'excluded': self.search_excluded,
+                }
+                for island, population in enumerate(populations)
+            ]
+            if self._island_executor is not None:
+                results = list(self._island_executor.map(_evolve_island_in_worker, tasks))
+                # islands evolved in other processes report the time they spent scoring
+                self.search_timings['scoring'] += sum(result['scoring_time'] for result in results)
+                self.search_evaluations += sum(result['evaluations'] for result in results)
+            else:
+                results = [self._evolve_island(task) for task in tasks]
+
+            # best fitness of all islands, generation by generation
+            best_fitness_history.extend(
+                max(history) for history in zip(*(result['best_fitness_history'] for result in results))
+            )
+            generation += generations
+            epoch += 1
+
+            # ring migration: island i receives the best meals of island i - 1
+            populations = []
+            for island, result in enumerate(results):
+                migrants = results[island - 1]['migrants']
+                population = result['population']
+                population[len(population) - len(migrants):] = [list(meal) for meal in migrants]
+                populations.append(population)
+
+            logger.debug("Gen %d/%d: Best fitness on %d islands = %.4f",
+                         generation, self.generations, len(populations), best_fitness_history[-1])
+
+            stop_reason = self._stop_reason(best_fitness_history)
+            if stop_reason:
+                logger.debug("Stopped after %d generations: %s", generation, stop_reason)
+                break
+
+        # the best meal of the final generations of all islands
+        final_population = []
+        final_scores = []
+        for population in populations:
+            population, fitness_scores = self._score_generation(population, foods_dict, *targets)
+            final_population.extend(population)
+            final_scores.extend(fitness_scores)
+        best_index = self._pick_best_meal(final_population, final_scores)
+        best_meal = final_population[best_index]
+        best_fitness = final_scores[best_index]
+
+        self.search_stats.update({
+            'stop_reason': stop_reason or 'generations',
+            'generations': generation,
+            'initial_fitness': best_fitness_history[0],
+            'islands': len(populations),
+        })
+        logger.debug("Best meal fitness: %.4f, items: %d", best_fitness, len(best_meal))
+        return best_meal
+
+    def _pick_best_meal(self, population, fitness_scores):
+        """Return the index of the best meal whose foods were not chosen earlier in the week.
+
+        Meals are compared by their set of foods; if every meal was chosen before, the best one is
+        returned. The best distinct meals are kept in `search_elites` for warm starts."""
+        order = np.argsort(-np.asarray(fitness_scores), kind='stable').tolist()
+        best_index = None
+        elites = []
+        seen = set()
+        for index in order:
+            foods = frozenset(food_id for food_id, _ in population[index])
+            if foods in seen:
+                continue
+            seen.add(foods)
+            if best_index is None and foods not in self.search_excluded:
+                best_index = index
+            if len(elites) < self.elite_size:
+                elites.append(population[index])
+            if best_index is not None and len(elites) == self.elite_size:
+                break
+
+        self.search_elites = elites
+        return order[0] if best_index is None else best_index
+
+    def _evolve_island(self, task):
+        """Evolve the population of one island for a number of generations.
+
+        Returns the bred population, the best meals of its last scored generation (the migrants),
+        the best fitness of every generation and the scoring time and meals scored on the island."""
+        self.rng = random.Random(task['seed'])
+        self.search_excluded = task['excluded']
+        scoring_start = self.search_timings['scoring']
+        evaluations_start = self.search_evaluations
+        foods_for_meal = task['foods_for_meal']
+        foods_dict = self.food_cache.index_for(foods_for_meal)
+        fitness_cache = FitnessCache(self.fitness_cache_size) if self.fitness_cache_size > 0 else None
+
+        population = task['population']
+        best_fitness_history = []
+        for _ in range(task['generations']):
+            population, fitness_scores = self._score_generation(
+                population, foods_dict, *task['targets'], fitness_cache
+            )
+            best_fitness_history.append(max(fitness_scores))
+
+            migrant_indices = np.argsort(fitness_scores, kind='stable')[len(fitness_scores) - self.migration_size:]
+            migrants = [population[i] for i in migrant_indices]
+
+            population = self._next_generation(population, fitness_scores, foods_for_meal)
+
+        return {
+            'population': population,
+            'migrants': migrants,
+            'best_fitness_history': best_fitness_history,
+            'scoring_time': self.search_timings['scoring'] - scoring_start,
+            'evaluations': self.search_evaluations - evaluations_start,
+        }
+
+    def _score_generation(self, population, foods_dict, target_calories, target_protein, target_carbs, target_fat,
+                          fitness_cache=None):
+        """Score a generation, first computing its portions in hybrid mode. Returns (population, scores)."""
+        with self._timed('scoring'):
+            if self.portion_optimizer:
+                population = self._optimize_portions(
+                    population, foods_dict, target_calories, target_protein, target_carbs, target_fat
+                )
+
+            fitness_scores = self._score_population(
+                population, foods_dict, target_calories, target_protein, target_carbs, target_fat, fitness_cache
+            )
+
+            # diversity guard: meals chosen earlier in the week cannot win again, so they do not breed
+            if self.search_excluded:
+                fitness_scores = [
+                    0.0 if frozenset(food_id for food_id, _ in meal) in self.search_excluded else score
+                    for meal, score in zip(population, fitness_scores)
+                ]
+        self.search_evaluations += len(population)
+        return population, fitness_scores
+
+    def _next_generation(self, population, fitness_scores, foods_for_meal):
+        """Breed the next generation: the elites, then children of selected parents."""
+        # select parents for the next generation
+        parents = self._select_parents(population, fitness_scores)
+        
+        # create the next generation
+        next_generation = []
+        
+        # elitism (a stable sort keeps ties in population order, so runs are reproducible)
+        elite_indices = np.argsort(fitness_scores, kind='stable')[-self.elite_size:]
+        next_generation.extend([population[i] for i in elite_indices])
+        
+        # generate the rest of the next generation
+        while len(next_generation) < self.population_size:
+            parent1 = self.rng.choice(parents)
+            parent2 = self.rng.choice(parents)
+            
+            child = self._crossover(parent1, parent2)
+            
+            child = self._mutate(child, foods_for_meal)
+            
+            if child:  
+                next_generation.append(child)
+        
+        return next_generation
+
+    def _evolve_population_arrays(self, meal_type, foods_for_meal, target_calories, target_protein, target_carbs,
+                                  target_fat):
+        """_evolve_population on padded (rows, amounts) arrays, with the operators of genetic_operators.
+
+        A generation is scored, selected, crossed and mutated by a handful of NumPy calls on the whole
+        population. Stopping rules, warm-start seeds and the diversity guard are the same."""
+        targets = (target_calories, target_protein, target_carbs, target_fat)
+        foods_dict = self.food_cache.index_for(foods_for_meal)
+        ids = self.food_cache.ids
+
+        with self._timed('initialization'):
+            rows, amounts, lengths = initialize_meals(
+                self.np_rng, self.food_cache, meal_type, self.population_size, target_calories
+            )
+
+            # warm start: the seed meals replace the last random meals
+            seeds = self.search_seed_meals[:self.population_size]
+            if seeds:
+                seed_rows, seed_amounts, seed_lengths = self._population_to_arrays(seeds, foods_dict)
+                width = min(seed_rows.shape[1], MAX_MEAL_FOODS)
+                rows[-len(seeds):] = -1
+                rows[-len(seeds):, :width] = seed_rows[:, :width]
+                amounts[-len(seeds):] = 0.0
+                amounts[-len(seeds):, :width] = seed_amounts[:, :width]
+                lengths[-len(seeds):] = (rows[-len(seeds):] >= 0).sum(axis=1)
+            self.search_stats['seeded'] = len(self.search_seed_meals)
+
+        def to_meals(rows, amounts):
+            return [
+                [(int(ids[row]), amount) for row, amount in zip(meal_rows, meal_amounts) if row >= 0]
+                for meal_rows, meal_amounts in zip(rows.tolist(), amounts.tolist())
+            ]
+
+        def score(rows, amounts, lengths):
+            with self._timed('scoring'):
+                if self.portion_optimizer:
+                    amounts = self._optimize_portion_arrays(rows, amounts, *targets)
+                fitness_scores = self._fitness_scores_batch(rows, amounts, lengths, *targets)
+
+                # diversity guard: meals chosen earlier in the week cannot win again, so they do not breed
+                if self.search_excluded:
+                    excluded = [
+                        frozenset(int(ids[row]) for row in meal_rows if row >= 0) in self.search_excluded
+                        for meal_rows in rows.tolist()
+                    ]
+                    fitness_scores[np.array(excluded)] = 0.0
+            self.search_evaluations += len(rows)
+            return amounts, fitness_scores
+
+        best_fitness_history = []
+        stop_reason = None
+        for generation in range(self.generations):
+            amounts, fitness_scores = score(rows, amounts, lengths)
+            best_fitness_history.append(float(fitness_scores.max()))
+
+            if generation % 5 == 0 or generation == self.generations - 1:
+                logger.debug("Gen %d/%d: Best fitness = %.4f, Avg fitness = %.4f",
+                             generation + 1, self.generations, best_fitness_history[-1], fitness_scores.mean())
+
+            stop_reason = self._stop_reason(best_fitness_history)
+            if stop_reason:
+                logger.debug("Stopped after %d generations: %s", generation + 1, stop_reason)
+                break
+
+            rows, amounts, lengths = self._next_generation_arrays(
+                rows, amounts, lengths, fitness_scores, foods_for_meal
+            )
+
+        if stop_reason is None:
+            stop_reason = 'generations'
+            amounts, fitness_scores = score(rows, amounts, lengths)
+
+        self.search_stats.update({
+            'stop_reason': stop_reason,
+            'generations': len(best_fitness_history),
+            'initial_fitness': best_fitness_history[0],
+        })
+
+        population = to_meals(rows, amounts)
+        best_index = self._pick_best_meal(population, fitness_scores.tolist())
+        logger.debug("Best meal fitness: %.4f, items: %d", fitness_scores[best_index], len(population[best_index]))
+        return population[best_index]
+
+    def _next_generation_arrays(self, rows, amounts, lengths, fitness_scores, foods_for_meal):
+        """_next_generation on arrays: the elites, then mutated children of tournament-selected parents.
+
+        As in _select_parents, the parents are the elites plus tournament winners; tournaments draw
+        their meals with replacement."""
+        elite_indices = np.argsort(fitness_scores, kind='stable')[-self.elite_size:]
+        children = self.population_size - len(elite_indices)
+
+        parents = np.concatenate([
+            elite_indices, tournament_select(self.np_rng, fitness_scores, self.population_size - len(elite_indices))
+        ])
+        first = parents[self.np_rng.integers(len(parents), size=children)]
+        second = parents[self.np_rng.integers(len(parents), size=children)]
+
+        child_rows, child_amounts, child_lengths = uniform_crossover(
+            self.np_rng, rows[first], amounts[first], rows[second], amounts[second]
+        )
+        child_rows, child_amounts, child_lengths = mutate_meals(
+            self.np_rng, child_rows, child_amounts, child_lengths, foods_for_meal, self.mutation_rate
+        )
+
+        return (
+            np.concatenate([rows[elite_indices], child_rows]),
+            np.concatenate([amounts[elite_indices], child_amounts]),
+            np.concatenate([lengths[elite_indices], child_lengths]),
+        )
+
+    def _optimize_portion_arrays(self, rows, amounts, target_calories, target_protein, target_carbs, target_fat):
+        """_optimize_portions on padded arrays: the grams of every meal that best hit the meal targets."""
+        valid = rows >= 0
+        nutrients = self.food_cache.nutrients[np.where(valid, rows, 0)]
+        optimized = optimize_portions(
+            nutrients, valid, amounts, (target_calories, target_protein, target_carbs, target_fat),
+            lower=self.min_portion, upper=self.max_portion, iterations=self.portion_iterations
+        )
+        return np.where(valid, optimized, amounts)
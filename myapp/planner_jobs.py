@@ -0,0 +1,163 @@
+import logging
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import MealPlanJob
+from .genetic_meal_planner import GeneticMealPlanner
+from .planner_presets import DEFAULT_PRESET
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = [MealPlanJob.QUEUED, MealPlanJob.RUNNING]
+
+
+def enqueue_meal_plan_job(user, target_calories, target_protein, target_carbs, target_fat, preset=DEFAULT_PRESET):
+    """Queue a meal plan generation for the user, with a planner preset, and return the job.
+
+    A user has at most one active job: while a job is queued or running, repeated requests
+    (e.g. several clicks on "Generate") return that job instead of queuing new ones. The
+    one_active_meal_plan_job constraint enforces it when two requests race past the check."""
+    while True:
+        job = MealPlanJob.objects.filter(user=user, status__in=ACTIVE_STATUSES).order_by('created_at').first()
+        if job is not None:
+            return job
+
+        try:
+            with transaction.atomic():
+                return MealPlanJob.objects.create(
+                    user=user,
+                    target_calories=target_calories,
+                    target_protein=target_protein,
+                    target_carbs=target_carbs,
+                    target_fat=target_fat,
+                    preset=preset
+                )
+        except IntegrityError:
+            # another request queued a job for the user first, return that one
+            continue
+
+
+def claim_next_job():
+    """Mark the oldest queued job as running and return it, or return None if the queue is empty.
+
+    The claim is a conditional UPDATE (status must still be 'queued'), so when several worker
+    processes race for the same job exactly one of them gets it, without any external broker."""
+    while True:
+        job_id = MealPlanJob.objects.filter(status=MealPlanJob.QUEUED).order_by('created_at', 'id').values_list(
+            'id', flat=True
+        ).first()
+        if job_id is None:
+            return None
+
+        claimed = MealPlanJob.objects.filter(id=job_id, status=MealPlanJob.QUEUED).update(
+            status=MealPlanJob.RUNNING, started_at=timezone.now()
+        )
+        if claimed:
+            return MealPlanJob.objects.get(id=job_id)
+        # another worker claimed this job first, try the next one
+
+
+def claim_job(job_id):
+    """Mark a queued job as running and return it, or return None if it is not queued any more."""
+    claimed = MealPlanJob.objects.filter(id=job_id, status=MealPlanJob.QUEUED).update(
+        status=MealPlanJob.RUNNING, started_at=timezone.now()
+    )
+    return MealPlanJob.objects.select_related('user').get(id=job_id) if claimed else None
+
+
+def release_job(job_id):
+    """Put a claimed job back in the queue, when it could not be started."""
+    return MealPlanJob.objects.filter(id=job_id, status=MealPlanJob.RUNNING).update(
+        status=MealPlanJob.QUEUED, started_at=None
+    )
+
+
+def requeue_stale_jobs(timeout_seconds, running_ids=()):
+    """Put back in the queue the jobs left running for longer than the timeout (e.g. by a killed worker).
+
+    `running_ids` are jobs the caller is still running, which are never requeued."""
+    started_before = timezone.now() - timedelta(seconds=timeout_seconds)
+    return MealPlanJob.objects.filter(
+        status=MealPlanJob.RUNNING, started_at__lt=started_before
+    ).exclude(id__in=running_ids).update(status=MealPlanJob.QUEUED, started_at=None)
+
+
+def run_job(job_id):
+    """Generate and save the meal plan of a claimed job, recording the outcome on the job."""
+    job = MealPlanJob.objects.select_related('user').get(id=job_id)
+    start_time = time.time()
+
+    try:
+        meal_plan = planner_for_job(job).create_meal_plan()
+    except Exception as e:
+        fail_job(job.id, e)
+        return MealPlanJob.FAILED
+
+    complete_job(job.id, meal_plan, time.time() - start_time)
+    return MealPlanJob.DONE
+
+
+def planner_for_job(job, catalog=None):
+    """Return a planner for the targets and preset of a job, configured from the MEAL_PLANNER_* settings."""
+    planner = GeneticMealPlanner(
+        user=job.user,
+        target_calories=job.target_calories,
+        target_protein=job.target_protein,
+        target_carbs=job.target_carbs,
+        target_fat=job.target_fat,
+        workers=settings.MEAL_PLANNER_WORKERS,
+        catalog=catalog,
+        vectorized_operators=settings.MEAL_PLANNER_VECTORIZED_OPERATORS,
+        preset=job.preset
+    )
+    planner.islands = settings.MEAL_PLANNER_ISLANDS
+    planner.warm_start = settings.MEAL_PLANNER_WARM_START
+    planner.week_mode = settings.MEAL_PLANNER_WEEK_MODE
+    for name, value in search_limits().items():
+        setattr(planner, name, value)
+    return planner
+
+
+def search_limits():
+    """Early stopping and time budgets of the planner engine, from the MEAL_PLANNER_* settings (None disables one)."""
+    return {
+        'patience': settings.MEAL_PLANNER_PATIENCE,
+        'target_fitness': settings.MEAL_PLANNER_TARGET_FITNESS,
+        'meal_time_budget_ms': settings.MEAL_PLANNER_MEAL_TIME_BUDGET_MS,
+        'plan_time_budget_ms': settings.MEAL_PLANNER_PLAN_TIME_BUDGET_MS,
+    }
+
+
+def complete_job(job_id, meal_plan, seconds):
+    """Record that a job is done with its saved meal plan."""
+    MealPlanJob.objects.filter(id=job_id).update(
+        status=MealPlanJob.DONE, meal_plan=meal_plan, finished_at=timezone.now()
+    )
+    logger.info("Meal plan job %s done in %.2f seconds (plan %s)", job_id, seconds, meal_plan.id)
+
+
+def fail_job(job_id, error):
+    """Record that a job failed with the given error."""
+    logger.error("Meal plan job %s failed: %s", job_id, error)
+    MealPlanJob.objects.filter(id=job_id).update(
+        status=MealPlanJob.FAILED, error=str(error), finished_at=timezone.now()
+    )
+
+
+def job_status(job):
+    """Return the JSON-serializable status of a job, as polled by the results page."""
+    status = {'id': job.id, 'status': job.status}
+
+    if job.status == MealPlanJob.QUEUED:
+        # number of jobs that will be claimed before this one
+        status['queue_position'] = MealPlanJob.objects.filter(
+            status=MealPlanJob.QUEUED, created_at__lt=job.created_at
+        ).count()
+    elif job.status == MealPlanJob.DONE:
+        status['meal_plan_id'] = job.meal_plan_id
+    elif job.status == MealPlanJob.FAILED:
+        status['error'] = job.error
+
+    return status
@@ -0,0 +1,16 @@
+"""Speed/quality presets of the meal planner, kept apart from the engine so models and views
+can list them without importing NumPy."""
+
+# GA parameters of each preset. Presets only set generation counts, never time budgets, so a
+# seeded plan is the same on any machine (see MealPlanEngine.meal_time_budget_ms for budgets).
+# Meal searches measured with `benchmark_planner --catalogs fixture --preset NAME` on 1 core,
+# plans (28 meals, 3 seeds x 3 calorie levels) with generate_meal_plan:
+#   fast      meal p50 16 ms,  p95 20 ms,  fitness 0.835; plan p50 0.3 s, fitness 0.830
+#   balanced  meal p50 73 ms,  p95 102 ms, fitness 0.892; plan p50 1.5 s, fitness 0.883
+#   thorough  meal p50 152 ms, p95 225 ms, fitness 0.922; plan p50 4.9 s, fitness 0.917
+PLANNER_PRESETS = {
+    'fast': {'population_size': 60, 'generations': 15, 'elite_size': 3, 'mutation_rate': 0.3},
+    'balanced': {'population_size': 130, 'generations': 35, 'elite_size': 5, 'mutation_rate': 0.2},
+    'thorough': {'population_size': 250, 'generations': 60, 'elite_size': 8, 'mutation_rate': 0.2},
+}
+DEFAULT_PRESET = 'balanced'
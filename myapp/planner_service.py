@@ -0,0 +1,57 @@
+import json
+import logging
+import socket
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PlannerServiceError(Exception):
+    """The planner service could not be reached or rejected the request."""
+
+
+def send_request(request, socket_path=None, timeout=5.0):
+    """Send one request to the planner service (see the run_planner_service command) and return its response.
+
+    Requests and responses are single lines of JSON over the service's Unix socket."""
+    socket_path = socket_path or settings.MEAL_PLANNER_SOCKET
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(timeout)
+            connection.connect(socket_path)
+            connection.sendall(json.dumps(request).encode() + b'\n')
+            with connection.makefile('rb') as reader:
+                line = reader.readline()
+    except OSError as e:
+        raise PlannerServiceError(f"Planner service at {socket_path} unavailable: {e}") from e
+
+    if not line:
+        raise PlannerServiceError(f"Planner service at {socket_path} closed the connection")
+    response = json.loads(line)
+    if 'error' in response:
+        raise PlannerServiceError(response['error'])
+    return response
+
+
+def submit_job(job, socket_path=None):
+    """Ask the planner service to generate the plan of a queued job.
+
+    Returns True if the service accepted the job. Otherwise (no service configured, service down
+    or busy) the job stays queued for run_planner_worker."""
+    if not (socket_path or settings.MEAL_PLANNER_SOCKET):
+        return False
+
+    try:
+        response = send_request({'command': 'job', 'job_id': job.id}, socket_path)
+    except PlannerServiceError as e:
+        logger.warning("Meal plan job %s left in the queue: %s", job.id, e)
+        return False
+
+    if not response['accepted']:
+        logger.info("Meal plan job %s not accepted by the planner service: %s", job.id, response['reason'])
+    return response['accepted']
+
+
+def service_stats(socket_path=None):
+    """Return the queue depth, latency and throughput statistics of the running planner service."""
+    return send_request({'command': 'stats'}, socket_path)
@@ -0,0 +1,43 @@
+import numpy as np
+
+# relative weight of each nutrient error (calories, protein, carbs, fat), as in the fitness score
+NUTRIENT_WEIGHTS = np.array([2.0, 1.0, 1.0, 1.0])
+
+
+def optimize_portions(nutrients, valid, amounts, targets, lower=10.0, upper=200.0, iterations=60,
+                      weights=NUTRIENT_WEIGHTS):
+    """Compute the grams of every food of a batch of meals that best hit the nutritional targets.
+
+    Solves, for each meal independently, the bounded least-squares problem
+
+        min_x  sum_j (weights_j * ((N x / 100)_j - targets_j) / targets_j) ** 2,   lower <= x <= upper
+
+    where N holds the (calories, protein, carbs, fat) per 100g of the meal's foods, with an
+    accelerated projected gradient (FISTA) run on the whole batch at once.
+
+    `nutrients` is (meals, slots, 4), `valid` (meals, slots) marks the real foods of padded meals,
+    `amounts` (meals, slots) are the current grams, used as the starting point, and `targets` holds
+    the 4 meal targets. Returns the optimized (meals, slots) grams, 0 in the padding slots."""
+    targets = np.maximum(np.asarray(targets, dtype=float), 1.0)
+    scale = weights / targets
+
+    # weighted system A x ~ b of every meal: A is (meals, 4, slots), b = weights
+    A = np.where(valid[:, None, :], np.swapaxes(nutrients, 1, 2) / 100 * scale[None, :, None], 0.0)
+    AtA = np.einsum('pji,pjk->pik', A, A)
+    Atb = np.einsum('pji,j->pi', A, weights)
+
+    # step size from the Lipschitz constant of the gradient (Frobenius norm >= largest eigenvalue)
+    lipschitz = np.linalg.norm(AtA, axis=(1, 2))
+    step = np.where(lipschitz > 0, 1.0 / np.maximum(lipschitz, 1e-12), 0.0)[:, None]
+
+    x = np.clip(amounts, lower, upper)
+    y = x
+    momentum = 1.0
+    for _ in range(iterations):
+        gradient = np.einsum('pik,pk->pi', AtA, y) - Atb
+        x_next = np.clip(y - step * gradient, lower, upper)
+        momentum_next = (1 + np.sqrt(1 + 4 * momentum * momentum)) / 2
+        y = x_next + ((momentum - 1) / momentum_next) * (x_next - x)
+        x, momentum = x_next, momentum_next
+
+    return np.where(valid, x, 0.0)
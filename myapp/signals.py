@@ -0,0 +1,11 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Food
+from .catalog_cache import bump_catalog_version
+
+
+@receiver([post_save, post_delete], sender=Food)
+def invalidate_food_catalog(sender, **kwargs):
+    """Move to a new catalog version once the food change is committed."""
+    transaction.on_commit(bump_catalog_version)
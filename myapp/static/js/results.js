@@ -34,8 +34,7 @@ function simulateProgress() {
         {progress: 55, text: "🍽️ Evolution cycle 15-21: Dinner planning..."},
         {progress: 70, text: "🥜 Evolution cycle 22-28: Snack selection..."},
         {progress: 85, text: "🎯 Final optimization cycles 29-35..."},
-        {progress: 95, text: "💾 Saving your personalized 7-day plan..."},
-        {progress: 100, text: "✅ Complete! Best meals found. Redirecting..."}
+        {progress: 95, text: "💾 Saving your personalized 7-day plan..."}
     ];
     
     let currentStep = 0;
@@ -52,6 +51,34 @@ function simulateProgress() {
     }, 4000);
 }
 
+// Poll the meal plan job until the plan is generated, then open it
+function pollJobStatus(statusUrl) {
+    const progressBar = document.getElementById('progressBar');
+    const loadingText = document.getElementById('loadingText');
+
+    fetch(statusUrl, {headers: {'Accept': 'application/json'}})
+        .then(response => response.json())
+        .then(job => {
+            if (job.status === 'done') {
+                progressBar.style.width = '100%';
+                loadingText.textContent = "✅ Complete! Best meals found. Redirecting...";
+                window.location.href = job.redirect_url;
+            } else if (job.status === 'failed') {
+                hideLoadingModal();
+                alert('There was an error when generating meal plan: ' + job.error);
+            } else {
+                if (job.status === 'queued' && job.queue_position > 0) {
+                    loadingText.textContent = `⏳ Waiting for the planner (${job.queue_position} plans ahead)...`;
+                }
+                setTimeout(() => pollJobStatus(statusUrl), 1500);
+            }
+        })
+        .catch(error => {
+            console.error('Job status error:', error);
+            setTimeout(() => pollJobStatus(statusUrl), 3000);
+        });
+}
+
 // Initialize when page loads
 document.addEventListener('DOMContentLoaded', function() {
     console.log('Results JS loaded successfully');
@@ -60,6 +87,12 @@ document.addEventListener('DOMContentLoaded', function() {
     const modal = document.getElementById('loadingModal');
     if (modal) {
         console.log('Loading modal found in DOM');
+
+        // a plan is being generated in the background
+        if (modal.dataset.statusUrl) {
+            showLoadingModal();
+            pollJobStatus(modal.dataset.statusUrl);
+        }
     } else {
         console.error('Loading modal NOT found in DOM');
     }
@@ -0,0 +1,61 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from myapp.benchmarking import synthetic_catalog
+from myapp.catalog_cache import get_food_catalog
+
+
+class BenchmarkPlannerCommandTest(TestCase):
+    """Test the planner benchmark and its compare mode"""
+
+    fixtures = ['foods.json']
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.output = os.path.join(self.directory.name, 'results.json')
+
+    def _benchmark(self, *args):
+        stdout = io.StringIO()
+        call_command(
+            'benchmark_planner', '--catalogs', 'fixture', '--meal-types', 'snack', '--seeds', '1',
+            '--calories', '2000', *args, stdout=stdout
+        )
+        return stdout.getvalue()
+
+    def test_synthetic_catalog_keeps_meal_types(self):
+        catalog = get_food_catalog()
+        scaled = synthetic_catalog(catalog, 3 * len(catalog))
+
+        self.assertEqual(len(scaled), 3 * len(catalog))
+        for meal_type, rows in catalog.meal_rows.items():
+            self.assertEqual(len(scaled.meal_rows[meal_type]), 3 * len(rows))
+
+    def test_results_are_written_as_json(self):
+        self._benchmark('--output', self.output)
+
+        with open(self.output) as output:
+            metrics = json.load(output)['catalogs']['fixture']
+        self.assertEqual(metrics['searches'], 1)
+        self.assertGreater(metrics['evaluations_per_sec'], 0)
+        self.assertGreater(metrics['average_fitness'], 0)
+
+    def test_compare_fails_on_regression(self):
+        self._benchmark('--output', self.output)
+        self.assertIn('No regression', self._benchmark('--compare', self.output, '--threshold', '10'))
+
+        # a baseline ten times faster than this run
+        with open(self.output) as output:
+            baseline = json.load(output)
+        baseline['catalogs']['fixture']['latency_p50_ms'] /= 10
+        with open(self.output, 'w') as output:
+            json.dump(baseline, output)
+
+        with self.assertRaisesMessage(CommandError, 'fixture latency_p50_ms'):
+            self._benchmark('--compare', self.output, '--threshold', '0.5')
@@ -0,0 +1,98 @@
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from myapp import catalog_cache
+from myapp.food_catalog import FoodCatalog
+from myapp.models import Food
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'food_catalog': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'catalog-tests'},
+}
+
+
+def _worker_catalog_version(_):
+    return catalog_cache.get_worker_catalog().version
+
+
+def _worker_ignores_interrupts(_):
+    return signal.getsignal(signal.SIGINT) == signal.SIG_IGN
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CatalogCacheTest(TestCase):
+    """Test the process-wide food catalog cache and its version-based invalidation"""
+
+    def setUp(self):
+        catalog_cache.clear_food_catalog()
+
+    def tearDown(self):
+        catalog_cache.clear_food_catalog()
+
+    def _slow_loader(self, version=None):
+        time.sleep(0.05)
+        return FoodCatalog([], {}, version=version)
+
+    def test_catalog_loaded_once_and_shared(self):
+        """Repeated requests reuse the same catalog object"""
+        with mock.patch.object(catalog_cache, 'load_food_catalog', wraps=catalog_cache.load_food_catalog) as loader:
+            first = catalog_cache.get_food_catalog()
+            second = catalog_cache.get_food_catalog()
+
+        self.assertIs(first, second)
+        self.assertEqual(loader.call_count, 1)
+
+    def test_food_change_invalidates_catalog(self):
+        """Saving or deleting a food bumps the version once committed, and the catalog reloads"""
+        catalog = catalog_cache.get_food_catalog()
+        version = catalog_cache.get_catalog_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            food = Food.objects.create(
+                fdc_id='1', name='Lentils, boiled', calories_per_100g=116, protein_per_100g=9,
+                carbs_per_100g=20, fat_per_100g=0.4, food_category='lentils'
+            )
+        self.assertEqual(catalog_cache.get_catalog_version(), version + 1)
+
+        reloaded = catalog_cache.get_food_catalog()
+        self.assertIsNot(reloaded, catalog)
+        self.assertEqual(reloaded.row_of(food.id), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            food.delete()
+        self.assertIsNone(catalog_cache.get_food_catalog().row_of(food.id))
+
+    def test_cold_start_reloads_only_once(self):
+        """Concurrent requests on a cold cache trigger a single reload"""
+        catalogs = []
+        with mock.patch.object(catalog_cache, 'load_food_catalog', side_effect=self._slow_loader) as loader:
+            threads = [
+                threading.Thread(target=lambda: catalogs.append(catalog_cache.get_food_catalog()))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(loader.call_count, 1)
+        self.assertEqual(len({id(catalog) for catalog in catalogs}), 1)
+
+    def test_pool_processes_receive_the_catalog(self):
+        """Processes of a pool started with init_catalog_worker plan on the catalog of the parent"""
+        catalog = FoodCatalog([], {}, version=7)
+        with ProcessPoolExecutor(max_workers=1, initializer=catalog_cache.init_catalog_worker,
+                                 initargs=(catalog,)) as executor:
+            self.assertEqual(list(executor.map(_worker_catalog_version, range(2))), [7, 7])
+        self.assertIsNone(catalog_cache.get_worker_catalog())
+
+    def test_pool_processes_leave_interrupts_to_the_parent(self):
+        with ProcessPoolExecutor(max_workers=1, initializer=catalog_cache.init_catalog_worker,
+                                 initargs=(FoodCatalog([], {}),)) as executor:
+            self.assertTrue(executor.submit(_worker_ignores_interrupts, None).result())
+        self.assertNotEqual(signal.getsignal(signal.SIGINT), signal.SIG_IGN)
@@ -0,0 +1,44 @@
+import io
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+
+class EvaluatePlannerCommandTest(TestCase):
+    """Test the plan quality evaluation"""
+
+    fixtures = ['foods.json']
+
+    def test_results_follow_documentation_schema_and_compare(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        output = os.path.join(directory.name, 'results.json')
+
+        call_command('evaluate_planner', '--seeds', '1', '--processes', '1', '--output', output, stdout=io.StringIO())
+
+        with open(output) as results_file:
+            results = json.load(results_file)
+        with open(os.path.join(settings.BASE_DIR, 'documentation_results.json')) as documentation_file:
+            documentation = json.load(documentation_file)
+
+        self.assertEqual(results.keys(), documentation.keys())
+        for section in ('accuracy', 'convergence', 'complexity'):
+            self.assertEqual(results[section].keys(), documentation[section].keys())
+            for meal_type, metrics in results[section].items():
+                self.assertEqual(metrics.keys(), documentation[section][meal_type].keys())
+        self.assertEqual(results['performance'].keys(), documentation['performance'].keys())
+
+        # a baseline whose lunches were much better
+        results['accuracy']['lunch']['avg_fitness'] += 0.1
+        with open(output, 'w') as results_file:
+            json.dump(results, results_file)
+
+        with self.assertRaisesMessage(CommandError, 'lunch avg_fitness'):
+            call_command(
+                'evaluate_planner', '--seeds', '1', '--processes', '1', '--compare', output, stdout=io.StringIO()
+            )
@@ -0,0 +1,60 @@
+from django.test import TestCase
+
+from myapp.food_catalog import FoodCatalog
+
+
+class FoodCatalogTest(TestCase):
+    """Test the array-backed food catalog without any database"""
+
+    def setUp(self):
+        self.foods = [
+            {'id': 10, 'name': 'Egg, whole', 'calories_per_100g': 143, 'protein_per_100g': 12.6,
+             'carbs_per_100g': 0.7, 'fat_per_100g': 9.5, 'food_category': 'Egg'},
+            {'id': 20, 'name': 'Rice, white', 'calories_per_100g': 130, 'protein_per_100g': 2.7,
+             'carbs_per_100g': 28.2, 'fat_per_100g': 0.3, 'food_category': 'rice'},
+            {'id': 30, 'name': 'Broccoli', 'calories_per_100g': 34, 'protein_per_100g': 2.8,
+             'carbs_per_100g': 6.6, 'fat_per_100g': 0.4, 'food_category': 'broccoli'},
+            {'id': 40, 'name': 'Water', 'calories_per_100g': 1, 'protein_per_100g': 0,
+             'carbs_per_100g': 0, 'fat_per_100g': 0, 'food_category': None},
+        ]
+        self.catalog = FoodCatalog(
+            self.foods,
+            {'breakfast': ['egg'], 'lunch': ['rice', 'broccoli']},
+            {'lunch': {'carbs': ['rice', 'potato'], 'veggies': ['broccoli', 'spinach'], 'max_items': 5}},
+            [['egg', 'egg whole'], ['rice', 'brown rice'], ['Water', 'Broccoli']],
+            min_meal_foods=2,
+        )
+
+    def test_struct_of_arrays_layout(self):
+        """Nutrients are float32 columns and categories are integer ids"""
+        self.assertEqual(self.catalog.nutrients.shape, (4, 4))
+        self.assertEqual(self.catalog.nutrients.dtype.name, 'float32')
+        self.assertEqual(self.catalog.category_ids.tolist(), [0, 1, 2, -1])
+        self.assertEqual(self.catalog.categories, ['egg', 'rice', 'broccoli'])
+        self.assertEqual(self.catalog.category_name(3), '')
+        self.assertAlmostEqual(self.catalog.calories_of(1), 130.0, places=4)
+
+    def test_id_to_row_lookup(self):
+        """Food ids resolve to their catalog rows"""
+        for row, food in enumerate(self.foods):
+            self.assertEqual(self.catalog.row_of(food['id']), row)
+            self.assertEqual(self.catalog.food_id(row), food['id'])
+        self.assertIsNone(self.catalog.row_of(99))
+
+    def test_meal_rows_point_into_catalog(self):
+        """Meal types keep row indexes, with other categories added when there are too few foods"""
+        self.assertEqual(self.catalog.meal_rows['lunch'].tolist(), [1, 2])
+        # breakfast has a single egg, so the other categories are appended
+        self.assertEqual(self.catalog.meal_rows['breakfast'].tolist(), [0, 1, 2, 3])
+        self.assertEqual(self.catalog.index_for(self.catalog.meal_rows['lunch']), {20: 1, 30: 2})
+
+    def test_slot_rows_precomputed(self):
+        """Functional slots list the meal rows whose category matches a slot keyword"""
+        self.assertEqual(set(self.catalog.slot_rows['lunch']), {'carbs', 'veggies'})
+        self.assertEqual(self.catalog.slot_rows['lunch']['carbs'].tolist(), [1])
+        self.assertEqual(self.catalog.slot_rows['lunch']['veggies'].tolist(), [2])
+
+    def test_conflict_masks_compiled(self):
+        """Every food gets one bit per conflicting group its name matches"""
+        self.assertEqual(self.catalog.conflict_group_count, 3)
+        self.assertEqual(self.catalog.conflict_masks.tolist(), [0b001, 0b010, 0b100, 0b100])
@@ -0,0 +1,53 @@
+import io
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from myapp.models import Meal, MealPlan, QuizResponse
+
+
+class GeneratePlansCommandTest(TestCase):
+    """Test batch plan generation for many users"""
+
+    fixtures = ['foods.json']
+
+    def setUp(self):
+        self.planned = User.objects.create_user(username='planned', password='secret-password')
+        self.waiting = User.objects.create_user(username='waiting', password='secret-password')
+        for user in (self.planned, self.waiting):
+            QuizResponse.objects.create(
+                user=user, age=30, height=180, weight=80, gender='masculin', objective=1, activity_level=2
+            )
+
+    def _generate_plans(self, *args):
+        stdout = io.StringIO()
+        call_command('generate_plans', '--processes', '1', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_resumed_run_skips_users_already_planned(self):
+        """Users who got a plan since the interrupted run started are not planned again"""
+        since = timezone.now() - timedelta(minutes=5)
+        MealPlan.objects.create(
+            user=self.planned, name='Plan', target_calories=2000, target_protein=150, target_carbs=200, target_fat=67
+        )
+
+        output = self._generate_plans('--since', since.isoformat())
+
+        self.assertIn('Generating plans for 1 users', output)
+        self.assertEqual(MealPlan.objects.filter(user=self.planned).count(), 1)
+
+        plan = MealPlan.objects.get(user=self.waiting)
+        self.assertIsNotNone(plan.seed)
+        self.assertEqual(Meal.objects.filter(meal_plan_day__meal_plan=plan).count(), 28)
+
+        quiz_response = QuizResponse.objects.get(user=self.waiting)
+        self.assertAlmostEqual(plan.target_calories, quiz_response.calculate_target_calories())
+
+    def test_user_filter(self):
+        output = self._generate_plans('--users', 'nobody')
+
+        self.assertIn('Generating plans for 0 users', output)
+        self.assertFalse(MealPlan.objects.exists())
@@ -0,0 +1,454 @@
+import random
+from collections import Counter
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from myapp.food_catalog import CONFLICTING_FOOD_GROUPS
+from myapp.genetic_meal_planner import GeneticMealPlanner
+from myapp.models import Food
+from myapp.planner_engine import FitnessCache
+from myapp.meal_plan_writer import save_meal_plan
+
+
+def original_fitness_score(meal, foods, target_calories, target_protein, target_carbs, target_fat):
+    """Copy of the fitness formula the planner started from: float64 food values, name-matched conflicts.
+
+    `foods` maps food ids to the Food values (name, food_category and nutrients per 100g)."""
+    if not meal:
+        return 0.0
+
+    total_calories = total_protein = total_carbs = total_fat = 0
+    food_categories = []
+    food_names = []
+    for food_id, amount in meal:
+        if food_id not in foods:
+            continue
+        food = foods[food_id]
+        total_calories += (amount / 100) * food['calories_per_100g']
+        total_protein += (amount / 100) * food['protein_per_100g']
+        total_carbs += (amount / 100) * food['carbs_per_100g']
+        total_fat += (amount / 100) * food['fat_per_100g']
+        if food['food_category']:
+            food_categories.append(food['food_category'].lower())
+        food_names.append(food['name'].lower())
+
+    calorie_penalty = abs(total_calories - target_calories) / max(target_calories, 1)
+    protein_penalty = abs(total_protein - target_protein) / max(target_protein, 1)
+    carbs_penalty = abs(total_carbs - target_carbs) / max(target_carbs, 1)
+    fat_penalty = abs(total_fat - target_fat) / max(target_fat, 1)
+
+    conflict_penalty = 0.0
+    for conflict_group in CONFLICTING_FOOD_GROUPS:
+        foods_in_group = [name for name in food_names if any(item in name for item in conflict_group)]
+        if len(foods_in_group) > 1:
+            conflict_penalty += 0.5 * (len(foods_in_group) - 1)
+
+    coherence_score = 0.0
+    if target_calories < 400:
+        coherence_score += {2: 0.5, 1: 0.4, 3: 0.2}.get(len(meal), -0.4)
+    else:
+        if 2 <= len(meal) <= 4:
+            coherence_score += 0.3
+        elif len(meal) == 5:
+            coherence_score += 0.1
+        else:
+            coherence_score -= 0.2
+        unique_categories = set(food_categories)
+        if len(unique_categories) >= 3:
+            coherence_score += 0.4
+        elif len(unique_categories) == 2:
+            coherence_score += 0.2
+
+    if len(meal) >= 2:
+        if (total_protein * 4) / max(total_calories, 1) >= 0.15:
+            coherence_score += 0.2
+        if total_carbs < 5:
+            coherence_score -= 0.2
+        if total_fat < 3:
+            coherence_score -= 0.2
+
+    duplicate_penalty = sum((count - 1) * 0.8 for count in Counter(food_categories).values() if count > 1)
+
+    nutritional_score = 1 / (1 + calorie_penalty * 2 + protein_penalty + carbs_penalty + fat_penalty)
+    return max(0.0, nutritional_score * 0.7 + coherence_score * 0.3 - duplicate_penalty - conflict_penalty)
+
+
+class GeneticMealPlannerFitnessTest(TestCase):
+    """Test the genetic meal planner fitness evaluation on the fixture food catalog"""
+
+    fixtures = ['foods.json']
+
+    def setUp(self):
+        self.planner = GeneticMealPlanner(
+            user=None, target_calories=2000, target_protein=150, target_carbs=200, target_fat=67, seed=42
+        )
+
+    def _sample_population(self, meal_type, target_calories):
+        """Initial population plus mutated and edge-case meals"""
+        foods = self.planner.food_cache.meal_rows[meal_type]
+        food_ids = self.planner.food_cache.ids[foods].tolist()
+        population = self.planner._initialize_population(foods, target_calories, meal_type)
+        population += [self.planner._mutate(meal, foods) for meal in population[:60]]
+        population += [
+            [],
+            [(food_ids[0], 80.0)],
+            [(food_ids[0], 80.0), (-1, 50.0)],
+            [(food_id, 40.0) for food_id in food_ids[:6]],
+        ]
+        return population, foods
+
+    def test_batch_fitness_matches_scalar(self):
+        """Vectorized scores match the per-meal scores, both reading the same float32 nutrients"""
+        for meal_type, pct in self.planner.meal_distribution.items():
+            targets = [value * pct for value in (2000, 150, 200, 67)]
+            population, foods = self._sample_population(meal_type, targets[0])
+
+            foods_dict = self.planner.food_cache.index_for(foods)
+            rows, amounts, lengths = self.planner._population_to_arrays(population, foods_dict)
+            batch_scores = self.planner._fitness_scores_batch(rows, amounts, lengths, *targets)
+
+            for meal, batch_score in zip(population, batch_scores):
+                scalar_score = self.planner._fitness_score(meal, foods_dict, *targets)
+                self.assertAlmostEqual(batch_score, scalar_score, places=9, msg=f"{meal_type}: {meal}")
+
+    def test_scores_match_the_original_formula(self):
+        """Both paths stay within the float32 rounding of the nutrients of the original float64 scores"""
+        foods = {
+            food['id']: food for food in Food.objects.values(
+                'id', 'name', 'food_category', 'calories_per_100g', 'protein_per_100g', 'carbs_per_100g',
+                'fat_per_100g'
+            )
+        }
+        for meal_type, pct in self.planner.meal_distribution.items():
+            targets = [value * pct for value in (2000, 150, 200, 67)]
+            population, meal_foods = self._sample_population(meal_type, targets[0])
+
+            foods_dict = self.planner.food_cache.index_for(meal_foods)
+            rows, amounts, lengths = self.planner._population_to_arrays(population, foods_dict)
+            batch_scores = self.planner._fitness_scores_batch(rows, amounts, lengths, *targets)
+
+            for meal, batch_score in zip(population, batch_scores):
+                # only the foods of the meal pool are scored
+                expected = original_fitness_score(
+                    meal, {food_id: foods[food_id] for food_id in foods_dict}, *targets
+                )
+                scalar_score = self.planner._fitness_score(meal, foods_dict, *targets)
+                self.assertAlmostEqual(batch_score, expected, delta=1e-6, msg=f"{meal_type}: {meal}")
+                self.assertAlmostEqual(scalar_score, expected, delta=1e-6, msg=f"{meal_type}: {meal}")
+
+    def test_empty_meal_scores_zero(self):
+        """An empty meal has no fitness in either mode"""
+        foods_dict = self.planner.food_cache.index_for(self.planner.food_cache.meal_rows['lunch'])
+        rows, amounts, lengths = self.planner._population_to_arrays([[]], foods_dict)
+
+        scores = self.planner._fitness_scores_batch(rows, amounts, lengths, 700, 52, 70, 23)
+        self.assertEqual(scores.tolist(), [0.0])
+
+
+class GeneticMealPlannerMutationTest(TestCase):
+    """Test the sampling of the foods added by mutations"""
+
+    fixtures = ['foods.json']
+
+    def setUp(self):
+        self.planner = GeneticMealPlanner(
+            user=None, target_calories=2000, target_protein=150, target_carbs=200, target_fat=67, seed=3
+        )
+        self.catalog = self.planner.food_cache
+
+    def test_sampled_food_is_never_in_the_meal(self):
+        foods = self.catalog.meal_rows['snack']
+        meal = [(food_id, 50.0) for food_id in self.catalog.ids[foods[:8]].tolist()]
+
+        for _ in range(200):
+            row = self.planner._sample_new_food(foods, meal)
+            self.assertNotIn(self.catalog.food_id(row), {food_id for food_id, _ in meal})
+
+    def test_pool_covered_by_the_meal(self):
+        """Small pools fall back to filtering: the only free food is found, a full meal has none"""
+        foods = self.catalog.meal_rows['snack'][:5]
+        meal = [(food_id, 50.0) for food_id in self.catalog.ids[foods[:4]].tolist()]
+
+        self.assertEqual(self.planner._sample_new_food(foods, meal), foods[4])
+        meal.append((self.catalog.food_id(foods[4]), 50.0))
+        self.assertIsNone(self.planner._sample_new_food(foods, meal))
+
+
+class FitnessCacheTest(SimpleTestCase):
+    """Test the genome-keyed fitness cache"""
+
+    def test_key_ignores_order_and_quantizes_amounts(self):
+        cache = FitnessCache(quantum=0.01)
+        self.assertEqual(cache.key([(3, 50.0), (1, 120.0)]), cache.key([(1, 120.001), (3, 50.0)]))
+        self.assertNotEqual(cache.key([(1, 120.0)]), cache.key([(1, 121.0)]))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = FitnessCache(max_size=2)
+        cache.put('a', 0.1)
+        cache.put('b', 0.2)
+        cache.get('a')
+        cache.put('c', 0.3)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 0.1)
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.stats()['hits'], 2)
+
+
+class GeneticMealPlannerFitnessCacheTest(TestCase):
+    """Test population scoring through the fitness cache"""
+
+    fixtures = ['foods.json']
+
+    def test_cached_scores_match_uncached_scores(self):
+        """Clones are evaluated once and score exactly like an uncached evaluation"""
+        planner = GeneticMealPlanner(
+            user=None, target_calories=2000, target_protein=150, target_carbs=200, target_fat=67, seed=3
+        )
+        foods = planner.food_cache.meal_rows['lunch']
+        foods_dict = planner.food_cache.index_for(foods)
+        targets = (700, 52, 70, 23)
+
+        population = planner._initialize_population(foods, targets[0], 'lunch')
+        # elites copied forward and reordered clones
+        population += population[:5] + [list(reversed(meal)) for meal in population[5:10]]
+
+        cache = FitnessCache()
+        expected = planner._score_population(population, foods_dict, *targets)
+        for _ in range(2):
+            scores = planner._score_population(population, foods_dict, *targets, cache)
+            for score, expected_score in zip(scores, expected):
+                # a reordered clone reuses the score of its first ordering (same sum, other rounding)
+                self.assertAlmostEqual(score, expected_score, places=9)
+
+        unique = len({cache.key(meal) for meal in population})
+        self.assertEqual(cache.misses, unique)
+        self.assertEqual(cache.hits, 2 * len(population) - unique)
+
+    def test_cache_smaller_than_the_population(self):
+        """Genomes evicted while their own batch is scored still get their score"""
+        planner = GeneticMealPlanner(
+            user=None, target_calories=2000, target_protein=150, target_carbs=200, target_fat=67, seed=3
+        )
+        foods = planner.food_cache.meal_rows['lunch']
+        foods_dict = planner.food_cache.index_for(foods)
+        targets = (700, 52, 70, 23)
+        population = planner._initialize_population(foods, targets[0], 'lunch')
+        population += population[:5]
+
+        cache = FitnessCache(max_size=16)
+        scores = planner._score_population(population, foods_dict, *targets, cache)
+
+        self.assertEqual(scores, planner._score_population(population, foods_dict, *targets))
+        self.assertGreater(cache.evictions, 0)
+
+        planner.fitness_cache_size = 16
+        planner.generations = 3
+        self.assertTrue(planner._run_meal_search(planner._meal_search_tasks()[1])['foods'])
+
+
+class GeneticMealPlannerSearchTest(TestCase):
+    """Test the meal searches of a whole plan"""
+
+    fixtures = ['foods.json']
+
+    def _planner(self, **kwargs):
+        planner = GeneticMealPlanner(
+            user=None, target_calories=2200, target_protein=140, target_carbs=250, target_fat=70, **kwargs
+        )
+        # a small search keeps the test fast
+        planner.population_size = 20
+        planner.generations = 4
+        return planner
+
+    def _meals(self, results):
+        """The generated meals of search results, without their run-dependent timings"""
+        return [(result['day'], result['meal_type'], result['fitness'], result['foods']) for result in results]
+
+    def test_same_seed_same_plan_for_any_worker_count(self):
+        """Per-search seeds make the plan independent of the worker count"""
+        serial = self._planner(seed=7, workers=1)
+        parallel = self._planner(seed=7, workers=2)
+
+        serial_results = serial._run_meal_searches(serial._meal_search_tasks())
+        parallel_results = parallel._run_meal_searches(parallel._meal_search_tasks())
+
+        self.assertEqual(len(serial_results), 28)
+        self.assertEqual(self._meals(serial_results), self._meals(parallel_results))
+
+    def test_islands_same_plan_with_or_without_island_processes(self):
+        """Island seeds come from the search seed, so running islands in processes changes nothing"""
+        plans = []
+        for workers in (1, 2):
+            # with one worker the islands run in their own processes, with two they run in the search worker
+            planner = self._planner(seed=3, workers=workers)
+            planner.islands = 3
+            planner.migration_interval = 2
+            plans.append(planner._run_meal_searches(planner._meal_search_tasks()[:4]))
+
+        self.assertEqual(self._meals(plans[0]), self._meals(plans[1]))
+        self.assertEqual(plans[0][0]['stats']['islands'], 3)
+        self.assertEqual(plans[0][0]['stats']['generations'], 4)
+
+    def test_injected_rng_gives_reproducible_plans(self):
+        """A numpy Generator or random.Random only draws the plan seed, so equal RNGs give equal plans"""
+        for make_rng in (lambda: np.random.default_rng(11), lambda: random.Random(11)):
+            first = self._planner(rng=make_rng())
+            second = self._planner(rng=make_rng())
+
+            self.assertEqual(first.seed, second.seed)
+            self.assertEqual(
+                self._meals(first.generate_meal_plan()['meals']), self._meals(second.generate_meal_plan()['meals'])
+            )
+
+    def test_rng_must_be_supported_type(self):
+        with self.assertRaises(TypeError):
+            self._planner(rng=object())
+        with self.assertRaises(ValueError):
+            self._planner(seed=1, rng=random.Random(1))
+
+    def _search_lunch(self, planner):
+        task = next(task for task in planner._meal_search_tasks() if task['meal_type'] == 'lunch')
+        return planner._run_meal_search(task)
+
+    def test_runs_all_generations_by_default(self):
+        planner = self._planner(seed=5)
+        result = self._search_lunch(planner)
+
+        self.assertEqual(result['stats']['stop_reason'], 'generations')
+        self.assertEqual(result['stats']['generations'], planner.generations)
+
+    def test_stops_on_plateau(self):
+        """No generation can improve by a whole fitness point, so the patience runs out"""
+        planner = self._planner(seed=5)
+        planner.patience = 2
+        planner.min_improvement = 1.0
+        result = self._search_lunch(planner)
+
+        self.assertEqual(result['stats']['stop_reason'], 'plateau')
+        self.assertEqual(result['stats']['generations'], 3)
+
+    def test_stops_at_target_fitness(self):
+        planner = self._planner(seed=5)
+        planner.target_fitness = 0.0
+        result = self._search_lunch(planner)
+
+        self.assertEqual(result['stats']['stop_reason'], 'target_fitness')
+        self.assertEqual(result['stats']['generations'], 1)
+
+    def test_expired_deadline_returns_best_so_far(self):
+        """Past the deadline, the best meal of the scored initial population is returned"""
+        planner = self._planner(seed=5)
+        planner.meal_time_budget_ms = 0
+        result = self._search_lunch(planner)
+
+        self.assertEqual(result['stats']['stop_reason'], 'deadline')
+        self.assertEqual(result['stats']['generations'], 1)
+        self.assertTrue(result['foods'])
+        self.assertGreater(result['fitness'], 0)
+
+    def test_plan_deadline_is_shared_by_all_searches(self):
+        planner = self._planner(seed=5)
+        planner.plan_time_budget_ms = 0
+        plan = planner.generate_meal_plan()
+
+        self.assertEqual({meal['stats']['stop_reason'] for meal in plan['meals']}, {'deadline'})
+        self.assertTrue(plan['stats']['time_budget_reached'])
+
+    def test_saved_plan_records_phase_timings(self):
+        user = User.objects.create_user(username='timed', password='secret-password')
+        planner = self._planner(seed=5)
+        planner.user = user
+        meal_plan = planner.create_meal_plan()
+
+        meal_plan.refresh_from_db()
+        self.assertEqual(meal_plan.stats['seed'], 5)
+        self.assertEqual(meal_plan.stats['meals'], 28)
+        self.assertEqual(
+            set(meal_plan.stats['timings_ms']),
+            {'catalog_load', 'initialization', 'evolution', 'scoring', 'persistence'}
+        )
+        self.assertTrue(all(ms >= 0 for ms in meal_plan.stats['timings_ms'].values()))
+
+    def test_warm_start_never_repeats_a_meal(self):
+        """Warm-started plans use distinct meals every day and do not depend on the worker count"""
+        plans = []
+        for workers in (1, 2):
+            planner = self._planner(seed=8, workers=workers)
+            planner.warm_start = True
+            plans.append(planner.generate_meal_plan()['meals'])
+
+        self.assertEqual(self._meals(plans[0]), self._meals(plans[1]))
+        for meal_type in ('breakfast', 'lunch', 'dinner', 'snack'):
+            meals = [meal['foods'] for meal in plans[0] if meal['meal_type'] == meal_type]
+            self.assertEqual(len({frozenset(food_id for food_id, _ in foods) for foods in meals}), 7)
+
+        # later days are seeded with the best meals of the earlier ones
+        self.assertEqual(plans[0][0]['stats']['seeded'], 0)
+        self.assertGreater(plans[0][-1]['stats']['seeded'], 0)
+
+    def test_warm_start_islands_same_plan_for_any_worker_count(self):
+        """Islands evolved in other processes apply the diversity guard of their search"""
+        plans = []
+        for workers in (1, 2):
+            planner = self._planner(seed=8, workers=workers)
+            planner.warm_start = True
+            planner.islands = 2
+            planner.migration_interval = 2
+            plans.append(planner.generate_meal_plan()['meals'])
+
+        self.assertEqual(self._meals(plans[0]), self._meals(plans[1]))
+        for meal_type in ('breakfast', 'lunch', 'dinner', 'snack'):
+            meals = [meal['foods'] for meal in plans[0] if meal['meal_type'] == meal_type]
+            self.assertEqual(len({frozenset(food_id for food_id, _ in foods) for foods in meals}), 7)
+
+    def test_previous_plan_meals_are_scaled_to_new_targets(self):
+        user = User.objects.create_user(username='returning', password='secret-password')
+        food_ids = self._planner().food_cache.ids[:2].tolist()
+        save_meal_plan(user, {
+            'name': 'Old plan', 'description': None, 'target_calories': 1100, 'target_protein': 70,
+            'target_carbs': 125, 'target_fat': 35, 'meals': [
+                {'day': 1, 'meal_type': 'lunch', 'foods': [(food_ids[0], 80.0), (food_ids[1], 150.0)]},
+            ],
+        })
+
+        planner = self._planner()
+        planner.user = user
+        self.assertEqual(
+            planner._previous_plan_meals(), {'lunch': [[(food_ids[0], 160.0), (food_ids[1], 200.0)]]}
+        )
+
+    def test_week_mode_plans_every_day_without_repeats(self):
+        plans = []
+        for workers in (1, 2):
+            planner = self._planner(seed=4, workers=workers)
+            planner.week_mode = True
+            plans.append(planner.generate_meal_plan()['meals'])
+
+        self.assertEqual(self._meals(plans[0]), self._meals(plans[1]))
+        self.assertEqual(
+            [(meal['day'], meal['meal_type']) for meal in plans[0]],
+            [(task['day'], task['meal_type']) for task in planner._meal_search_tasks()]
+        )
+        for meal_type in ('breakfast', 'lunch', 'dinner', 'snack'):
+            meals = [meal['foods'] for meal in plans[0] if meal['meal_type'] == meal_type]
+            self.assertEqual(len({frozenset(food_id for food_id, _ in foods) for foods in meals}), 7)
+        self.assertTrue(all(meal['stats']['week'] for meal in plans[0]))
+
+    def test_repetition_penalty_follows_shared_foods(self):
+        planner = self._planner()
+        # day 1 best meal: foods 1, 2; day 2 best meal: foods 3, 4 (-1 pads the shorter meals)
+        rows = np.array([
+            [[1, 2, -1], [3, 4, -1], [5, 6, -1]],
+            [[3, 4, -1], [1, 5, 6], [7, -1, -1]],
+        ])
+        lengths = np.array([[2, 2, 2], [2, 3, 1]])
+        scores = np.array([[0.9, 0.5, 0.1], [0.8, 0.5, 0.1]])
+
+        penalties = planner._repetition_penalties(rows, lengths, scores)
+
+        # a day's own best meal is not a repeat; a copy of the other day's best gets the full penalty
+        expected = planner.repetition_penalty * np.array([[0.0, 1.0, 0.0], [0.0, 1 / 3, 0.0]])
+        np.testing.assert_allclose(penalties, expected)
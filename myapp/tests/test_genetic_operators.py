@@ -0,0 +1,112 @@
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from myapp.genetic_meal_planner import GeneticMealPlanner
+from myapp.genetic_operators import (
+    MAX_MEAL_FOODS, initialize_meals, mutate_meals, sample_new_foods, tournament_select, uniform_crossover
+)
+
+
+def valid_meals(test, rows, amounts, lengths):
+    """Assert that every meal has its foods first, no duplicate food and at most MAX_MEAL_FOODS foods."""
+    test.assertEqual(rows.shape[1], MAX_MEAL_FOODS)
+    for meal_rows, meal_amounts, length in zip(rows.tolist(), amounts.tolist(), lengths.tolist()):
+        foods = [row for row in meal_rows if row >= 0]
+        test.assertEqual(meal_rows[:length], foods)
+        test.assertEqual(len(set(foods)), len(foods))
+        test.assertTrue(all(amount == 0 for amount in meal_amounts[length:]))
+
+
+class GeneticOperatorsTest(SimpleTestCase):
+    """Test the array operators on padded genomes"""
+
+    def setUp(self):
+        self.gen = np.random.default_rng(3)
+        # 200 meals of 8 distinct foods among rows 0-19, 3-8 foods each
+        self.lengths = self.gen.integers(3, MAX_MEAL_FOODS + 1, size=200)
+        self.rows = np.full((200, MAX_MEAL_FOODS), -1)
+        self.amounts = np.zeros((200, MAX_MEAL_FOODS))
+        for meal, length in enumerate(self.lengths):
+            self.rows[meal, :length] = self.gen.permutation(20)[:length]
+            self.amounts[meal, :length] = self.gen.uniform(20, 150, size=length)
+
+    def test_tournament_winners_beat_their_opponents(self):
+        scores = np.arange(10, dtype=float)
+        winners = tournament_select(self.gen, scores, 1000)
+        self.assertEqual(winners.shape, (1000,))
+        # the worst meal can only win a tournament against itself
+        self.assertLess((winners == 0).mean(), 0.01)
+        self.assertGreater(scores[winners].mean(), scores.mean())
+
+    def test_crossover_children_are_valid_meals(self):
+        rows, amounts, lengths = uniform_crossover(
+            self.gen, self.rows, self.amounts, self.rows[::-1], self.amounts[::-1]
+        )
+        valid_meals(self, rows, amounts, lengths)
+        self.assertTrue((lengths > 0).all())
+
+        # every inherited food keeps the amount it had in one of the parents
+        for child, parents in zip(range(len(rows)), zip(range(200), range(199, -1, -1))):
+            inherited = {
+                (row, amount) for parent in parents for row, amount in zip(self.rows[parent], self.amounts[parent])
+            }
+            for row, amount in zip(rows[child, :lengths[child]], amounts[child, :lengths[child]]):
+                self.assertIn((row, amount), inherited)
+
+    def test_crossover_child_without_genes_copies_a_parent(self):
+        empty = np.full((1, MAX_MEAL_FOODS), -1)
+        rows, amounts, lengths = uniform_crossover(
+            self.gen, empty, np.zeros((1, MAX_MEAL_FOODS)), self.rows[:1], self.amounts[:1]
+        )
+        self.assertTrue(set(rows[0, :lengths[0]]) <= set(self.rows[0, :self.lengths[0]]))
+        self.assertGreater(lengths[0], 0)
+
+    def test_new_foods_are_not_in_the_meal(self):
+        new_rows = sample_new_foods(self.gen, np.arange(20), self.rows)
+        for meal_rows, row in zip(self.rows, new_rows):
+            self.assertTrue(row == -1 or row not in meal_rows)
+
+        # a pool made of the meal's own foods has nothing to offer
+        self.assertEqual(sample_new_foods(self.gen, self.rows[0, :1], self.rows[:1]).tolist(), [-1])
+
+    def test_mutation_keeps_meals_valid(self):
+        rows, amounts, lengths = mutate_meals(
+            self.gen, self.rows, self.amounts, self.lengths, np.arange(20), mutation_rate=1.0
+        )
+        valid_meals(self, rows, amounts, lengths)
+        self.assertTrue((lengths >= 1).all())
+        self.assertTrue((np.abs(lengths - self.lengths) <= 1).all())
+        self.assertFalse((rows == self.rows).all())
+
+        unchanged = mutate_meals(self.gen, self.rows, self.amounts, self.lengths, np.arange(20), mutation_rate=0.0)
+        self.assertEqual(unchanged[0].tolist(), self.rows.tolist())
+
+
+class VectorizedOperatorsPlannerTest(TestCase):
+    """Test the planner with the array operators"""
+    fixtures = ['foods.json']
+
+    def _planner(self, seed=5):
+        return GeneticMealPlanner(None, 2200, 140, 250, 70, seed=seed, vectorized_operators=True)
+
+    def test_initialized_meals_follow_the_meal_slots(self):
+        planner = self._planner()
+        catalog = planner.food_cache
+        rows, amounts, lengths = initialize_meals(planner.np_rng, catalog, 'lunch', 50, 770)
+
+        valid_meals(self, rows, amounts, lengths)
+        for slot, column in zip(['protein', 'carbs', 'veggies'], rows[:, :3].T):
+            self.assertTrue(np.isin(column, catalog.slot_rows['lunch'][slot]).all())
+
+        snacks = initialize_meals(planner.np_rng, catalog, 'snack', 200, 220)[2]
+        self.assertEqual(set(snacks.tolist()), {1, 2})
+
+    def test_meal_search_is_reproducible(self):
+        task = self._planner()._meal_search_tasks()[1]
+        first = self._planner()._run_meal_search(task)
+        second = self._planner()._run_meal_search(task)
+
+        self.assertEqual(first['foods'], second['foods'])
+        self.assertEqual(first['fitness'], second['fitness'])
+        self.assertGreater(first['fitness'], first['stats']['initial_fitness'] - 1e-9)
+        self.assertTrue(0 < len(first['foods']) <= MAX_MEAL_FOODS)
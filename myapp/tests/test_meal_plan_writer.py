@@ -0,0 +1,57 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from myapp.meal_plan_writer import save_meal_plan
+from myapp.models import Food, MealFoodItem, MealPlanDay, Meal
+
+
+class SaveMealPlanTest(TestCase):
+    """Test bulk persistence of a meal plan generated in memory"""
+
+    fixtures = ['foods.json']
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='planner', password='secret-password')
+        food_ids = list(Food.objects.values_list('id', flat=True)[:3])
+        self.plan = {
+            'name': 'Test plan',
+            'description': 'Generated in memory',
+            'target_calories': 2000,
+            'target_protein': 150,
+            'target_carbs': 200,
+            'target_fat': 67,
+            'seed': 1234,
+            'meals': [
+                {'day': day, 'meal_type': meal_type, 'fitness': 0.8,
+                 'foods': [(food_ids[0], 100.0), (food_ids[1], 50.0), (food_ids[2], 25.0)]}
+                for day in range(1, 8)
+                for meal_type in ['breakfast', 'lunch', 'dinner', 'snack']
+            ],
+        }
+
+    def test_plan_saved_with_one_insert_per_table(self):
+        """Plan, days, meals and food items are each written with a single query"""
+        # savepoint + 4 inserts + release savepoint
+        with self.assertNumQueries(6):
+            meal_plan = save_meal_plan(self.user, self.plan)
+
+        self.assertEqual(meal_plan.seed, 1234)
+        self.assertEqual(MealPlanDay.objects.filter(meal_plan=meal_plan).count(), 7)
+        self.assertEqual(Meal.objects.filter(meal_plan_day__meal_plan=meal_plan).count(), 28)
+        self.assertEqual(MealFoodItem.objects.filter(meal__meal_plan_day__meal_plan=meal_plan).count(), 84)
+
+        lunch = Meal.objects.get(meal_plan_day__meal_plan=meal_plan, meal_plan_day__day=3, meal_type='lunch')
+        self.assertEqual(
+            sorted(lunch.food_items.values_list('amount', flat=True)), [25.0, 50.0, 100.0]
+        )
+
+    def test_persistence_time_saved_in_the_same_transaction(self):
+        """The write time is stored with the plan stats before the transaction commits"""
+        self.plan['stats'] = {'seed': 1234, 'timings_ms': {'evolution': 10.0}}
+        # savepoint + 4 inserts + stats update + release savepoint
+        with self.assertNumQueries(7):
+            meal_plan = save_meal_plan(self.user, self.plan)
+
+        meal_plan.refresh_from_db()
+        self.assertEqual(set(meal_plan.stats['timings_ms']), {'evolution', 'persistence'})
+        self.assertGreaterEqual(meal_plan.stats['timings_ms']['persistence'], 0)
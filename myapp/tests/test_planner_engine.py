@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from myapp.food_catalog import CONFLICTING_FOOD_GROUPS, MEAL_CATEGORIES, MEAL_FUNCTIONAL_CATEGORIES, FoodCatalog
+from myapp.genetic_meal_planner import GeneticMealPlanner
+from myapp.planner_engine import MealPlanEngine
+from myapp.planner_presets import PLANNER_PRESETS
+
+
+class MealPlanEngineTest(SimpleTestCase):
+    """Test the planner engine on a catalog built without any database"""
+
+    # name, category, calories, protein, carbs, fat per 100g
+    FOODS = [
+        ('Egg, whole', 'egg', 143, 12.6, 0.7, 9.5),
+        ('Oats', 'oats', 389, 16.9, 66, 6.9),
+        ('Greek yogurt', 'yogurt', 59, 10, 3.6, 0.4),
+        ('Banana', 'banana', 89, 1.1, 23, 0.3),
+        ('Chicken breast', 'chicken', 165, 31, 0, 3.6),
+        ('Salmon', 'fish', 208, 20, 0, 13),
+        ('Rice, white', 'rice', 130, 2.7, 28, 0.3),
+        ('Potato', 'potato', 77, 2, 17, 0.1),
+        ('Broccoli', 'broccoli', 34, 2.8, 6.6, 0.4),
+        ('Spinach', 'spinach', 23, 2.9, 3.6, 0.4),
+        ('Almonds', 'nuts', 579, 21, 22, 50),
+        ('Apple', 'apple', 52, 0.3, 14, 0.2),
+    ]
+
+    def setUp(self):
+        foods = [
+            {'id': index + 1, 'name': name, 'food_category': category, 'calories_per_100g': calories,
+             'protein_per_100g': protein, 'carbs_per_100g': carbs, 'fat_per_100g': fat}
+            for index, (name, category, calories, protein, carbs, fat) in enumerate(self.FOODS)
+        ]
+        self.catalog = FoodCatalog(
+            foods, MEAL_CATEGORIES, MEAL_FUNCTIONAL_CATEGORIES, CONFLICTING_FOOD_GROUPS, min_meal_foods=4
+        )
+
+    def _engine(self, **kwargs):
+        engine = MealPlanEngine(self.catalog, 2200, 140, 250, 70, seed=4, **kwargs)
+        engine.generations = 5
+        engine.population_size = 30
+        return engine
+
+    def test_plan_is_made_of_catalog_genomes(self):
+        plan = self._engine().generate_meal_plan()
+
+        self.assertEqual(len(plan['meals']), 28)
+        food_ids = set(self.catalog.ids.tolist())
+        for meal in plan['meals']:
+            self.assertTrue(meal['foods'])
+            self.assertTrue(all(food_id in food_ids and amount > 0 for food_id, amount in meal['foods']))
+
+    def test_adapter_plans_like_the_engine(self):
+        """The Django adapter only adds loading and saving, the search is the same"""
+        planner = GeneticMealPlanner(None, 2200, 140, 250, 70, seed=4, catalog=self.catalog)
+        planner.generations = 5
+        planner.population_size = 30
+
+        self.assertEqual(
+            [meal['foods'] for meal in planner.generate_meal_plan()['meals']],
+            [meal['foods'] for meal in self._engine().generate_meal_plan()['meals']],
+        )
+        self.assertIs(type(planner._worker_engine()), MealPlanEngine)
+        self.assertFalse(hasattr(planner._worker_engine(), 'user'))
+
+    def test_presets_set_the_search_parameters(self):
+        engine = self._engine(preset='fast')
+        self.assertEqual(engine.population_size, 30)
+        self.assertIsNone(engine.meal_time_budget_ms)
+
+        engine.apply_preset('thorough')
+        for name, value in PLANNER_PRESETS['thorough'].items():
+            self.assertEqual(getattr(engine, name), value)
+        engine.generations = 2
+        self.assertEqual(engine.generate_meal_plan()['stats']['preset'], 'thorough')
+
+        with self.assertRaises(ValueError):
+            self._engine(preset='instant')
+
+    def test_preset_plans_depend_only_on_the_seed(self):
+        """Presets set no time budget, so a seeded plan is never cut short by the machine's speed"""
+        for preset in PLANNER_PRESETS:
+            plans = [MealPlanEngine(self.catalog, 2200, 140, 250, 70, seed=4, preset=preset).generate_meal_plan()
+                     for _ in range(2)]
+            self.assertEqual([meal['foods'] for meal in plans[0]['meals']], [meal['foods'] for meal in plans[1]['meals']])
+            self.assertFalse(plans[0]['stats']['time_budget_reached'])
+
+    def test_engine_imports_without_django(self):
+        environment = {key: value for key, value in os.environ.items() if key != 'DJANGO_SETTINGS_MODULE'}
+        output = subprocess.run(
+            [sys.executable, '-c', "import sys, myapp.planner_engine; print('django' in sys.modules)"],
+            cwd=settings.BASE_DIR, env=environment, capture_output=True, text=True, check=True
+        ).stdout
+        self.assertEqual(output.strip(), 'False')
+
+    def test_unknown_default_preset_fails_at_startup(self):
+        environment = {**os.environ, 'MEAL_PLANNER_PRESET': 'fsat'}
+        result = subprocess.run(
+            [sys.executable, '-c', 'import licenta.settings'],
+            cwd=settings.BASE_DIR, env=environment, capture_output=True, text=True
+        )
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("Unknown MEAL_PLANNER_PRESET 'fsat'", result.stderr)
@@ -0,0 +1,174 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models.query import QuerySet
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from myapp.catalog_cache import clear_food_catalog
+from myapp.models import MealPlan, MealPlanJob, QuizResponse
+from myapp.planner_jobs import (
+    claim_next_job, enqueue_meal_plan_job, planner_for_job, release_job, requeue_stale_jobs, run_job
+)
+
+
+class MealPlanJobQueueTest(TestCase):
+    """Test the database-backed queue of meal plan jobs"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='planner', password='secret-password')
+        self.other_user = User.objects.create_user(username='other', password='secret-password')
+
+    def _enqueue(self, user):
+        return enqueue_meal_plan_job(user, 2000, 150, 200, 67)
+
+    def test_user_has_one_active_job(self):
+        """Repeated requests while a plan is generated reuse the queued job"""
+        first = self._enqueue(self.user)
+        second = self._enqueue(self.user)
+
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(MealPlanJob.objects.filter(user=self.user).count(), 1)
+
+    def test_racing_requests_share_one_job(self):
+        """A job queued by another request between the check and the insert is returned"""
+        first = self._enqueue(self.user)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            MealPlanJob.objects.create(user=self.user, target_calories=2000, target_protein=150, target_carbs=200,
+                                       target_fat=67)
+
+        # the other request's job is not seen by the first check
+        with mock.patch.object(QuerySet, 'first', autospec=True, side_effect=[None, first]):
+            self.assertEqual(self._enqueue(self.user).id, first.id)
+        self.assertEqual(MealPlanJob.objects.filter(user=self.user).count(), 1)
+
+    def test_jobs_claimed_once_in_order(self):
+        first = self._enqueue(self.user)
+        second = self._enqueue(self.other_user)
+
+        self.assertEqual(claim_next_job().id, first.id)
+        self.assertEqual(claim_next_job().id, second.id)
+        self.assertIsNone(claim_next_job())
+
+        first.refresh_from_db()
+        self.assertEqual(first.status, MealPlanJob.RUNNING)
+        self.assertIsNotNone(first.started_at)
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = self._enqueue(self.user)
+        claim_next_job()
+
+        self.assertEqual(requeue_stale_jobs(timeout_seconds=3600), 0)
+        # jobs the caller is still running stay running
+        self.assertEqual(requeue_stale_jobs(timeout_seconds=-1, running_ids=[job.id]), 0)
+        self.assertEqual(requeue_stale_jobs(timeout_seconds=-1), 1)
+        self.assertEqual(claim_next_job().id, job.id)
+
+    def test_released_job_is_claimed_again(self):
+        """A claimed job that could not be started goes back to the queue, other jobs are untouched"""
+        job = self._enqueue(self.user)
+        self.assertEqual(release_job(job.id), 0)
+
+        claim_next_job()
+        self.assertEqual(release_job(job.id), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.started_at), (MealPlanJob.QUEUED, None))
+        self.assertEqual(claim_next_job().id, job.id)
+
+    def test_failed_generation_is_recorded(self):
+        job = self._enqueue(self.user)
+        claim_next_job()
+
+        with mock.patch('myapp.planner_jobs.GeneticMealPlanner.create_meal_plan', side_effect=ValueError('no foods')):
+            self.assertEqual(run_job(job.id), MealPlanJob.FAILED)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, MealPlanJob.FAILED)
+        self.assertEqual(job.error, 'no foods')
+
+
+class MealPlanJobViewTest(TestCase):
+    """Test queuing a plan from the web and polling its status"""
+
+    fixtures = ['foods.json']
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='planner', password='secret-password')
+        QuizResponse.objects.create(
+            user=self.user, age=30, height=180, weight=80, gender='masculin', objective=3, activity_level=3
+        )
+        self.client.login(username='planner', password='secret-password')
+
+    def test_new_plan_is_queued_instead_of_generated(self):
+        response = self.client.get(reverse('meal_plan') + '?new_plan=true')
+
+        self.assertRedirects(response, reverse('results_view'))
+        job = MealPlanJob.objects.get(user=self.user)
+        self.assertEqual(job.status, MealPlanJob.QUEUED)
+        self.assertFalse(MealPlan.objects.filter(user=self.user).exists())
+
+        # the results page polls the queued job
+        response = self.client.get(reverse('results_view'))
+        self.assertContains(response, reverse('meal_plan_job_status', kwargs={'job_id': job.id}))
+
+    def test_preset_is_passed_to_the_planner(self):
+        self.client.get(reverse('meal_plan') + '?new_plan=true&preset=fast')
+
+        job = MealPlanJob.objects.get(user=self.user)
+        self.assertEqual(job.preset, 'fast')
+        self.assertEqual(planner_for_job(job).population_size, 60)
+
+    @override_settings(MEAL_PLANNER_PATIENCE=5, MEAL_PLANNER_PLAN_TIME_BUDGET_MS=0)
+    def test_search_limits_come_from_the_settings(self):
+        """A plan time budget set in the settings bounds the latency of every job"""
+        # the catalog of this process may have been loaded by a test without the foods fixture
+        clear_food_catalog()
+        job = enqueue_meal_plan_job(self.user, 2000, 150, 200, 67)
+        planner = planner_for_job(job)
+        self.assertEqual(
+            (planner.patience, planner.target_fitness, planner.meal_time_budget_ms, planner.plan_time_budget_ms),
+            (5, None, None, 0)
+        )
+
+        claim_next_job()
+        self.assertEqual(run_job(job.id), MealPlanJob.DONE)
+        job.refresh_from_db()
+        self.assertTrue(job.meal_plan.stats['time_budget_reached'])
+
+    def test_unknown_preset_is_refused(self):
+        response = self.client.get(reverse('meal_plan') + '?new_plan=true&preset=instant')
+
+        self.assertRedirects(response, reverse('results_view'))
+        self.assertFalse(MealPlanJob.objects.filter(user=self.user).exists())
+
+    def test_status_endpoint_reports_plan_when_done(self):
+        self.client.get(reverse('meal_plan') + '?new_plan=true')
+        job = MealPlanJob.objects.get(user=self.user)
+        status_url = reverse('meal_plan_job_status', kwargs={'job_id': job.id})
+
+        self.assertEqual(self.client.get(status_url).json(), {'id': job.id, 'status': 'queued', 'queue_position': 0})
+
+        claim_next_job()
+        with mock.patch('myapp.genetic_meal_planner.GeneticMealPlanner.generate_meal_plan') as generate:
+            generate.return_value = {
+                'name': 'Test plan', 'description': None, 'target_calories': job.target_calories,
+                'target_protein': job.target_protein, 'target_carbs': job.target_carbs,
+                'target_fat': job.target_fat, 'seed': 1, 'stats': {'timings_ms': {}}, 'meals': [],
+            }
+            self.assertEqual(run_job(job.id), MealPlanJob.DONE)
+
+        job.refresh_from_db()
+        self.assertEqual(self.client.get(status_url).json(), {
+            'id': job.id,
+            'status': 'done',
+            'meal_plan_id': job.meal_plan_id,
+            'redirect_url': reverse('view_meal_plan', kwargs={'plan_id': job.meal_plan_id}),
+        })
+
+    def test_status_of_other_users_job_is_hidden(self):
+        other_user = User.objects.create_user(username='other', password='secret-password')
+        job = enqueue_meal_plan_job(other_user, 2000, 150, 200, 67)
+
+        response = self.client.get(reverse('meal_plan_job_status', kwargs={'job_id': job.id}))
+        self.assertEqual(response.status_code, 404)
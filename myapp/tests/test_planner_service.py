@@ -0,0 +1,124 @@
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from myapp.management.commands.run_planner_service import PlannerServer, PlannerService
+from myapp.models import Meal, MealPlanJob
+from myapp.planner_jobs import enqueue_meal_plan_job
+from myapp.planner_service import PlannerServiceError, send_request, service_stats, submit_job
+
+
+class PlannerServiceTest(TestCase):
+    """Test the resident planner service serving queued jobs"""
+
+    fixtures = ['foods.json']
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='planner', password='secret-password')
+        self.job = enqueue_meal_plan_job(self.user, 2000, 150, 200, 67)
+
+    def _service(self, **kwargs):
+        service = PlannerService(processes=1, **kwargs)
+        self.addCleanup(service.shutdown)
+        return service
+
+    def test_job_is_generated_and_counted(self):
+        service = self._service()
+        responses = []
+        service.run_job(self.job.id, responses.append)
+
+        self.assertEqual(responses, [{'accepted': True, 'queue_depth': 0}])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, MealPlanJob.DONE)
+        self.assertEqual(Meal.objects.filter(meal_plan_day__meal_plan=self.job.meal_plan).count(), 28)
+
+        stats = service.stats()
+        self.assertEqual((stats['served'], stats['failed'], stats['queue_depth'], stats['running']), (1, 0, 0, 0))
+        self.assertGreater(stats['latency_ms']['p50'], 0)
+        self.assertGreaterEqual(stats['latency_ms']['max'], stats['queue_wait_ms']['max'])
+
+        # a job that is not queued any more is refused
+        service.run_job(self.job.id, responses.append)
+        self.assertEqual(responses[-1]['reason'], 'job not queued')
+
+    def test_jobs_past_the_queue_limit_stay_queued(self):
+        service = self._service(max_queue=0)
+        responses = []
+        service.run_job(self.job.id, responses.append)
+
+        self.assertEqual(responses, [{'accepted': False, 'reason': 'queue full', 'queue_depth': 0}])
+        self.assertEqual(service.stats()['rejected'], 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, MealPlanJob.QUEUED)
+
+    def test_job_not_started_is_answered_and_queued_again(self):
+        """A pool refusing the job (e.g. shut down by a catalog refresh) leaves it to run_planner_worker"""
+        service = self._service()
+        responses = []
+        with mock.patch.object(service.executor, 'submit', side_effect=RuntimeError('pool shut down')):
+            service.run_job(self.job.id, responses.append)
+
+        self.assertEqual(responses, [{'error': f"Meal plan job {self.job.id} not started: pool shut down"}])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, MealPlanJob.QUEUED)
+        self.assertEqual((service.stats()['failed'], service.stats()['running']), (1, 0))
+
+    def test_abandoned_jobs_are_requeued(self):
+        """Jobs left running by a crashed service are requeued, the jobs this service runs are not"""
+        MealPlanJob.objects.filter(id=self.job.id).update(
+            status=MealPlanJob.RUNNING, started_at=timezone.now() - timedelta(hours=1)
+        )
+        service = self._service(stale_after=60, requeue_interval=3600)
+        service.running_ids.add(self.job.id)
+        self.assertEqual(service.requeue_stale_jobs(), 0)
+
+        service.running_ids.clear()
+        # checked at most once per requeue interval
+        self.assertEqual(service.requeue_stale_jobs(), 0)
+        service.requeued_at = None
+        self.assertEqual(service.requeue_stale_jobs(), 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, MealPlanJob.QUEUED)
+
+    def test_requests_over_the_socket(self):
+        socket_path = os.path.join(tempfile.mkdtemp(), 'planner.sock')
+        server = PlannerServer(socket_path, self._service())
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(thread.join)
+        self.addCleanup(server.shutdown)
+
+        stats = service_stats(socket_path)
+        self.assertEqual((stats['processes'], stats['served'], stats['latency_ms']), (1, 0, None))
+
+        with self.assertRaises(PlannerServiceError):
+            send_request({'command': 'restart'}, socket_path)
+        with self.assertRaises(PlannerServiceError):
+            send_request({'command': 'job', 'job_id': 'first'}, socket_path)
+
+
+class SubmitJobTest(TestCase):
+    """Test submitting jobs from the web tier"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='planner', password='secret-password')
+        self.job = enqueue_meal_plan_job(user, 2000, 150, 200, 67)
+
+    @override_settings(MEAL_PLANNER_SOCKET='')
+    def test_without_service_jobs_are_only_queued(self):
+        self.assertFalse(submit_job(self.job))
+
+    def test_unreachable_service_leaves_job_queued(self):
+        socket_path = os.path.join(tempfile.mkdtemp(), 'missing.sock')
+        with self.assertLogs('myapp.planner_service', 'WARNING'):
+            self.assertFalse(submit_job(self.job, socket_path))
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, MealPlanJob.QUEUED)
@@ -0,0 +1,61 @@
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from myapp.genetic_meal_planner import GeneticMealPlanner
+from myapp.portion_optimizer import optimize_portions
+
+
+class OptimizePortionsTest(SimpleTestCase):
+    """Test the bounded least-squares portion solver"""
+
+    # calories, protein, carbs, fat per 100g
+    CHICKEN = [165, 31, 0, 3.6]
+    RICE = [130, 2.7, 28, 0.3]
+
+    def test_exact_portions_are_found(self):
+        """Targets made of 150g chicken and 120g rice are solved back to those grams"""
+        nutrients = np.array([[self.CHICKEN, self.RICE]])
+        targets = np.array([150, 120]) @ nutrients[0] / 100
+
+        grams = optimize_portions(nutrients, np.ones((1, 2), dtype=bool), np.array([[50.0, 50.0]]), targets,
+                                  iterations=500)
+        np.testing.assert_allclose(grams, [[150, 120]], rtol=0.02)
+
+    def test_portions_stay_within_bounds(self):
+        nutrients = np.array([[self.CHICKEN, self.RICE], [self.RICE, self.RICE]])
+        valid = np.array([[True, True], [True, False]])
+
+        # targets need more than 200g of every food, then less than 10g of most of them
+        high = optimize_portions(nutrients, valid, np.full((2, 2), 80.0), [5000, 300, 600, 150])
+        low = optimize_portions(nutrients, valid, np.full((2, 2), 80.0), [20, 2, 2, 1])
+
+        self.assertEqual(high.tolist(), [[200.0, 200.0], [200.0, 0.0]])
+        self.assertEqual(low[0].tolist(), [10.0, 10.0])
+        self.assertTrue(10 <= low[1, 0] <= 200)
+        self.assertEqual(low[1, 1], 0.0)
+
+
+class HybridPlannerTest(TestCase):
+    """Test the planner with the portion optimizer"""
+
+    fixtures = ['foods.json']
+
+    def test_optimized_portions_improve_fitness(self):
+        planner = GeneticMealPlanner(
+            user=None, target_calories=2000, target_protein=150, target_carbs=200, target_fat=67, seed=9,
+            portion_optimizer=True
+        )
+        foods = planner.food_cache.meal_rows['dinner']
+        foods_dict = planner.food_cache.index_for(foods)
+        targets = (600, 45, 60, 20)
+
+        population = planner._initialize_population(foods, targets[0], 'dinner')
+        optimized = planner._optimize_portions(population, foods_dict, *targets)
+
+        for meal, optimized_meal in zip(population, optimized):
+            self.assertEqual([food_id for food_id, _ in meal], [food_id for food_id, _ in optimized_meal])
+            self.assertTrue(all(10 <= grams <= 200 for _, grams in optimized_meal))
+
+        before = planner._score_population(population, foods_dict, *targets)
+        after = planner._score_population(optimized, foods_dict, *targets)
+        self.assertGreater(sum(after), sum(before))
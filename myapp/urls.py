@@ -14,6 +14,7 @@ urlpatterns = [
     path('results/',views.results_view, name='results_view'),  
 
     path('meal-plan/', views.create_view_meal_plan, name='meal_plan'),
+    path('api/meal-plan-jobs/<int:job_id>/', views.meal_plan_job_status, name='meal_plan_job_status'),
     
     path('meal-plan/<int:plan_id>/', views.view_meal_plan, name='view_meal_plan'),
     path('debug-meal-plan/<int:plan_id>/', views.debug_meal_plan, name='debug_meal_plan'),
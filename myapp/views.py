@@ -1,4 +1,5 @@
 import json
+import logging
 from datetime import datetime, timedelta, date
 from django.shortcuts import render, HttpResponse, redirect
 from django.contrib.auth import login, logout, get_user_model
@@ -10,8 +11,16 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.decorators import login_required
 from .auth_backend import auth
 from django.contrib import messages
-from .models import QuizResponse, MealPlan, MealPlanDay, Meal, MealFoodItem, Food, FoodJournal
-from .genetic_meal_planner import GeneticMealPlanner
+from django.urls import reverse
+from django.conf import settings
+from .models import QuizResponse, MealPlan, MealPlanDay, Meal, MealFoodItem, Food, FoodJournal, MealPlanJob
+from .planner_jobs import ACTIVE_STATUSES, enqueue_meal_plan_job, job_status
+from .nutrition import calculate_macros
+from .planner_presets import PLANNER_PRESETS
+from .planner_service import submit_job
+
+logger = logging.getLogger(__name__)
+
 
 def home(request):
     # Check if user has a meal plan
@@ -65,7 +74,7 @@ def quiz_view(request):
             # Ensure request.user is the correct User model
             try:
                 user = request.user
-                print(f"User ID: {user.id}")
+                logger.debug("Saving quiz response of user %s", user.id)
                 quiz_response.user = user
 
                 quiz_response.calculate_bmr()
@@ -94,12 +103,18 @@ def results_view(request):
         
         # verifing if the user has an existing meal plan
         existing_plan = MealPlan.objects.filter(user=request.user).order_by('-created_at').first()
+
+        # a plan being generated in the background, polled by the page until it is ready
+        pending_job = MealPlanJob.objects.filter(
+            user=request.user, status__in=ACTIVE_STATUSES
+        ).order_by('created_at').first()
         
         context = {
             'quiz_response': quiz_response,
             'macros': macros,
             'target_calories': target_calories,
-            'existing_plan': existing_plan
+            'existing_plan': existing_plan,
+            'pending_job': pending_job
         }
         return render(request, 'results.html', context)
     except QuizResponse.DoesNotExist:
@@ -107,49 +122,6 @@ def results_view(request):
         return redirect('quiz_view')
     
 
-def calculate_macros(quiz_response):
-    """Distribution of macronutrients based on the user's objective"""
-    target_calories = quiz_response.calculate_target_calories()
-    
-    if quiz_response.objective == 1:  # Slăbit
-        protein_pct = 0.40  # 40% din calorii
-        fat_pct = 0.20      # 30% din calorii
-        carbs_pct = 0.40    # 30% din calorii
-    
-    elif quiz_response.objective == 3:  # Creștere masă musculară
-        # Pentru masă musculară: Proteine crescute, carbohidrați crescuți, grăsimi moderate
-        protein_pct = 0.30  # 30% din calorii
-        fat_pct = 0.25      # 25% din calorii
-        carbs_pct = 0.45    # 45% din calorii
-    
-    elif quiz_response.objective == 2:  # Punere în greutate
-        # Pentru punere în greutate: Proteine moderate, carbohidrați crescuți, grăsimi moderate
-        protein_pct = 0.25  # 25% din calorii
-        fat_pct = 0.30      # 30% din calorii
-        carbs_pct = 0.45    # 45% din calorii
-        
-    else:  # Recompoziție corporală
-        # Recompoziție: Balans între proteine, carbohidrați și grăsimi
-        protein_pct = 0.30  # 30% din calorii
-        fat_pct = 0.30      # 30% din calorii
-        carbs_pct = 0.40    # 40% din calorii
-
-    protein_calories = target_calories * protein_pct
-    fat_calories = target_calories * fat_pct
-    carb_calories = target_calories * carbs_pct
-    
-    # conversion to grams (1g protein = 4 cal, 1g fat = 9 cal, 1g carb = 4 cal)
-    protein_grams = round(protein_calories / 4)
-    fat_grams = round(fat_calories / 9)
-    carb_grams = round(carb_calories / 4)
-    
-    return {
-        'protein': protein_grams,
-        'fat': fat_grams,
-        'carbs': carb_grams
-    }
-
-
 @login_required
 def view_meal_plan(request, plan_id):
     """Afișează un plan de masă specific"""
@@ -202,9 +174,20 @@ def view_meal_plan(request, plan_id):
 
 @login_required
 def create_view_meal_plan(request):
-    """generates a new meal plan based on the user's quiz response"""
+    """queues the generation of a new meal plan based on the user's quiz response
+
+    The `preset` parameter (fast, balanced or thorough) trades plan quality for speed;
+    it defaults to the MEAL_PLANNER_PRESET setting.
+
+    The plan is generated by the run_planner_service command when it is running, otherwise by
+    the run_planner_worker command; the results page polls meal_plan_job_status and redirects
+    to the plan once it is ready."""
     try:
         new_plan = request.GET.get('new_plan') == 'true'
+        preset = request.GET.get('preset', settings.MEAL_PLANNER_PRESET)
+        if preset not in PLANNER_PRESETS:
+            messages.error(request, f"Unknown plan preset '{preset}', expected one of: {', '.join(PLANNER_PRESETS)}")
+            return redirect('results_view')
 
         quiz_response = QuizResponse.objects.filter(user=request.user).latest('submitted_at')
         
@@ -215,39 +198,54 @@ def create_view_meal_plan(request):
             # redurect to existing plan if it exists
             return redirect('view_meal_plan', plan_id=existing_plan.id)
         
-        print(f"generating a new plan for user {request.user}")
         target_calories = quiz_response.calculate_target_calories()
-        print(f"Target calories: {target_calories}")
+        logger.info("Queuing a new plan for user %s (%.0f calories)", request.user, target_calories)
         
         macros = calculate_macros(quiz_response)
         target_protein = macros['protein']
         target_carbs = macros['carbs'] 
         target_fat = macros['fat']
         
-        print(f"Food count in database: {Food.objects.count()}")
-        
-        # using GeneticMealPlanner to create a meal plan
-        planner = GeneticMealPlanner(
-            user=request.user,
+        # the genetic algorithm runs in a planner worker, not in this request
+        job = enqueue_meal_plan_job(
+            request.user,
             target_calories=target_calories,
             target_protein=target_protein,
             target_carbs=target_carbs,
-            target_fat=target_fat
+            target_fat=target_fat,
+            preset=preset
         )
+        logger.info("Meal plan job %s (%s preset): %s", job.id, job.preset, job.status)
+
+        # a running planner service starts the job right away; otherwise run_planner_worker polls it
+        if job.status == MealPlanJob.QUEUED:
+            submit_job(job)
         
-        meal_plan = planner.create_meal_plan()
-        print(f"Plan generat cu ID: {meal_plan.id}")
-        
-        return redirect('view_meal_plan', plan_id=meal_plan.id)
+        return redirect('results_view')
         
     except QuizResponse.DoesNotExist:
         messages.warning(request, 'You need to complete the quiz first to generate a meal plan.')
         return redirect('quiz_view')
     except Exception as e:
-        print(f"Error at generating meal plan {str(e)}")
+        logger.exception("Error at generating meal plan")
         messages.error(request, f'There was an error when generating meal plan {str(e)}')
         return redirect('results_view')
     
+@login_required
+def meal_plan_job_status(request, job_id):
+    """API for polling the status of a meal plan generation job"""
+    try:
+        job = MealPlanJob.objects.get(id=job_id, user=request.user)
+    except MealPlanJob.DoesNotExist:
+        return JsonResponse({'error': 'Job not found'}, status=404)
+
+    status = job_status(job)
+    if job.status == MealPlanJob.DONE and job.meal_plan_id:
+        status['redirect_url'] = reverse('view_meal_plan', kwargs={'plan_id': job.meal_plan_id})
+
+    return JsonResponse(status)
+
+
 @login_required
 def debug_meal_plan(request, plan_id):
     plan = MealPlan.objects.get(id=plan_id)